@@ -0,0 +1,95 @@
+# benchmarks/__main__.py
+"""
+    python -m benchmarks run [--scales 1000 10000 100000] [--repeat 3] [--only NAME ...] [--save PATH]
+    python -m benchmarks compare BASELINE.json CURRENT.json [--threshold 0.15]
+    python -m benchmarks generate OUT_DIR --rows 100000
+    python -m benchmarks load --queries 40 [--openai_429_rate 0.05 ...]   (offline, against the mock APIs)
+    python -m benchmarks check-cli [--budget 0.2]   (exit 1 when `jobserp-explorer --help` is slow or heavy)
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks import generators, load_test
+from benchmarks.suite import (BENCHMARKS, CLI_HEAVY_MODULES, CLI_IMPORT_BUDGET_S, DEFAULT_REPEAT, DEFAULT_SCALES,
+                              check_cli_import, compare, print_comparison, run_suite)
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="JobSERP Explorer benchmarks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the suite and save the results as JSON")
+    run.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="Row counts (1k to 1M)")
+    run.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    run.add_argument("--only", nargs="+", choices=[*BENCHMARKS, "cli_import"], help="Run only these benchmarks")
+    run.add_argument("--save", help=f"Output JSON (default: {BASELINE_DIR.name}/bench_<timestamp>.json)")
+    run.add_argument("--baseline", help="Compare against this JSON after running; exit 1 on regression")
+    run.add_argument("--threshold", type=float, default=0.15, help="Relative slowdown flagged as a regression")
+
+    cmp_ = sub.add_parser("compare", help="Compare two result files; exit 1 on regression")
+    cmp_.add_argument("baseline")
+    cmp_.add_argument("current")
+    cmp_.add_argument("--threshold", type=float, default=0.15, help="Relative slowdown flagged as a regression")
+
+    gen = sub.add_parser("generate", help="Write a synthetic run directory for manual testing")
+    gen.add_argument("out_dir")
+    gen.add_argument("--rows", type=int, default=10_000)
+    gen.add_argument("--seed", type=int, default=0)
+
+    load = sub.add_parser("load", help="End-to-end streaming run against the local mock APIs")
+    load_test.add_arguments(load)
+
+    check = sub.add_parser("check-cli", help=f"Exit 1 when `jobserp-explorer --help` is over budget or imports "
+                                             f"{', '.join(CLI_HEAVY_MODULES)}")
+    check.add_argument("--budget", type=float, default=CLI_IMPORT_BUDGET_S, help="Seconds over interpreter start-up")
+    check.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "check-cli":
+        problems = check_cli_import(args.budget, args.repeat)
+        for problem in problems:
+            print(f"[✗] {problem}")
+        if problems:
+            sys.exit(1)
+        print(f"[✓] `jobserp-explorer --help` within {args.budget}s and free of {', '.join(CLI_HEAVY_MODULES)}")
+        return
+
+    if args.command == "load":
+        result = load_test.run_load_test(args)
+        if args.save:
+            Path(args.save).write_text(json.dumps(result, indent=2), encoding="utf-8")
+            print(f"[✓] Report saved → {args.save}")
+        return
+
+    if args.command == "generate":
+        for name, path in generators.write_run(args.out_dir, args.rows, args.seed).items():
+            print(f"[✓] {name:<14} → {path}")
+        return
+
+    if args.command == "compare":
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+    else:
+        current = run_suite(args.scales, args.repeat, args.only)
+        out = Path(args.save) if args.save else BASELINE_DIR / f"bench_{datetime.now().strftime('%Y%m%dT%H%M%S')}.json"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(current, indent=2), encoding="utf-8")
+        print(f"[✓] Results saved → {out}")
+        if not args.baseline:
+            return
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+
+    rows = compare(baseline, current, args.threshold)
+    print_comparison(rows, args.threshold)
+    if any(r["regressed"] for r in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# benchmarks/generators.py
+"""
+Synthetic pipeline artifacts at configurable scale.
+
+Every generator is deterministic for a given ``seed`` and vectorized, so
+1M-row inputs take seconds to build. Shapes follow the real stage outputs:
+
+- ``make_jobs``            → ``00_query`` CSV (Remotive jobs)
+- ``make_serp_jsonl``      → per-query Spider SERP JSONL records
+- ``make_serp_expanded``   → ``serp_expanded_*.csv`` (input of 02)
+- ``make_scored``          → ``*_results.csv`` (output of 02)
+- ``make_scraped``         → ``*_spider_scraped.jsonl`` (output of 05)
+- ``make_pagecateg_outputs`` / ``make_jobposting_outputs`` → flow outputs
+"""
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TITLES = ["Data Engineer", "Machine Learning Engineer", "Data Scientist", "Analytics Engineer",
+          "Backend Engineer", "MLOps Engineer", "Data Analyst", "Platform Engineer"]
+LOCATIONS = ["Worldwide", "Europe", "USA", "Germany", "UK", "Americas"]
+# (domain template, share) — {c} is the company slug
+DOMAINS = [
+    ("{c}.com", 0.20),                # Employer
+    ("boards.greenhouse.io", 0.15),   # ATS
+    ("jobs.lever.co", 0.10),          # ATS
+    ("www.linkedin.com", 0.15),       # Aggregator_T1
+    ("www.glassdoor.com", 0.05),      # Aggregator_T1
+    ("remotive.com", 0.05),
+    ("news-{c}.net", 0.15),           # Unknown
+    ("blog.example.org", 0.15),       # Unknown
+]
+PAGE_TYPES = ["Job Posting", "List of Jobs", "Company Page", "Home Page", "Product/Service Page", "Other"]
+RESULTS_PER_JOB = 8
+
+
+def _uid(values) -> list:
+    return [hashlib.md5(str(v).encode()).hexdigest()[:10] for v in values]
+
+
+def _choice(rng, options, n, p=None):
+    return np.asarray(options, dtype=object)[rng.choice(len(options), size=n, p=p)]
+
+
+def make_jobs(n_jobs: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    company_ids = rng.integers(0, max(1, n_jobs // 3), size=n_jobs)
+    return pd.DataFrame({
+        "Job Title": _choice(rng, TITLES, n_jobs),
+        "Company": [f"Acme{c}" for c in company_ids],
+        "Location": _choice(rng, LOCATIONS, n_jobs),
+    })
+
+
+def _serp_urls(rng, companies: np.ndarray) -> np.ndarray:
+    templates = _choice(rng, [d for d, _ in DOMAINS], len(companies), p=[s for _, s in DOMAINS])
+    paths = rng.integers(0, 10 ** 9, size=len(companies))
+    return np.array([
+        f"https://{t.format(c=c.lower())}/jobs/{p}" for t, c, p in zip(templates, companies, paths)
+    ], dtype=object)
+
+
+def make_serp_expanded(n_rows: int, seed: int = 0, per_job: int = RESULTS_PER_JOB) -> pd.DataFrame:
+    """``n_rows`` SERP results, ``per_job`` per job, in the 01 output layout."""
+    rng = np.random.default_rng(seed)
+    jobs = make_jobs(max(1, -(-n_rows // per_job)), seed)
+    job_index = np.repeat(np.arange(len(jobs)), per_job)[:n_rows]
+    titles = jobs["Job Title"].to_numpy()[job_index]
+    companies = jobs["Company"].to_numpy()[job_index]
+    urls = _serp_urls(rng, companies)
+    query_uids = np.asarray(_uid(np.arange(len(jobs))), dtype=object)[job_index]
+    return pd.DataFrame({
+        "query_uid": query_uids,
+        "page_uid": _uid(urls),
+        "job_index": job_index,
+        "Job Title": titles,
+        "Company": companies,
+        "SERP_title": [f"{t} at {c} &amp; more" for t, c in zip(titles, companies)],
+        "SERP_description": "Remote role. Apply now &mdash; competitive salary, flexible hours.",
+        "SERP_url": urls,
+        "domain": [u.split("/")[2] for u in urls],
+    })
+
+
+def make_serp_jsonl(expanded: pd.DataFrame) -> dict:
+    """``{query_uid: [Spider search result, ...]}`` matching ``expanded``."""
+    by_query = {}
+    for row in expanded[["query_uid", "SERP_url", "SERP_title", "SERP_description"]].itertuples(index=False):
+        by_query.setdefault(row.query_uid, []).append(
+            {"url": row.SERP_url, "title": row.SERP_title, "description": row.SERP_description})
+    return by_query
+
+
+def make_scored(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """``*_results.csv`` layout (the columns 02 keeps after filtering)."""
+    rng = np.random.default_rng(seed + 1)
+    df = make_serp_expanded(n_rows, seed)
+    labels = _choice(rng, ["Employer", "ATS", "Aggregator_T1", "Unknown"], n_rows, p=[0.3, 0.3, 0.2, 0.2])
+    scores = np.select([labels == "Employer", labels == "ATS", labels == "Aggregator_T1"], [2.5, 3, 2], 0)
+    return pd.DataFrame({
+        "query_uid": df["query_uid"],
+        "page_uid": df["page_uid"],
+        "job_index": df["job_index"],
+        "job_title": df["Job Title"],
+        "company": df["Company"],
+        "serp_title": df["SERP_title"],
+        "domain": df["domain"],
+        "label": labels,
+        "score": scores,
+        "serp_url": df["SERP_url"],
+        "google_search": "https://www.google.com/search?q=site:" + df["domain"] + "+" + df["Job Title"],
+    })
+
+
+def make_scraped(scored: pd.DataFrame, content_chars: int = 2000, seed: int = 0) -> list:
+    """Scraped-page records (``05_export_jsonl_with_scraping.scraped_record`` layout)."""
+    rng = np.random.default_rng(seed + 2)
+    body = ("## About the role\nWe are hiring. Python, SQL, cloud. " * (content_chars // 50 + 1))[:content_chars]
+    lengths = rng.integers(content_chars // 2, content_chars + 1, size=len(scored))
+    records = scored.to_dict(orient="records")
+    for record, length in zip(records, lengths):
+        record["scraped_data"] = body[:length]
+    return records
+
+
+def make_pagecateg_outputs(scored: pd.DataFrame, seed: int = 0) -> list:
+    """flow_pagecateg output records; ``job_index`` is carried for 05_merge_job_postings."""
+    rng = np.random.default_rng(seed + 3)
+    page_types = _choice(rng, PAGE_TYPES, len(scored), p=[0.4, 0.2, 0.15, 0.1, 0.05, 0.1])
+    crawl = rng.random(len(scored)) < 0.5
+    return [
+        {
+            "id": str(job_index), "job_index": int(job_index), "serp_url": url, "page_uid": page_uid,
+            "line_number": i,
+            "summary": {"page_url": url, "page_type": page_type, "detected_elements": ["title", "apply button"],
+                        "recommend_crawl": "Yes" if c else "No", "recommendation_reasons": ["synthetic"]},
+            "usage": {"prompt_tokens": 900, "completion_tokens": 60, "cached_tokens": 768, "latency_s": 0.8},
+        }
+        for i, (job_index, url, page_uid, page_type, c) in enumerate(
+            zip(scored["job_index"], scored["serp_url"], scored["page_uid"], page_types, crawl))
+    ]
+
+
+def make_jobposting_outputs(scored: pd.DataFrame, seed: int = 0) -> list:
+    """flow_jobposting (final match) output records."""
+    rng = np.random.default_rng(seed + 4)
+    n = len(scored)
+    match = _choice(rng, ["Yes", "No", "Maybe"], n, p=[0.3, 0.5, 0.2])
+    apply = _choice(rng, ["Yes", "No"], n, p=[0.3, 0.7])
+    scores = rng.random(n).round(2)
+    countries = _choice(rng, LOCATIONS, n)
+    return [
+        {
+            "id": str(job_index), "serp_url": url, "page_uid": page_uid, "line_number": i,
+            "summary": {
+                "job_title": title, "company_name": company, "potential_match": m, "match_score": float(s),
+                "significant_experience_gaps": ["Kubernetes", "Scala"], "country": country,
+                "visa_sponsorship_required": "No", "recommend_apply": a, "company_culture": "Scale-up",
+                "recommendation_reasons": ["Strong data stack overlap", "Remote friendly"],
+            },
+            "usage": {"prompt_tokens": 2400, "completion_tokens": 180, "cached_tokens": 1024, "latency_s": 2.1},
+        }
+        for i, (job_index, url, page_uid, title, company, m, a, s, country) in enumerate(zip(
+            scored["job_index"], scored["serp_url"], scored["page_uid"], scored["job_title"], scored["company"],
+            match, apply, scores, countries))
+    ]
+
+
+# === Writers ===
+def write_csv(df: pd.DataFrame, path: Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, index=False, encoding="utf-8")
+    return path
+
+
+def write_jsonl(records, path: Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    return path
+
+
+def write_run(base: Path, n_rows: int, seed: int = 0) -> dict:
+    """A run directory (``make_run_dir`` layout) with every artifact at ``n_rows`` scale."""
+    base = Path(base)
+    expanded = make_serp_expanded(n_rows, seed)
+    scored = make_scored(n_rows, seed)
+    paths = {
+        "query_csv": write_csv(make_jobs(expanded["job_index"].nunique(), seed), base / "00_query"),
+        "serp_expanded": write_csv(expanded, base / "01_scraped" / "serp_expanded_bench.csv"),
+        "scored": write_csv(scored, base / "03_scored" / "serp_expanded_bench_results.csv"),
+        "scraped": write_jsonl(make_scraped(scored, seed=seed),
+                               base / "06_scraped_html" / "serp_expanded_bench_results_spider_scraped.jsonl"),
+        "pagecateg": write_jsonl(make_pagecateg_outputs(scored, seed),
+                                 base / "05_page_classification" / "00_jsonl_annotated" / "bench_flow_pagecateg.jsonl"),
+        "jobposting": write_jsonl(make_jobposting_outputs(scored, seed),
+                                  base / "07_final_scored" / "bench_flow_jobposting.jsonl"),
+    }
+    serp_dir = base / "01_scraped"
+    for query_uid, results in make_serp_jsonl(expanded).items():
+        write_jsonl(results, serp_dir / f"serp_{query_uid}.jsonl")
+    return paths
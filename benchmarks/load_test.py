@@ -0,0 +1,109 @@
+# benchmarks/load_test.py
+"""
+Offline end-to-end load test: the streaming pipeline against the local mock
+APIs (``jobserp_explorer.mock_apis``), with realistic latency, 500s and 429s.
+
+Reports pipeline throughput (queries and final-scored pages per second,
+time to first final score, per-stage busy time) and the tail latency seen
+by the mock server per endpoint (p50 / p95 / p99 / max, status counts).
+
+    python -m benchmarks load --queries 40 --openai_latency lognormal:1200:0.6 --openai_429_rate 0.05
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from jobserp_explorer.mock_apis import server_from_args
+from jobserp_explorer.run_manager import make_run_dir
+from jobserp_explorer.utils import rate_limit, run_catalog, warehouse
+
+
+def run_load_test(args) -> dict:
+    from jobserp_explorer.streaming import DEFAULT_WORKERS, run_streaming
+
+    args.port = 0  # any free port
+    workers = {**DEFAULT_WORKERS, **dict(_parse_workers(args.workers))}
+    with tempfile.TemporaryDirectory(prefix="jobserp_load_") as tmp, server_from_args(args) as server:
+        uid = f"load_{datetime.now().strftime('%Y%m%dT%H%M%S')}"
+        paths = {key: Path(tmp) / path for key, path in make_run_dir(uid).items()}
+        # Every call must reach the mock (no cached LLM answers), and the run is recorded
+        # in throwaway catalog / warehouse / rate-limit databases
+        env = {
+            **server.env(),
+            "JOBSERP_LLM_CACHE": "off",
+            run_catalog.PATH_ENV: str(Path(tmp) / run_catalog.CATALOG_FILENAME),
+            warehouse.PATH_ENV: str(Path(tmp) / warehouse.WAREHOUSE_FILENAME),
+            rate_limit.PATH_ENV: str(Path(tmp) / rate_limit.RATE_LIMIT_PATH.name),
+        }
+        saved = {key: os.environ.get(key) for key in env}
+        os.environ.update(env)
+        # An existing catalog is not rebuilt from the real run directories on first use
+        run_catalog.RunCatalog(Path(env[run_catalog.PATH_ENV]))
+        print(f"[ℹ] Mock APIs on {server.url}; streaming {args.queries} queries")
+
+        try:
+            started = time.perf_counter()
+            summary = run_streaming(paths, query=args.query, limit=args.queries, deployment_name=args.model,
+                                    workers=workers)
+            wall_s = time.perf_counter() - started
+            n_final = sum(1 for _ in open(summary["outputs"]["final_scored"], encoding="utf-8"))
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+    result = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {key: str(value) for key, value in vars(args).items() if key != "func"},
+        "workers": workers,
+        "wall_s": round(wall_s, 3),
+        "queries": summary["n_queries"],
+        "queries_per_s": round(summary["n_queries"] / wall_s, 3) if wall_s else None,
+        "final_pages": n_final,
+        "final_pages_per_s": round(n_final / wall_s, 3) if wall_s else None,
+        "first_final_s": summary["first_final_s"],
+        "stages": summary["stages"],
+        "api": server.stats(),
+    }
+    print_report(result)
+    return result
+
+
+def _parse_workers(specs):
+    """``["final=8", "scrape=16"]`` → ``[("final", 8), ("scrape", 16)]``."""
+    for spec in specs or []:
+        name, _, value = spec.partition("=")
+        yield name, int(value)
+
+
+def print_report(result: dict):
+    print(f"\n[✓] {result['queries']} queries in {result['wall_s']:.1f}s "
+          f"({result['queries_per_s']} queries/s, {result['final_pages_per_s']} final pages/s, "
+          f"first final score after {result['first_final_s']}s)")
+    print(f"\n{'stage':<10} {'in':>6} {'out':>6} {'errors':>6} {'busy s':>8}")
+    for name, s in result["stages"].items():
+        print(f"{name:<10} {s['n_in']:>6} {s['n_out']:>6} {s['n_errors']:>6} {s['busy_s']:>8.1f}")
+    print(f"\n{'endpoint':<16} {'requests':>8} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7}  statuses")
+    for route, s in result["api"].items():
+        print(f"{route:<16} {s['requests']:>8} {s['p50_s']:>7.3f} {s['p95_s']:>7.3f} {s['p99_s']:>7.3f} "
+              f"{s['max_s']:>7.3f}  {json.dumps(s['statuses'])}")
+
+
+def add_arguments(parser):
+    from jobserp_explorer.mock_apis import add_arguments as add_mock_arguments
+
+    parser.add_argument("--queries", type=int, default=20, help="Jobs fetched from the mock Remotive API")
+    parser.add_argument("--query", default="data engineer")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--workers", nargs="+", metavar="STAGE=N", help="Override streaming workers, e.g. final=8")
+    parser.add_argument("--save", help="Write the report JSON here")
+    add_mock_arguments(parser)
@@ -0,0 +1,225 @@
+# benchmarks/suite.py
+"""
+Benchmarks of the CPU-bound pipeline steps on synthetic data.
+
+Each benchmark prepares its inputs once per scale (untimed), then times
+``repeat`` calls of the step. Results are keyed ``<name>@<scale>`` and hold
+min / median seconds and rows per second (from the median).
+"""
+import importlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks import generators as gen
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from jobserp_explorer.utils.artifacts import Artifact
+from jobserp_explorer.views import results_data
+
+label_and_score = importlib.import_module("jobserp_explorer.core.02_label_and_score")
+export_results = importlib.import_module("jobserp_explorer.core.03_export_results_to_jsonl")
+merge_postings = importlib.import_module("jobserp_explorer.core.05_merge_job_postings")
+
+DEFAULT_SCALES = [1_000, 10_000]
+DEFAULT_REPEAT = 3
+# `import jobserp_explorer.cli` must stay stdlib-only (see cli.py)
+CLI_IMPORT_BUDGET_S = 0.2
+CLI_HEAVY_MODULES = ("pandas", "openai", "promptflow")
+# Runs `jobserp-explorer --help` and prints the heavy top-level packages it imported
+_CLI_HELP_CODE = """
+import contextlib, io, json, sys
+from jobserp_explorer import cli
+with contextlib.redirect_stdout(io.StringIO()):
+    try:
+        cli.main(["--help"])
+    except SystemExit:
+        pass
+print(json.dumps(sorted({name.split(".")[0] for name in sys.modules} & set(sys.argv[1:]))))
+"""
+
+
+# === Benchmarks ===
+# Each one takes (work_dir, n_rows) and returns a zero-argument callable to time.
+def bench_label_and_score_main(work: Path, n: int):
+    input_dir = work / "01_scraped"
+    gen.write_csv(gen.make_serp_expanded(n), input_dir / "serp_expanded_bench.csv")
+    out, meta, logs = work / "03_scored", work / "metadata", work / "logs"
+    return lambda: label_and_score.main(str(input_dir), str(out), str(logs), str(meta), force=True)
+
+
+def bench_filter_top_candidates(work: Path, n: int):
+    df, _ = label_and_score.score_frame(gen.make_serp_expanded(n))
+    return lambda: label_and_score.filter_top_candidates(df)
+
+
+def bench_export_jsonl(work: Path, n: int):
+    input_dir = work / "03_scored"
+    gen.write_csv(gen.make_scored(n), input_dir / "serp_expanded_bench_results.csv")
+    out, meta, logs = work / "04_jsonl", work / "metadata", work / "logs"
+    return lambda: export_results.export_jsonl(input_dir, out, meta, logs)
+
+
+def bench_merge_job_postings(work: Path, n: int):
+    scored = gen.make_scored(n)
+    llm = gen.write_jsonl(gen.make_pagecateg_outputs(scored), work / "pagecateg.jsonl")
+    # One scraped page per job: the merge joins on job_index, so more would fan out
+    scraped = gen.write_jsonl(gen.make_scraped(scored.drop_duplicates("job_index")), work / "scraped.jsonl")
+    return lambda: merge_postings.merge_job_postings([llm], [scraped], work / "merged", overwrite=True)
+
+
+def bench_results_load_jsonl(work: Path, n: int):
+    path = gen.write_jsonl(gen.make_jobposting_outputs(gen.make_scored(n)), work / "final.jsonl")
+    return lambda: list(Artifact(path).records())
+
+
+def bench_results_tables(work: Path, n: int):
+    match_data = gen.make_jobposting_outputs(gen.make_scored(n))
+    return lambda: results_data.url_table(results_data.build_match_table(match_data))
+
+
+BENCHMARKS = {
+    "label_and_score_main": bench_label_and_score_main,
+    "filter_top_candidates": bench_filter_top_candidates,
+    "export_jsonl": bench_export_jsonl,
+    "merge_job_postings": bench_merge_job_postings,
+    "results_load_jsonl": bench_results_load_jsonl,
+    "results_tables": bench_results_tables,
+}
+
+
+def time_cli_import(repeat: int = DEFAULT_REPEAT) -> list:
+    """Fresh-interpreter ``import jobserp_explorer.cli`` times, minus bare interpreter start-up."""
+    def run(code):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        return time.perf_counter() - started
+    return [max(0.0, run("import jobserp_explorer.cli") - run("pass")) for _ in range(repeat)]
+
+
+def check_cli_import(budget_s: float = CLI_IMPORT_BUDGET_S, repeat: int = DEFAULT_REPEAT) -> list:
+    """
+    Regression check for ``jobserp-explorer --help`` in a fresh interpreter:
+    returns the problems found, empty when its median time (minus bare
+    interpreter start-up) is within ``budget_s`` and none of
+    ``CLI_HEAVY_MODULES`` was imported.
+    """
+    cmd = [sys.executable, "-c", _CLI_HELP_CODE, *CLI_HEAVY_MODULES]
+    problems, times = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+        elapsed = time.perf_counter() - started
+        if result.returncode != 0:
+            return [f"`jobserp-explorer --help` failed:\n{result.stderr}"]
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        times.append(max(0.0, elapsed - (time.perf_counter() - started)))
+        heavy = json.loads(result.stdout.strip().splitlines()[-1])
+        if heavy:
+            problems.append(f"`jobserp-explorer --help` imports {', '.join(heavy)}")
+            break
+    median = statistics.median(times)
+    if median > budget_s:
+        problems.append(f"`jobserp-explorer --help` took {median:.3f}s (budget {budget_s}s)")
+    return problems
+
+
+# === Runner ===
+def _summary(times: list, n: int = None) -> dict:
+    median = statistics.median(times)
+    result = {"min_s": round(min(times), 4), "median_s": round(median, 4), "repeat": len(times)}
+    if n:
+        result.update({"rows": n, "rows_per_s": round(n / median) if median else None})
+    return result
+
+
+def run_suite(scales=None, repeat: int = DEFAULT_REPEAT, only=None) -> dict:
+    scales = scales or DEFAULT_SCALES
+    names = [name for name in BENCHMARKS if not only or name in only]
+    results = {}
+
+    for n in scales:
+        for name in names:
+            with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as tmp:
+                fn = BENCHMARKS[name](Path(tmp), n)
+                times = []
+                for _ in range(repeat):
+                    with redirect_stdout(io.StringIO()):
+                        started = time.perf_counter()
+                        fn()
+                        times.append(time.perf_counter() - started)
+            results[f"{name}@{n}"] = _summary(times, n)
+            print(f"[✓] {name + '@' + str(n):<32} median {results[f'{name}@{n}']['median_s']:>9.4f}s  "
+                  f"{results[f'{name}@{n}']['rows_per_s'] or 0:>12,} rows/s")
+
+    if not only or "cli_import" in only:
+        results["cli_import"] = {**_summary(time_cli_import(repeat)), "budget_s": CLI_IMPORT_BUDGET_S}
+        status = "✓" if results["cli_import"]["median_s"] <= CLI_IMPORT_BUDGET_S else "✗"
+        print(f"[{status}] {'cli_import':<32} median {results['cli_import']['median_s']:>9.4f}s  "
+              f"(budget {CLI_IMPORT_BUDGET_S}s)")
+
+    return {"meta": _meta(scales, repeat), "results": results}
+
+
+def _meta(scales, repeat) -> dict:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True).stdout.strip() or None
+    except OSError:
+        rev = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_rev": rev,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "scales": list(scales),
+        "repeat": repeat,
+    }
+
+
+# === Comparison ===
+def compare(baseline: dict, current: dict, threshold: float = 0.15, min_delta_s: float = 0.005) -> list:
+    """
+    One row per benchmark in both result sets. A benchmark regressed when
+    its median grew by more than ``threshold`` (relative) and ``min_delta_s``
+    (absolute, so millisecond-scale noise is not flagged) — or, for
+    ``cli_import``, when it went over its budget.
+    """
+    rows = []
+    base, new = baseline.get("results", {}), current.get("results", {})
+    for key in [k for k in base if k in new]:
+        a, b = base[key]["median_s"], new[key]["median_s"]
+        change = (b - a) / a if a else 0.0
+        regressed = change > threshold and b - a > min_delta_s
+        if "budget_s" in new[key]:
+            regressed = regressed or b > new[key]["budget_s"]
+        rows.append({"benchmark": key, "baseline_s": a, "current_s": b, "change": change, "regressed": regressed})
+    return rows
+
+
+def print_comparison(rows: list, threshold: float):
+    print(f"{'benchmark':<34} {'baseline':>10} {'current':>10} {'change':>8}")
+    for r in rows:
+        flag = "  ← regression" if r["regressed"] else ""
+        print(f"{r['benchmark']:<34} {r['baseline_s']:>9.4f}s {r['current_s']:>9.4f}s {r['change']:>+8.0%}{flag}")
+    n_regressed = sum(r["regressed"] for r in rows)
+    if n_regressed:
+        print(f"[✗] {n_regressed} benchmark(s) regressed by more than {threshold:.0%}")
+    else:
+        print(f"[✓] No regressions beyond {threshold:.0%} ({len(rows)} benchmarks compared)")
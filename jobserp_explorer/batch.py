@@ -0,0 +1,244 @@
+# jobserp_explorer/batch.py
+"""
+Multi-query batch runner.
+
+Every query gets its own ``RunManager`` run, but the stages of all runs are
+executed by one shared worker pool. The pool hands out work round-robin
+across runs (fair share), so a query with many SERP results cannot starve
+the others. Spider and OpenAI traffic from every run goes through the
+shared rate limiters in ``utils/rate_limit.py`` (``JOBSERP_SPIDER_RPM``,
+``JOBSERP_LLM_RPM`` / ``JOBSERP_LLM_TPM``), so the limits hold for the
+batch as a whole.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from datetime import datetime
+from functools import partial
+from typing import Dict, List, Optional
+
+from jobserp_explorer.pipeline import build_stages, run_pipeline
+from jobserp_explorer.run_manager import RunManager
+
+DEFAULT_POOL_WORKERS = 8
+PROGRESS_INTERVAL_S = 10.0
+
+
+# === Fair-share pool ===
+class FairPool:
+    """
+    Thread pool with one FIFO queue per key, served round-robin.
+
+    ``submit(key, fn, *args)`` returns a ``concurrent.futures.Future``, so
+    ``pipeline.run_dag`` can use ``partial(pool.submit, key)`` as its submit
+    function.
+    """
+
+    def __init__(self, workers: int = DEFAULT_POOL_WORKERS):
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._work, name=f"batch-{i}", daemon=True) for i in range(workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, key: str, fn, *args, **kwargs) -> Future:
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("FairPool is shut down")
+            self._queues.setdefault(key, deque()).append((future, fn, args, kwargs))
+            self._cond.notify()
+        return future
+
+    def _next_task(self):
+        """Pop from the first non-empty queue and rotate that key to the back."""
+        for key in list(self._queues):
+            tasks = self._queues[key]
+            if tasks:
+                self._queues.move_to_end(key)
+                return tasks.popleft()
+        return None
+
+    def _work(self):
+        while True:
+            with self._cond:
+                task = self._next_task()
+                while task is None and not self._closed:
+                    self._cond.wait()
+                    task = self._next_task()
+                if task is None:
+                    return
+            future, fn, args, kwargs = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:  # stage scripts may sys.exit
+                future.set_exception(e)
+
+    def shutdown(self):
+        """Finish queued work, then stop the workers."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join()
+
+
+# === Progress ===
+class BatchProgress:
+    """Per-run stage status collected from ``run_dag`` events."""
+
+    def __init__(self, run_uids: List[str], n_stages: int):
+        self._lock = threading.Lock()
+        self.n_stages = n_stages
+        self.started = time.perf_counter()
+        self.runs = {uid: {"status": "queued", "running": [], "done": 0, "failed": None, "elapsed_s": None}
+                     for uid in run_uids}
+
+    def on_event(self, run_uid: str, stage: str, status: str):
+        with self._lock:
+            run = self.runs[run_uid]
+            if status == "started":
+                run["status"] = "running"
+                run["running"].append(stage)
+            else:
+                run["running"].remove(stage)
+                if status == "done":
+                    run["done"] += 1
+                else:
+                    run["failed"] = stage
+
+    def finish(self, run_uid: str, status: str):
+        with self._lock:
+            run = self.runs[run_uid]
+            run["status"] = status
+            run["elapsed_s"] = round(time.perf_counter() - self.started, 1)
+
+    def line(self) -> str:
+        with self._lock:
+            runs = list(self.runs.values())
+        n_done = sum(r["status"] == "done" for r in runs)
+        n_failed = sum(r["status"] == "failed" for r in runs)
+        stages = sum(r["done"] for r in runs)
+        active = sorted({s for r in runs for s in r["running"]})
+        elapsed = time.perf_counter() - self.started
+        return (f"[⏳] {elapsed:6.0f}s | runs {n_done}/{len(runs)} done, {n_failed} failed | "
+                f"stages {stages}/{len(runs) * self.n_stages} | active: {', '.join(active) or '-'}")
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return json.loads(json.dumps(self.runs))
+
+
+def _report(progress: BatchProgress, stop: threading.Event, interval: float):
+    while not stop.wait(interval):
+        print(progress.line(), flush=True)
+
+
+# === Batch ===
+def slugify(query: str, max_len: int = 40) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-")[:max_len] or "query"
+
+
+def run_batch(queries: List[str], limit: Optional[int] = None, workers: int = DEFAULT_POOL_WORKERS,
+              classify_batch_size: Optional[int] = None, preclassify: bool = True,
+              preclassify_threshold: float = 0.9, force: bool = False,
+              progress_interval: float = PROGRESS_INTERVAL_S) -> dict:
+    """
+    Run the pipeline for every query on one fair-share pool.
+
+    Returns the batch summary, also written to
+    ``<RunManager.BASE_DIR>/batches/batch_<timestamp>.json``.
+    """
+    batch_id = datetime.now().strftime("%Y%m%dT%H%M%S")
+    runs = OrderedDict()
+    for i, query in enumerate(queries):
+        run_uid = f"{batch_id}_{i:02d}_{slugify(query)}"
+        run = RunManager(run_uid)
+        run.save_metadata({"run_uid": run_uid, "query": query, "timestamp": batch_id, "batch_id": batch_id})
+        runs[run_uid] = (run, query)
+
+    batch_dir = RunManager.BASE_DIR / "batches"
+    batch_dir.mkdir(parents=True, exist_ok=True)
+    # Logging is process-global: one file for the whole batch instead of one per run
+    logging.basicConfig(
+        filename=batch_dir / f"batch_{batch_id}.log",
+        level=logging.INFO,
+        format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s'
+    )
+
+    print(f"[ℹ] Batch {batch_id}: {len(runs)} queries on {workers} shared workers")
+    # Every run has the same DAG; its stage count scales the progress lines
+    n_stages = len(build_stages(run.paths, query, limit=limit, classify_batch_size=classify_batch_size,
+                                preclassify=preclassify)) if runs else 0
+    progress = BatchProgress(list(runs), n_stages)
+    pool = FairPool(workers)
+    errors = {}
+
+    def coordinate(run_uid: str):
+        run, query = runs[run_uid]
+        try:
+            run_pipeline(run.paths, query, limit=limit, classify_batch_size=classify_batch_size,
+                         preclassify=preclassify, preclassify_threshold=preclassify_threshold, force=force,
+                         submit=partial(pool.submit, run_uid), on_event=partial(progress.on_event, run_uid),
+                         label=f"{run_uid}: ")
+            progress.finish(run_uid, "done")
+        except (Exception, SystemExit) as e:
+            errors[run_uid] = str(e)
+            logging.exception(f"[BATCH] Run `{run_uid}` failed")
+            progress.finish(run_uid, "failed")
+
+    # Coordinators only schedule stages and wait; the work runs on the pool
+    coordinators = [threading.Thread(target=coordinate, args=(uid,), name=f"run-{uid}") for uid in runs]
+    stop = threading.Event()
+    reporter = threading.Thread(target=_report, args=(progress, stop, progress_interval), daemon=True)
+    reporter.start()
+    try:
+        for t in coordinators:
+            t.start()
+        for t in coordinators:
+            t.join()
+    finally:
+        stop.set()
+        pool.shutdown()
+
+    snapshot = progress.snapshot()
+    summary = {
+        "batch_id": batch_id,
+        "workers": workers,
+        "n_stages": n_stages,
+        "wall_time_s": round(time.perf_counter() - progress.started, 3),
+        "runs": [
+            {
+                "run_uid": uid,
+                "query": query,
+                "status": snapshot[uid]["status"],
+                "stages_done": snapshot[uid]["done"],
+                "failed_stage": snapshot[uid]["failed"],
+                "finished_after_s": snapshot[uid]["elapsed_s"],
+                "error": errors.get(uid),
+            }
+            for uid, (_, query) in runs.items()
+        ],
+    }
+    summary_path = batch_dir / f"batch_{batch_id}.json"
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"\n{progress.line()}")
+    print(f"\n    {'status':<6} {'stages':>6} {'after':>8}  run")
+    for r in summary["runs"]:
+        mark = "✓" if r["status"] == "done" else "✗"
+        after = f"{r['finished_after_s']}s" if r["finished_after_s"] is not None else "-"
+        detail = f"  ({r['failed_stage']}: {r['error']})" if r["error"] else ""
+        print(f"[{mark}] {r['status']:<6} {r['stages_done']:>3}/{n_stages} {after:>8}  {r['run_uid']}{detail}")
+    print(f"\n[🏁] Batch {batch_id} finished in {summary['wall_time_s']:.1f}s → {summary_path}")
+    return summary
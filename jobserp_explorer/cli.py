@@ -1,7 +1,388 @@
 # jobserp_explorer/cli.py
+"""
+``jobserp-explorer`` command line.
+
+Only the standard library is imported at module level: pandas, openai,
+promptflow and the stage scripts are imported inside the subcommands that
+need them, so ``--help``, ``runs ls`` and ``ui`` start instantly.
+
+    jobserp-explorer fetch    --run_uid UID --query "data engineer" [--limit N]
+    jobserp-explorer serp     --run_uid UID
+    jobserp-explorer score    --run_uid UID
+    jobserp-explorer export   --run_uid UID
+    jobserp-explorer classify --run_uid UID [--batch_size K] [--no_preclassify]
+    jobserp-explorer scrape   --run_uid UID
+    jobserp-explorer match    --run_uid UID
+    jobserp-explorer run      --query "data engineer" [--run_uid UID] [--stream] [--record | --replay_from UID]
+    jobserp-explorer batch    "data engineer" "ml ops" --workers 8
+    jobserp-explorer runs ls
+    jobserp-explorer runs compare UID_A UID_B
+    jobserp-explorer runs rebuild
+    jobserp-explorer runs pack --older_than_days 7
+    jobserp-explorer runs gc --older_than_days 14
+    jobserp-explorer warehouse matches --days 30
+    jobserp-explorer mock     --port 8700 [--openai_429_rate 0.05]
+    jobserp-explorer ui
+"""
+import argparse
+import logging
+import os
 import subprocess
+import sys
+from datetime import datetime
 from pathlib import Path
 
-def main():
+# subcommand → pipeline stage(s) it runs (see pipeline.build_stages)
+STAGE_COMMANDS = {
+    "fetch": ("fetch_jobs", "Fetch Remotive jobs for the run's query"),
+    "serp": ("fetch_serps", "Search Spider SERPs for every fetched job"),
+    "score": ("label_and_score", "Label domains, score and keep the top SERP results"),
+    "export": ("export_jsonl", "Export scored results to the classification JSONL"),
+    "classify": ("preclassify_pages,classify_pages", "Classify SERP pages (rules first, then the LLM)"),
+    "scrape": ("scrape_pages", "Scrape the top SERP pages with Spider"),
+    "match": ("score_matches", "Final match scoring with flow_jobposting"),
+}
+
+
+# === Commands ===
+def launch_ui(args=None):
     path = Path(__file__).parent / "app.py"
     subprocess.run(["streamlit", "run", str(path)])
+
+
+def run_stage_command(args):
+    from jobserp_explorer.pipeline import run_stage
+    from jobserp_explorer.run_manager import RunManager
+
+    run = RunManager(args.run_uid)
+    query = getattr(args, "query", None)
+    if query:
+        run.save_metadata({"run_uid": args.run_uid, "query": query,
+                           "timestamp": datetime.now().strftime("%Y%m%dT%H%M%S")})
+    query = query or run.query_metadata().get("query")
+    if args.command == "fetch" and not query:
+        print("[✗] Missing query. Pass --query or create the run from the UI first.")
+        sys.exit(1)
+
+    options = {
+        "limit": getattr(args, "limit", None),
+        "classify_batch_size": getattr(args, "batch_size", None),
+        "preclassify": not getattr(args, "no_preclassify", False),
+        "preclassify_threshold": getattr(args, "threshold", 0.9),
+    }
+    try:
+        for stage in STAGE_COMMANDS[args.command][0].split(","):
+            run_stage(run.paths, stage, query=query, force=args.force, **options)
+    except (Exception, SystemExit) as e:
+        logging.exception(f"[✗] {args.command} failed: {e}")
+        sys.exit(1)
+
+
+def run_pipeline_command(args):
+    import importlib
+    from jobserp_explorer.run_manager import RunManager
+    from jobserp_explorer.utils.http_journal import journaled_run
+
+    run_uid = args.run_uid or datetime.now().strftime("%Y%m%dT%H%M%S")
+    query = args.query or RunManager(run_uid).query_metadata().get("query")
+    if not query:
+        print("[✗] Missing query. Neither CLI nor metadata had it.")
+        sys.exit(1)
+
+    full_pipeline = importlib.import_module("jobserp_explorer.core.10_run_full_pipeline")
+    with journaled_run(run_uid, record=args.record, replay_from=args.replay_from, latency=args.replay_latency):
+        full_pipeline.main(query=query, run_uid=run_uid, limit=args.limit,
+                           classify_batch_size=args.classify_batch_size, preclassify=not args.no_preclassify,
+                           preclassify_threshold=args.threshold, use_subprocess=args.subprocess,
+                           max_workers=args.max_workers, force=args.force, stream=args.stream,
+                           deployment_name=args.deployment_name)
+
+
+def read_queries(queries, queries_file=None) -> list:
+    """Positional queries plus one query per non-empty, non-# line of ``queries_file``."""
+    queries = list(queries or [])
+    if queries_file:
+        for line in Path(queries_file).read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if line and not line.startswith("#"):
+                queries.append(line)
+    return queries
+
+
+def run_batch_command(args):
+    queries = read_queries(args.queries, args.queries_file)
+    if not queries:
+        print("[✗] No queries given (pass them as arguments or with --queries_file).")
+        sys.exit(1)
+
+    # Global limits are read by the shared rate limiters on first use
+    for env, value in [("JOBSERP_SPIDER_RPM", args.spider_rpm), ("JOBSERP_LLM_RPM", args.llm_rpm),
+                       ("JOBSERP_LLM_TPM", args.llm_tpm)]:
+        if value is not None:
+            os.environ[env] = str(value)
+
+    from jobserp_explorer.batch import run_batch
+    summary = run_batch(queries, limit=args.limit, workers=args.workers,
+                        classify_batch_size=args.classify_batch_size, preclassify=not args.no_preclassify,
+                        force=args.force, progress_interval=args.progress_interval)
+    if any(r["status"] != "done" for r in summary["runs"]):
+        sys.exit(1)
+
+
+def list_runs_command(args):
+    import json
+    from jobserp_explorer.utils.run_catalog import get_catalog
+
+    catalog = get_catalog()
+    rows = catalog.summary()[:args.limit] if args.limit else catalog.summary()
+    if args.json:
+        print(json.dumps([catalog.get_run(r["run_uid"]) for r in rows], indent=2))
+        return
+    print(f"{'run_uid':<40} {'done':>4} {'failed':>6} {'running':>7}  query")
+    for r in rows:
+        print(f"{r['run_uid']:<40} {r['done']:>4} {r['failed']:>6} {r['running']:>7}  {r['query'] or '-'}")
+
+
+def rebuild_catalog_command(args):
+    from jobserp_explorer.run_manager import RunManager
+    from jobserp_explorer.utils.run_catalog import catalog_path
+
+    n = RunManager.rebuild_catalog()
+    print(f"[✓] Catalog rebuilt from {n} run directories → {catalog_path()}")
+
+
+def pack_runs_command(args):
+    from jobserp_explorer.utils.retention import fmt_bytes, get_body_store, pack_runs
+
+    reports = pack_runs(args.run_uid or None, older_than_days=args.older_than_days, dry_run=args.dry_run)
+    for r in reports:
+        verb = "would pack" if args.dry_run else "packed"
+        print(f"[✓] {r['run_uid']}: {verb} {r['files']} files, {fmt_bytes(r['bytes_before'])}"
+              + ("" if args.dry_run else f" → {fmt_bytes(r['bytes_after'])} + {fmt_bytes(r['body_bytes'])} new bodies"))
+    reclaimed = sum(r["reclaimed"] for r in reports)
+    print(f"[ℹ] {len(reports)} runs, {fmt_bytes(reclaimed)} reclaimed"
+          + ("" if args.dry_run or not reports else f"; body store: {get_body_store().stats()}"))
+
+
+def unpack_run_command(args):
+    from jobserp_explorer.run_manager import RunManager
+    from jobserp_explorer.utils.retention import fmt_bytes
+
+    archive = RunManager(args.run_uid).archive()
+    if archive is None:
+        print(f"[✗] Run {args.run_uid} is not packed")
+        sys.exit(1)
+    size = archive.unpack()
+    print(f"[✓] Unpacked {len(archive.names())} files into {archive.run_dir} (archive of {fmt_bytes(size)} removed)")
+
+
+def gc_command(args):
+    from jobserp_explorer.utils.retention import fmt_bytes, gc_promptflow_runs
+
+    r = gc_promptflow_runs(older_than_days=args.older_than_days, keep=args.keep, dry_run=args.dry_run)
+    verb = "Would delete" if args.dry_run else "Deleted"
+    print(f"[✓] {verb} {len(r['deleted'])} promptflow runs in {r['runs_dir']} ({r['kept']} kept) "
+          f"and {r['unpacked_files']} extracted archive members: {fmt_bytes(r['reclaimed'])} reclaimed")
+
+
+def compare_runs_command(args):
+    from jobserp_explorer.utils.perf import compare_runs
+    compare_runs(args.run_uid_a, args.run_uid_b)
+
+
+def show_perf_command(args):
+    import json
+    from jobserp_explorer.run_manager import RunManager
+    from jobserp_explorer.utils.perf import load_perf
+    print(json.dumps(load_perf(RunManager(args.run_uid).metadata_dir), indent=2))
+
+
+def mock_apis_command(args):
+    from jobserp_explorer.mock_apis import serve
+    serve(args)
+
+
+def show_journal_command(args):
+    import json
+    from jobserp_explorer.run_manager import RunManager
+    from jobserp_explorer.utils.http_journal import Journal, journal_path
+
+    path = journal_path(RunManager(args.run_uid).metadata_dir)
+    if not path.exists():
+        print(f"[✗] No HTTP journal at {path} (record one with: run --record)")
+        sys.exit(1)
+    print(json.dumps(Journal(path).stats(), indent=2))
+
+
+def warehouse_ingest_command(args):
+    from jobserp_explorer.run_manager import RunManager
+    from jobserp_explorer.utils.warehouse import get_warehouse, warehouse_path
+
+    wh = get_warehouse()
+    run_uids = args.run_uid or RunManager.list_runs()
+    for uid in run_uids:
+        n = wh.ingest_run(uid, force=args.force)
+        if n:
+            print(f"[✓] {uid}: {n} records")
+    print(f"[ℹ] {wh.counts()} → {warehouse_path()}")
+
+
+def warehouse_matches_command(args):
+    import json
+    from jobserp_explorer.utils.warehouse import get_warehouse
+
+    rows = get_warehouse().matches(days=args.days, potential_match=None if args.all else "Yes",
+                                   recommend_apply="Yes" if args.apply else None, limit=args.limit)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    for r in rows:
+        print(f"{r['produced_at']}  {r['potential_match'] or '-':<4} {r['recommend_apply'] or '-':<4} "
+              f"{(r['job_title'] or '-')[:40]:<40} {(r['company_name'] or '-')[:24]:<24} {r['serp_url']}")
+    print(f"[ℹ] {len(rows)} postings")
+
+
+def warehouse_seen_command(args):
+    import json
+    from jobserp_explorer.utils.warehouse import get_warehouse
+    print(json.dumps(get_warehouse().seen(args.url_or_page_uid), indent=2))
+
+
+def warehouse_sql_command(args):
+    import json
+    import sqlite3
+    from jobserp_explorer.utils.warehouse import get_warehouse
+    try:
+        rows = get_warehouse().select(args.sql)
+    except sqlite3.Error as e:
+        print(f"[✗] {e}")
+        sys.exit(1)
+    for row in rows:
+        print(json.dumps(row, ensure_ascii=False, default=str))
+
+
+# === Parser ===
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="jobserp-explorer", description="JobSERP Explorer pipeline and UI.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the stages into <run>/logs/profile (same as JOBSERP_PROFILE=1)")
+    sub = parser.add_subparsers(dest="command", metavar="command")
+
+    ui = sub.add_parser("ui", help="Launch the Streamlit app (default)")
+    ui.set_defaults(func=launch_ui)
+
+    for name, (_, help_text) in STAGE_COMMANDS.items():
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--run_uid", required=True, help="Run UID (data/01_fetch_serps/run_<uid>)")
+        p.add_argument("--force", action="store_true", help="Re-run even if the stage inputs are unchanged")
+        p.set_defaults(func=run_stage_command)
+        if name == "fetch":
+            p.add_argument("--query", help="Search term; defaults to the run's meta.json")
+            p.add_argument("--limit", type=int, help="Max jobs to fetch (default: 50)")
+        if name == "classify":
+            p.add_argument("--batch_size", type=int, help="Classify K rows per LLM call instead of the per-row flow")
+            p.add_argument("--no_preclassify", action="store_true", help="Send every row to the LLM page classifier")
+            p.add_argument("--threshold", type=float, default=0.9, help="Minimum rule confidence to skip the LLM")
+
+    run = sub.add_parser("run", help="Run the full pipeline for one query")
+    run.add_argument("--query", help="Search term; defaults to the run's meta.json")
+    run.add_argument("--run_uid", help="Run UID (default: current timestamp)")
+    run.add_argument("--limit", type=int, help="Max jobs fetched")
+    run.add_argument("--classify_batch_size", type=int, help="Classify K rows per LLM call instead of the per-row flow")
+    run.add_argument("--no_preclassify", action="store_true", help="Send every row to the LLM page classifier")
+    run.add_argument("--threshold", type=float, default=0.9, help="Minimum rule confidence to skip the LLM")
+    run.add_argument("--max_workers", type=int, default=4, help="Stages run concurrently (default: 4)")
+    run.add_argument("--force", action="store_true", help="Re-run every stage even if its inputs are unchanged")
+    run.add_argument("--stream", action="store_true", help="Stream each query through all stages via bounded queues")
+    run.add_argument("--deployment_name", help="LLM deployment for --stream (other modes use each flow.dag.yaml)")
+    run.add_argument("--subprocess", action="store_true", help="Run each stage as a separate script (legacy mode)")
+    run.add_argument("--record", action="store_true", help="Journal every API call into metadata/http_journal.sqlite")
+    run.add_argument("--replay_from", metavar="RUN_UID", help="Answer API calls from this run's journal (offline)")
+    run.add_argument("--replay_latency", choices=["recorded", "zero"], default="recorded",
+                     help="Replay at the recorded latency or with none")
+    run.set_defaults(func=run_pipeline_command)
+
+    batch = sub.add_parser("batch", help="Run the pipeline for many queries on one shared worker pool")
+    batch.add_argument("queries", nargs="*", help="Job search queries")
+    batch.add_argument("--queries_file", help="File with one query per line")
+    batch.add_argument("--limit", type=int, help="Max jobs fetched per query")
+    batch.add_argument("--workers", type=int, default=8, help="Shared pool size across all runs")
+    batch.add_argument("--spider_rpm", type=float, help="Global Spider requests/minute (JOBSERP_SPIDER_RPM)")
+    batch.add_argument("--llm_rpm", type=float, help="Global OpenAI requests/minute (JOBSERP_LLM_RPM)")
+    batch.add_argument("--llm_tpm", type=float, help="Global OpenAI tokens/minute (JOBSERP_LLM_TPM)")
+    batch.add_argument("--classify_batch_size", type=int, help="Pages per LLM call for page classification")
+    batch.add_argument("--no_preclassify", action="store_true", help="Send every page to the LLM classifier")
+    batch.add_argument("--force", action="store_true", help="Re-run stages even when their inputs are unchanged")
+    batch.add_argument("--progress_interval", type=float, default=10.0, help="Seconds between progress lines")
+    batch.set_defaults(func=run_batch_command)
+
+    runs = sub.add_parser("runs", help="Inspect pipeline runs")
+    runs_sub = runs.add_subparsers(dest="runs_command", metavar="command", required=True)
+    ls = runs_sub.add_parser("ls", help="List runs, newest first")
+    ls.add_argument("--limit", type=int, help="Show at most N runs")
+    ls.add_argument("--json", action="store_true", help="Print run metadata as JSON")
+    ls.set_defaults(func=list_runs_command)
+    perf = runs_sub.add_parser("perf", help="Show a run's per-stage resource profile (metadata/perf.json)")
+    perf.add_argument("run_uid")
+    perf.set_defaults(func=show_perf_command)
+    compare = runs_sub.add_parser("compare", help="Compare the per-stage profiles of two runs")
+    compare.add_argument("run_uid_a")
+    compare.add_argument("run_uid_b")
+    compare.set_defaults(func=compare_runs_command)
+    journal = runs_sub.add_parser("journal", help="Summarize a run's recorded HTTP journal")
+    journal.add_argument("run_uid")
+    journal.set_defaults(func=show_journal_command)
+    rebuild = runs_sub.add_parser("rebuild", help="Rebuild the run catalog from the run directories on disk")
+    rebuild.set_defaults(func=rebuild_catalog_command)
+    pack = runs_sub.add_parser("pack", help="Pack finished runs into compressed archives (outputs stay readable)")
+    pack.add_argument("run_uid", nargs="*", help="Runs to pack (default: finished runs idle for --older_than_days)")
+    pack.add_argument("--older_than_days", type=float, default=7)
+    pack.add_argument("--dry_run", action="store_true", help="Only report what would be packed")
+    pack.set_defaults(func=pack_runs_command)
+    unpack = runs_sub.add_parser("unpack", help="Restore a packed run's files into its run directory")
+    unpack.add_argument("run_uid")
+    unpack.set_defaults(func=unpack_run_command)
+    gc = runs_sub.add_parser("gc", help="Delete old promptflow run folders (~/.promptflow/.runs)")
+    gc.add_argument("--older_than_days", type=float, default=14)
+    gc.add_argument("--keep", type=int, default=20, help="Newest runs to keep per flow regardless of age")
+    gc.add_argument("--dry_run", action="store_true", help="Only report what would be deleted")
+    gc.set_defaults(func=gc_command)
+
+    wh = sub.add_parser("warehouse", help="Query records (pages, scrapes, LLM results) across all runs")
+    wh_sub = wh.add_subparsers(dest="warehouse_command", metavar="command", required=True)
+    ingest = wh_sub.add_parser("ingest", help="Ingest run outputs (only files changed since the last ingest)")
+    ingest.add_argument("--run_uid", nargs="+", help="Runs to ingest (default: all)")
+    ingest.add_argument("--force", action="store_true", help="Re-read files even if unchanged")
+    ingest.set_defaults(func=warehouse_ingest_command)
+    matches = wh_sub.add_parser("matches", help="Final-scored postings across runs, newest first")
+    matches.add_argument("--days", type=int, help="Only the last N days")
+    matches.add_argument("--all", action="store_true", help="Include postings that are not a potential match")
+    matches.add_argument("--apply", action="store_true", help="Only postings recommended to apply to")
+    matches.add_argument("--limit", type=int, default=500)
+    matches.add_argument("--json", action="store_true")
+    matches.set_defaults(func=warehouse_matches_command)
+    seen = wh_sub.add_parser("seen", help="Which runs found, scraped or scored a page")
+    seen.add_argument("url_or_page_uid")
+    seen.set_defaults(func=warehouse_seen_command)
+    sql = wh_sub.add_parser("sql", help="Run a read query (tables: queries, pages, scrapes, llm_results)")
+    sql.add_argument("sql")
+    sql.set_defaults(func=warehouse_sql_command)
+
+    mock = sub.add_parser("mock", help="Serve local mock Spider / OpenAI / Remotive APIs for offline runs")
+    from jobserp_explorer.mock_apis import add_arguments as add_mock_arguments  # stdlib only
+    add_mock_arguments(mock)
+    mock.set_defaults(func=mock_apis_command)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        os.environ["JOBSERP_PROFILE"] = "1"
+    # No subcommand keeps the old behaviour: launch the UI
+    getattr(args, "func", launch_ui)(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -22,3 +22,8 @@ METADATA_FILE = DATA_DIR / "metadata.json"
 
 # Default run config
 DEFAULT_LIMIT = 20
+
+# Local caches (LLM responses, etc.)
+CACHE_DIR = BASE_DIR / "data" / "cache"
+LLM_CACHE_PATH = CACHE_DIR / "llm_responses.sqlite"
+RATE_LIMIT_PATH = CACHE_DIR / "rate_limit.sqlite"
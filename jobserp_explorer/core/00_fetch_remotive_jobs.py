@@ -1,10 +1,17 @@
 #!/usr/bin/env python
 
 import argparse
+import os
+import sys
 
 import pandas as pd
 from pathlib import Path
 
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from jobserp_explorer.utils.profiling import add_profile_arg, profiled
+
 
 try:
     import requests
@@ -13,13 +20,17 @@ except ModuleNotFoundError:
     print("❌ Required dependency 'requests' not found. Are you running before installation finished?", file=sys.stderr)
     sys.exit(1)
 
+REMOTIVE_API_BASE_ENV = "REMOTIVE_API_BASE"
+DEFAULT_REMOTIVE_API_BASE = "https://remotive.com"
+
 
 def fetch_remotive_jobs(query: str, limit: int = 50) -> pd.DataFrame:
     """
     Fetch jobs from Remotive API based on a search term.
     Returns a DataFrame with standardized columns.
     """
-    endpoint = "https://remotive.com/api/remote-jobs"
+    base = os.getenv(REMOTIVE_API_BASE_ENV) or DEFAULT_REMOTIVE_API_BASE
+    endpoint = f"{base.rstrip('/')}/api/remote-jobs"
     params = {"search": query, "limit": limit}
     response = requests.get(endpoint, params=params)
     response.raise_for_status()
@@ -34,24 +45,32 @@ def fetch_remotive_jobs(query: str, limit: int = 50) -> pd.DataFrame:
 
     return df
 
-def main():
-    parser = argparse.ArgumentParser(description="Fetch jobs from Remotive API and save as CSV.")
-    parser.add_argument("--query", type=str, required=True, help="Search term for job query, e.g., 'data science'")
-    parser.add_argument("--limit", type=int, default=50, help="Max number of results to fetch (default: 50)")
-    parser.add_argument("--output", type=str, default="00_input/jobs_from_query.csv", help="Output CSV file path")
-
-    args = parser.parse_args()
-    output_path = Path(args.output).resolve()
+def save_remotive_jobs(query: str, output, limit: int = 50) -> Path:
+    output_path = Path(output).resolve()
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    print(f"[→] Fetching Remotive jobs for: '{args.query}' (limit: {args.limit})")
-    df = fetch_remotive_jobs(args.query, args.limit)
+    print(f"[→] Fetching Remotive jobs for: '{query}' (limit: {limit})")
+    df = fetch_remotive_jobs(query, limit)
 
     if df.empty:
         print("[!] No jobs found.")
     else:
         df.to_csv(output_path, index=False)
         print(f"[✓] Saved {len(df)} jobs to: {output_path}")
+    return output_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch jobs from Remotive API and save as CSV.")
+    parser.add_argument("--query", type=str, required=True, help="Search term for job query, e.g., 'data science'")
+    parser.add_argument("--limit", type=int, default=50, help="Max number of results to fetch (default: 50)")
+    parser.add_argument("--output", type=str, default="00_input/jobs_from_query.csv", help="Output CSV file path")
+    add_profile_arg(parser)
+
+    args = parser.parse_args()
+    # --output is a file in the run folder, next to logs/
+    log_dir = Path(args.output).resolve().parent / "logs"
+    with profiled("00_fetch_remotive_jobs", log_dir, enabled=args.profile):
+        save_remotive_jobs(args.query, args.output, args.limit)
 
 if __name__ == "__main__":
     main()
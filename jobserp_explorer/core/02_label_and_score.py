@@ -1,11 +1,17 @@
 import os
-import glob
 import html
 import argparse
 import pandas as pd
+import sys
 from urllib.parse import urlparse
 from pathlib import Path
 
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from jobserp_explorer.utils.profiling import add_profile_arg, profiled
+from jobserp_explorer.utils.tables import list_tables, read_table, table_format, write_table
+
 
 # %%
 # Known ATS Providers
@@ -121,17 +127,20 @@ def filter_top_candidates(df, n_per_label=2, n_unknown=1, group_key='job_index',
     """
     # Keep top N per label (e.g. Employer, ATS)
     label_filter = df['label'].isin(['Employer', 'ATS'])
+    # (sort + groupby.head keeps the grouping columns, unlike groupby.apply on pandas >= 3)
     top_known = (
         df[label_filter]
-        .groupby([group_key, 'label'], group_keys=False)
-        .apply(lambda g: g.sort_values(by=score_col, ascending=False).head(n_per_label))
+        .sort_values(by=score_col, ascending=False, kind='stable')
+        .groupby([group_key, 'label'])
+        .head(n_per_label)
     )
 
     # Keep top N Unknown per group
     top_unknown = (
         df[df['label'] == 'Unknown']
-        .groupby(group_key, group_keys=False)
-        .apply(lambda g: g.sort_values(by=score_col, ascending=False).head(n_unknown))
+        .sort_values(by=score_col, ascending=False, kind='stable')
+        .groupby(group_key)
+        .head(n_unknown)
     )
 
     return (
@@ -142,9 +151,58 @@ def filter_top_candidates(df, n_per_label=2, n_unknown=1, group_key='job_index',
 
 
 def save_results_csv(df, output_file):
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    df.to_csv(output_file, index=False, encoding='utf-8')
+    """Write the filtered results; in Parquet mode the CSV is kept alongside for people to open."""
+    return write_table(df, output_file, "scored", keep_csv=True)
+
+
+
+def score_frame(df):
+    """
+    Label and score an expanded SERP frame.
+
+    Returns ``(scored, filtered)``: every row with label/score, and the top
+    candidates per job with the columns written to ``*_results.csv``.
+    """
+    # Normalize early
+    df = df.rename(columns={
+        "Job Title": "job_title",
+        "Company": "company",
+        "SERP_title": "serp_title",
+        "SERP_description": "serp_description",
+        "SERP_url": "serp_url"
+    })
+
+
+    if 'domain' not in df.columns or df['domain'].isnull().all():
+        df['domain'] = df['serp_url'].apply(extract_domain_from_url)
+    else:
+        df['domain'] = df['domain'].astype(object).fillna('').apply(str).str.lower()
+
+
+    df['serp_title'] = df['serp_title'].apply(lambda x: html.unescape(str(x)))
+    df['serp_description'] = df['serp_description'].apply(lambda x: html.unescape(str(x)))
+
+    df['query_uid'] = df.apply(lambda row: make_query_uid(row['job_title'], row['company']), axis=1)
+    df['page_uid'] = df['serp_url'].apply(make_page_uid)
 
+    df[['label', 'score']] = df.apply(
+        lambda row: label_and_score(row, ats_providers_scored, aggregators_scored),
+        axis=1, result_type='expand'
+    )
+
+    # Filtering
+    filtered = filter_top_candidates(df, n_per_label=2, n_unknown=1)
+
+    filtered['google_search'] = filtered.apply(
+        lambda row: f"https://www.google.com/search?q=site:{row['domain']}+{row['job_title']}+{row['company']}+{row['serp_title']}",
+        axis=1
+    )
+
+    final_cols = [
+        'query_uid', 'page_uid', 'job_index', 'job_title', 'company',
+        'serp_title', 'domain', 'label', 'score', 'serp_url', 'google_search'
+    ]
+    return df, filtered[final_cols]
 
 
 # === Main Pipeline Logic ===
@@ -152,72 +210,40 @@ import logging
 import json
 from datetime import datetime
 
-def main(input_dir, output_dir, log_dir, meta_dir, debug=False):
-    input_files = glob.glob(os.path.join(input_dir, 'serp_expanded_*.csv'))
+def main(input_dir, output_dir, log_dir, meta_dir, debug=False, force=False):
+    input_files = list_tables(input_dir, 'serp_expanded_*')
     logging.info(f"Found {len(input_files)} input files.")
 
+    suffix = ".parquet" if table_format() == "parquet" else ".csv"
+    outputs = []
     for input_file in input_files:
-        base_name = os.path.splitext(os.path.basename(input_file))[0]
+        base_name = input_file.stem
         output_filtered = os.path.join(output_dir, f"{base_name}_results.csv")
         output_full = os.path.join(output_dir, f"{base_name}_scored_full.csv")
         meta_path = os.path.join(meta_dir, f"{base_name}_meta.json")
 
-        if os.path.exists(output_filtered):
+        existing = Path(output_filtered).with_suffix(suffix)
+        if existing.exists() and not force:
             logging.info(f"[SKIP] {base_name} already processed.")
+            outputs.append(existing)
             continue
 
         logging.info(f"[PROCESS] {base_name}")
         try:
-            df = pd.read_csv(input_file, encoding='utf-8')
+            df = read_table(input_file, "serp_expanded")
         except pd.errors.EmptyDataError:
+            df = pd.DataFrame()
+        if df.empty:
             logging.warning(f"[SKIP] {input_file} is empty or corrupt.")
             continue
 
-        # Normalize early
-        df = df.rename(columns={
-            "Job Title": "job_title",
-            "Company": "company",
-            "SERP_title": "serp_title",
-            "SERP_description": "serp_description",
-            "SERP_url": "serp_url"
-        })
-        
-
-        if 'domain' not in df.columns or df['domain'].isnull().all():
-            df['domain'] = df['serp_url'].apply(extract_domain_from_url)
-        else:
-            df['domain'] = df['domain'].fillna('').apply(str).str.lower()
-
-
-        df['serp_title'] = df['serp_title'].apply(lambda x: html.unescape(str(x)))
-        df['serp_description'] = df['serp_description'].apply(lambda x: html.unescape(str(x)))
-
-        df['query_uid'] = df.apply(lambda row: make_query_uid(row['job_title'], row['company']), axis=1)
-        df['page_uid'] = df['serp_url'].apply(make_page_uid)
-
-        df[['label', 'score']] = df.apply(
-            lambda row: label_and_score(row, ats_providers_scored, aggregators_scored),
-            axis=1, result_type='expand'
-        )
+        df, filtered = score_frame(df)
 
         # Save full scored version for audit
-        os.makedirs(output_dir, exist_ok=True)
-        df.to_csv(output_full, index=False, encoding='utf-8')
-        logging.info(f"[SAVE] Full scored CSV → {output_full}")
-
-        # Filtering
-        filtered = filter_top_candidates(df, n_per_label=2, n_unknown=1)
-
-        filtered['google_search'] = filtered.apply(
-            lambda row: f"https://www.google.com/search?q=site:{row['domain']}+{row['job_title']}+{row['company']}+{row['serp_title']}",
-            axis=1
-        )
-
-        final_cols = [
-            'query_uid', 'page_uid', 'job_index', 'job_title', 'company',
-            'serp_title', 'domain', 'label', 'score', 'serp_url', 'google_search'
-        ]
-        save_results_csv(filtered[final_cols], output_filtered)
+        output_full = write_table(df, output_full, "scored")
+        logging.info(f"[SAVE] Full scored table → {output_full}")
+
+        output_filtered = save_results_csv(filtered, output_filtered)
         logging.info(f"[SAVE] Filtered results → {output_filtered}")
 
         # Metadata logging
@@ -234,6 +260,9 @@ def main(input_dir, output_dir, log_dir, meta_dir, debug=False):
         with open(meta_path, 'w', encoding='utf-8') as f:
             json.dump(meta, f, indent=2)
         logging.info(f"[META] Metadata saved → {meta_path}")
+        outputs.append(output_filtered)
+
+    return outputs
 
         
 # === CLI Entry Point ===
@@ -244,6 +273,8 @@ if __name__ == "__main__":
     parser.add_argument('--log_dir', type=str, required=True, help='Directory to store logs')
     parser.add_argument("--meta_dir", type=str, required=True)
     parser.add_argument("--debug", action="store_true")
+    parser.add_argument("--force", action="store_true", help="Re-process inputs that already have results")
+    add_profile_arg(parser)
 
     args = parser.parse_args()
     log_dir = Path(args.log_dir).resolve()
@@ -257,4 +288,5 @@ if __name__ == "__main__":
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
 
-    main(args.input_dir, args.output_dir, args.log_dir, args.meta_dir, args.debug)
\ No newline at end of file
+    with profiled("02_label_and_score", args.log_dir, enabled=args.profile):
+        main(args.input_dir, args.output_dir, args.log_dir, args.meta_dir, args.debug, args.force)
\ No newline at end of file
@@ -2,6 +2,7 @@ import argparse
 import os
 import json
 import logging
+import sys
 from pathlib import Path
 from datetime import datetime
 
@@ -9,6 +10,13 @@ import pandas as pd
 import unicodedata
 import hashlib
 
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from jobserp_explorer.pipeline import write_stage_manifest
+from jobserp_explorer.utils.profiling import add_profile_arg, profiled
+from jobserp_explorer.utils.tables import list_tables, read_table
+
 # === UID Utility ===
 def normalize_str(s):
     return unicodedata.normalize("NFKC", str(s)).strip().lower()
@@ -21,6 +29,24 @@ def make_page_uid(serp_url: str) -> str:
     normalized = unicodedata.normalize("NFKC", str(serp_url)).strip().lower()
     return hashlib.md5(normalized.encode()).hexdigest()[:10]
 
+def _text(value) -> str:
+    return "" if pd.isna(value) else str(value)
+
+def export_record(row: dict) -> dict:
+    """One scored SERP row → serp_class_input record."""
+    return {
+        "job_index": row["job_index"],
+        "query_uid": make_query_uid(row["job_title"], row["company"]),
+        "job_title": row["job_title"],
+        "company": row["company"],
+        "page_uid": make_page_uid(row["serp_url"]),
+        "serp_url": row["serp_url"],
+        "serp_title": _text(row.get("serp_title", "")),
+        "domain": _text(row.get("domain", "")),
+        "label": _text(row.get("label", "")),
+        "scraped_data": ""
+    }
+
 # === Export Function ===
 def export_jsonl(input_dir, output_dir, meta_dir, log_dir, debug=False):
     input_dir = Path(input_dir)
@@ -38,28 +64,20 @@ def export_jsonl(input_dir, output_dir, meta_dir, log_dir, debug=False):
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
 
-    input_files = sorted(input_dir.glob("*_results.csv"))
+    input_files = list_tables(input_dir, "*_results")
     logging.info(f"Found {len(input_files)} result files.")
 
     all_rows = []
     for file in input_files:
         logging.info(f"[READ] {file.name}")
         try:
-            df = pd.read_csv(file)
+            df = read_table(file, "scored")
         except pd.errors.EmptyDataError:
             logging.warning(f"[SKIP] Empty file: {file}")
             continue
 
-        for row in df.itertuples(index=False):
-            row_dict = {
-                "job_index": row.job_index,
-                "query_uid": make_query_uid(row.job_title, row.company),
-                "job_title": row.job_title,
-                "company": row.company,
-                "page_uid": make_page_uid(row.serp_url),
-                "serp_url": row.serp_url,
-                "scraped_data": ""
-            }
+        for row in df.to_dict(orient="records"):
+            row_dict = export_record(row)
             all_rows.append(row_dict)
 
     timestamp = datetime.now().strftime("%Y%m%dT%H%M%S")
@@ -95,6 +113,13 @@ if __name__ == "__main__":
     parser.add_argument("--meta_dir", required=True)
     parser.add_argument("--log_dir", required=True)
     parser.add_argument("--debug", action="store_true")
+    add_profile_arg(parser)
     args = parser.parse_args()
 
-    export_jsonl(args.input_dir, args.output_dir, args.meta_dir, args.log_dir, args.debug)
+    with profiled("03_export_results_to_jsonl", args.log_dir, enabled=args.profile):
+        out_path = export_jsonl(args.input_dir, args.output_dir, args.meta_dir, args.log_dir, args.debug)
+
+    # Pointer for downstream stages, replacing "newest file in the dir" lookups; the same manifest
+    # the DAG writes, so either reuses the other's export
+    write_stage_manifest({"scored_csv": Path(args.input_dir), "metadata": Path(args.meta_dir)}, "export_jsonl",
+                         out_path)
@@ -0,0 +1,171 @@
+import argparse
+import json
+import logging
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from jobserp_explorer.utils.artifacts import Artifact
+from jobserp_explorer.utils.page_rules import DEFAULT_THRESHOLD, preclassify, rule_summary
+from jobserp_explorer.utils.profiling import add_profile_arg, profiled
+
+
+# === Pre-classification ===
+def preclassify_jsonl(input_path, output_dir, residual_dir, meta_dir, threshold=DEFAULT_THRESHOLD):
+    """
+    Split a serp_class_input JSONL into rule-classified rows and an LLM residual.
+
+    Confident rows are written in flow_pagecateg output format to ``output_dir``;
+    the rest go unchanged to ``residual_dir`` for the LLM classifier.
+    Returns ``(rules_path, residual_path)``; residual_path is None when empty.
+    """
+    input_path = Path(input_path)
+    output_dir, residual_dir, meta_dir = Path(output_dir), Path(residual_dir), Path(meta_dir)
+    for d in [output_dir, residual_dir, meta_dir]:
+        d.mkdir(parents=True, exist_ok=True)
+
+    classified, residual = [], []
+    rule_hits = Counter()
+    n_rows = 0
+    for line_number, row in enumerate(Artifact(input_path).records()):
+        n_rows += 1
+        page_type, confidence, rule = preclassify(
+            row.get("serp_url"), row.get("domain", ""), row.get("label", ""), row.get("serp_title", "")
+        )
+        if page_type and confidence >= threshold:
+            rule_hits[rule] += 1
+            classified.append({
+                "id": str(row.get("job_index")),
+                "serp_url": row.get("serp_url"),
+                "page_uid": row.get("page_uid"),
+                "summary": rule_summary(row.get("serp_url"), page_type, confidence, rule),
+                "line_number": line_number,
+            })
+        else:
+            residual.append(row)
+
+    timestamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    rules_path = output_dir / f"{input_path.stem}_rules_{timestamp}.jsonl"
+    with open(rules_path, "w", encoding="utf-8") as f:
+        for record in classified:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    # Residual name is derived from the input so callers can locate it directly
+    residual_path = residual_dir / f"{input_path.stem}_residual.jsonl"
+    if residual:
+        with open(residual_path, "w", encoding="utf-8") as f:
+            for row in residual:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    else:
+        residual_path.unlink(missing_ok=True)
+        residual_path = None
+
+    meta = {
+        "timestamp": timestamp,
+        "input_file": str(input_path),
+        "threshold": threshold,
+        "n_rows": n_rows,
+        "n_short_circuited": len(classified),
+        "n_residual": len(residual),
+        "short_circuit_rate": round(len(classified) / n_rows, 4) if n_rows else 0.0,
+        "rule_hits": dict(rule_hits.most_common()),
+        "rules_file": str(rules_path),
+        "residual_file": str(residual_path) if residual_path else None,
+    }
+    meta_path = meta_dir / f"preclassify_{timestamp}.json"
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    logging.info(f"[PRECLASSIFY] {len(classified)}/{n_rows} rows short-circuited → {rules_path}")
+    print(f"[✓] Pre-classified {len(classified)}/{n_rows} rows ({meta['short_circuit_rate']:.0%}); "
+          f"{len(residual)} left for the LLM")
+    return rules_path, residual_path
+
+
+# === Evaluation on historical runs ===
+def _load_labels(run_dir: Path) -> dict:
+    """page_uid → (domain, label, serp_title) from a run's scored results tables."""
+    import pandas as pd
+    from jobserp_explorer.utils.tables import list_tables, read_table
+
+    labels = {}
+    for table_path in list_tables(run_dir / "03_scored", "*_results"):
+        try:
+            df = read_table(table_path, "scored")
+        except pd.errors.EmptyDataError:
+            continue
+        for row in df.itertuples(index=False):
+            labels[row.page_uid] = (str(row.domain), str(row.label), str(row.serp_title))
+    return labels
+
+
+def evaluate(runs_dir, threshold=DEFAULT_THRESHOLD) -> dict:
+    """Short-circuit rate and agreement with past LLM page classifications."""
+    n_rows = n_short = n_agree = 0
+    per_rule = {}
+    disagreements = Counter()
+
+    for run_dir in sorted(Path(runs_dir).glob("run_*")):
+        labels = _load_labels(run_dir)
+        for path in (run_dir / "05_page_classification" / "00_jsonl_annotated").glob("*.jsonl"):
+            if "_rules_" in path.name:
+                continue
+            for line in path.open(encoding="utf-8"):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                llm_type = (record.get("summary") or {}).get("page_type")
+                if not llm_type or (record.get("summary") or {}).get("classified_by") == "rules":
+                    continue
+                url = record.get("serp_url", "")
+                domain, label, title = labels.get(record.get("page_uid"), (urlparse(url).netloc, "", ""))
+                page_type, confidence, rule = preclassify(url, domain, label, title)
+                n_rows += 1
+                if not page_type or confidence < threshold:
+                    continue
+                n_short += 1
+                stats = per_rule.setdefault(rule, {"n": 0, "agree": 0})
+                stats["n"] += 1
+                if page_type == llm_type:
+                    n_agree += 1
+                    stats["agree"] += 1
+                else:
+                    disagreements[f"{rule}: rules={page_type} llm={llm_type}"] += 1
+
+    return {
+        "threshold": threshold,
+        "n_rows": n_rows,
+        "n_short_circuited": n_short,
+        "short_circuit_rate": round(n_short / n_rows, 4) if n_rows else 0.0,
+        "agreement": round(n_agree / n_short, 4) if n_short else None,
+        "per_rule": per_rule,
+        "disagreements": dict(disagreements.most_common(20)),
+    }
+
+
+# === CLI Entry Point ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rule-based SERP page pre-classifier.")
+    parser.add_argument("--input", help="serp_class_input JSONL to pre-classify")
+    parser.add_argument("--output_dir", help="Directory for rule-classified rows (flow output format)")
+    parser.add_argument("--residual_dir", help="Directory for rows left for the LLM classifier")
+    parser.add_argument("--meta_dir", help="Directory to store metadata")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Minimum rule confidence to skip the LLM")
+    parser.add_argument("--evaluate", metavar="RUNS_DIR", help="Report short-circuit rate and LLM agreement on past runs")
+    add_profile_arg(parser)
+    args = parser.parse_args()
+
+    if args.evaluate:
+        print(json.dumps(evaluate(args.evaluate, args.threshold), indent=2))
+        sys.exit(0)
+
+    if not (args.input and args.output_dir and args.residual_dir and args.meta_dir):
+        parser.error("--input, --output_dir, --residual_dir and --meta_dir are required unless --evaluate is given")
+
+    with profiled("04_preclassify_pages", Path(args.meta_dir).parent / "logs", enabled=args.profile):
+        preclassify_jsonl(args.input, args.output_dir, args.residual_dir, args.meta_dir, args.threshold)
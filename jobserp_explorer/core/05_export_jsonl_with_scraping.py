@@ -5,22 +5,20 @@ import time
 import argparse
 import requests
 from pathlib import Path
-from dotenv import load_dotenv
-import glob
 
-load_dotenv()
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
 
-SPIDER_API_KEY = os.getenv("SPIDER_API_KEY")
-if not SPIDER_API_KEY:
-    raise RuntimeError("Missing SPIDER_API_KEY in environment")
+from jobserp_explorer.utils.perf import api_call
+from jobserp_explorer.utils.profiling import add_profile_arg, profiled
+from jobserp_explorer.utils.rate_limit import get_rate_limiter
+from jobserp_explorer.utils.spider import spider_headers, spider_url
+from jobserp_explorer.utils.tables import list_tables, read_table
 
-HEADERS = {
-    "Authorization": f"Bearer {SPIDER_API_KEY}",
-    "Content-Type": "application/json",
-}
 
 def scrape_url(url: str, return_format="markdown", readability=True,
-               clean_html=True, filter_output_main_only=True, retries=2, delay=1.5):
+               clean_html=True, filter_output_main_only=True, retries=2, delay=1.5, headers=None):
+    headers = headers or spider_headers()
     payload = {
         "url": url,
         "return_format": return_format,
@@ -30,9 +28,11 @@ def scrape_url(url: str, return_format="markdown", readability=True,
     }
 
     for attempt in range(retries + 1):
+        get_rate_limiter("spider").acquire("spider")
         try:
-            response = requests.post("https://api.spider.cloud/scrape", headers=HEADERS, json=payload, timeout=20)
-            response.raise_for_status()
+            with api_call("spider"):
+                response = requests.post(spider_url("scrape"), headers=headers, json=payload, timeout=20)
+                response.raise_for_status()
             data = response.json()
             if isinstance(data, list) and data and "content" in data[0]:
                 return data[0]["content"]
@@ -48,12 +48,29 @@ def scrape_url(url: str, return_format="markdown", readability=True,
 import pandas as pd
 from tqdm import tqdm
 
+def scraped_record(row, content) -> dict:
+    """Scraped-page JSONL record for one scored SERP row (a dict or pandas row)."""
+    return {
+        "query_uid": row.get("query_uid"),
+        "page_uid": row.get("page_uid"),
+        "job_index": row.get("job_index"),
+        "job_title": row.get("job_title"),
+        "company": row.get("company"),
+        "label": row.get("label"),
+        "score": row.get("score"),
+        "domain": row.get("domain"),
+        "serp_url": row.get("serp_url"),
+        "serp_title": row.get("serp_title"),
+        "google_search": row.get("google_search"),
+        "scraped_data": content
+    }
+
 def process_file(input_csv: Path, output_dir: Path, **scrape_opts):
     base_name = os.path.splitext(os.path.basename(input_csv))[0]
     output_jsonl = output_dir / f"{base_name}_spider_scraped.jsonl"
 
 
-    df = pd.read_csv(input_csv)
+    df = read_table(input_csv, "scored")
     if df.empty:
         print(f"[✗] Empty file: {input_csv}")
         return
@@ -62,33 +79,44 @@ def process_file(input_csv: Path, output_dir: Path, **scrape_opts):
     if "serp_url" not in df.columns:
         raise ValueError("Missing `serp_url` column in input CSV.")
 
+    headers = spider_headers()
     output_rows = []
     for _, row in tqdm(df.iterrows(), total=len(df), desc="Scraping pages"):
         url = row.get("serp_url")
         if not url:
             continue
 
-        content = scrape_url(url, **scrape_opts)
-        output_rows.append({
-            "query_uid": row.get("query_uid"),
-            "page_uid": row.get("page_uid"),
-            "job_index": row.get("job_index"),
-            "job_title": row.get("job_title"),
-            "company": row.get("company"),
-            "label": row.get("label"),
-            "score": row.get("score"),
-            "domain": row.get("domain"),
-            "serp_url": url,
-            "serp_title": row.get("serp_title"),
-            "google_search": row.get("google_search"),
-            "scraped_data": content
-        })
+        content = scrape_url(url, headers=headers, **scrape_opts)
+        output_rows.append(scraped_record(row, content))
 
     with open(output_jsonl, "w", encoding="utf-8") as f:
         for entry in output_rows:
             f.write(json.dumps(entry, ensure_ascii=False) + "\n")
 
     print(f"[✓] Saved: {output_jsonl}")
+    return output_jsonl
+
+
+def scrape_results_dir(input_dir, output_dir, **scrape_opts) -> list:
+    """Scrape every ``serp_expanded_*_results`` table in ``input_dir``; returns the JSONL paths written."""
+    input_dir = Path(input_dir)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Match files like: serp_expanded_20250713T214212_results.csv
+    print(f"🔍 Scanning directory: {input_dir}")
+    input_files = sorted(list_tables(input_dir, "serp_expanded_*_results"), key=os.path.getmtime, reverse=True)
+
+    if not input_files:
+        raise FileNotFoundError(f"[✗] No matching CSV files found in {input_dir}.")
+
+    outputs = []
+    for csv_path in input_files:
+        print(f"[→] Processing: {csv_path}")
+        out_path = process_file(Path(csv_path), output_dir=output_dir, **scrape_opts)
+        if out_path:
+            outputs.append(out_path)
+    return outputs
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -102,28 +130,20 @@ if __name__ == "__main__":
     parser.set_defaults(clean_html=True)
     parser.add_argument("--main_only", action="store_true")
     parser.set_defaults(main_only=True)
+    add_profile_arg(parser)
 
     args = parser.parse_args()
-    input_dir = Path(args.input_dir)
-    output_dir = Path(args.output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    # Match files like: serp_expanded_20250713T214212_results.csv
-    print(f"🔍 Scanning directory: {input_dir}")
-    input_files = sorted(glob.glob(os.path.join(input_dir, "serp_expanded_*_results.csv")), key=os.path.getmtime, reverse=True)
 
-    if not input_files:
-        print(f"[✗] No matching CSV files found in {input_dir}.")
+    try:
+        with profiled("05_export_jsonl_with_scraping", Path(args.input_dir).parent / "logs", enabled=args.profile):
+            scrape_results_dir(
+                args.input_dir,
+                args.output_dir,
+                return_format=args.format,
+                readability=args.readability,
+                clean_html=args.clean_html,
+                filter_output_main_only=args.main_only
+            )
+    except FileNotFoundError as e:
+        print(e)
         sys.exit(1)
-
-
-    for csv_path in input_files:
-        print(f"[→] Processing: {csv_path}")
-        process_file(
-            csv_path,
-            output_dir=output_dir,
-            return_format=args.format,
-            readability=args.readability,
-            clean_html=args.clean_html,
-            filter_output_main_only=args.main_only
-        )
\ No newline at end of file
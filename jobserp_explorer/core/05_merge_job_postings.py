@@ -1,10 +1,16 @@
 import argparse
+import sys
 import pandas as pd
 import json
 from pathlib import Path
 from typing import List
 from datetime import datetime
 
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from jobserp_explorer.utils.profiling import add_profile_arg, profiled
+
 
 def load_llm_outputs(llm_paths: List[Path]) -> pd.DataFrame:
     dfs = []
@@ -64,6 +70,7 @@ if __name__ == "__main__":
     parser.add_argument("--scraped", nargs="+", required=True, help="Paths to scraped .jsonl files")
     parser.add_argument("--output_dir", required=True, help="Directory to save merged output")
     parser.add_argument("--overwrite", action="store_true", help="Overwrite if output already exists")
+    add_profile_arg(parser)
 
     args = parser.parse_args()
 
@@ -71,4 +78,5 @@ if __name__ == "__main__":
     scraped_paths = [Path(p) for p in args.scraped]
     output_dir = Path(args.output_dir)
 
-    merge_job_postings(llm_paths, scraped_paths, output_dir, args.overwrite)
+    with profiled("05_merge_job_postings", output_dir.parent / "logs", enabled=args.profile):
+        merge_job_postings(llm_paths, scraped_paths, output_dir, args.overwrite)
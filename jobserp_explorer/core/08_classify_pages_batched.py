@@ -0,0 +1,221 @@
+import argparse
+import contextvars
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from jobserp_explorer.utils.artifacts import Artifact
+from jobserp_explorer.utils.llm_client import load_schema, run_llm_schema
+from jobserp_explorer.utils.llm_usage import build_usage_report
+from jobserp_explorer.utils.perf import record_usage
+from jobserp_explorer.utils.profiling import add_profile_arg, profiled
+from jobserp_explorer.utils.tracing import tracing_run
+
+FLOW_DIR = ROOT / "jobserp_explorer" / "flow_pagecateg"
+SINGLE_TEMPLATE = FLOW_DIR / "session_summarizer3.jinja2"
+SINGLE_SCHEMA = FLOW_DIR / "session_schema3.json"
+BATCH_TEMPLATE = FLOW_DIR / "batch_classifier.jinja2"
+
+
+# === Schema / prompt helpers ===
+def build_batch_schema(single_schema: dict) -> dict:
+    """Wrap the single-page schema into an array-valued `parsed_batch` function."""
+    params = single_schema["parameters"]
+    item = {
+        "type": "object",
+        "properties": {
+            "id": {"type": "string", "description": "The id of the input item being classified."},
+            **params["properties"],
+        },
+        "required": ["id"] + list(params.get("required", [])),
+    }
+    return {
+        "name": "parsed_batch",
+        "description": "Classify every input webpage; one entry per input id.",
+        "parameters": {
+            "type": "object",
+            "properties": {"items": {"type": "array", "items": item}},
+            "required": ["items"],
+        },
+    }
+
+
+def render_template(path: Path, **context) -> str:
+    from jinja2 import Template
+    return Template(path.read_text(encoding="utf-8")).render(**context)
+
+
+def is_valid_item(item, single_schema: dict) -> bool:
+    """Required fields present and enum-typed fields within their allowed values."""
+    if not isinstance(item, dict):
+        return False
+    params = single_schema["parameters"]
+    for field in params.get("required", []):
+        if item.get(field) in (None, ""):
+            return False
+    for field, spec in params["properties"].items():
+        if "enum" in spec and field in item and item[field] not in spec["enum"]:
+            return False
+    return True
+
+
+def split_usage(usage: dict, k: int, batch_id) -> dict:
+    """
+    Attribute a batch call's tokens evenly to its ``k`` rows. Every row carries
+    ``batch_id``, so ``build_usage_report`` counts the call, its latency and
+    its retries once.
+    """
+    shared = dict(usage)
+    for field in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+        shared[field] = round(usage.get(field, 0) / k)
+    shared["batch_size"] = k
+    shared["batch_id"] = batch_id
+    return shared
+
+
+# === Classification ===
+def classify_single(row: dict, deployment_name: str):
+    prompt = render_template(SINGLE_TEMPLATE, **row)
+    return run_llm_schema(prompt=prompt, deployment_name=deployment_name, schema_path=str(SINGLE_SCHEMA))
+
+
+def classify_batch(batch, deployment_name: str, single_schema: dict, batch_schema: dict):
+    """
+    Classify ``batch`` (list of ``(line_number, row)``) in one call.
+
+    Returns ``(results, n_fallback)`` with results as ``(line_number, row, summary, usage)``;
+    ids missing from the batch answer, or malformed, are re-run one by one.
+    """
+    items = [{"id": str(line_number), **row} for line_number, row in batch]
+    by_id = {}
+    usage = None
+
+    if len(batch) > 1:
+        prompt = render_template(BATCH_TEMPLATE, items=items)
+        try:
+            parsed, usage = run_llm_schema(
+                prompt=prompt,
+                deployment_name=deployment_name,
+                function_name="parsed_batch",
+                schema=batch_schema,
+                max_tokens=min(16000, 400 * len(batch)),
+            )
+            for item in parsed.get("items") or []:
+                if isinstance(item, dict) and is_valid_item(item, single_schema):
+                    by_id.setdefault(str(item.get("id")), item)
+        except Exception as e:
+            print(f"[!] Batch of {len(batch)} failed, falling back to single-row calls: {e}")
+
+    results = []
+    n_fallback = 0
+    answered = sum(1 for line_number, _ in batch if str(line_number) in by_id)
+    for line_number, row in batch:
+        item = by_id.get(str(line_number))
+        if item is not None:
+            summary = {k: v for k, v in item.items() if k != "id"}
+            results.append((line_number, row, summary, split_usage(usage, answered, batch[0][0])))
+            continue
+        n_fallback += 1
+        try:
+            summary, row_usage = classify_single(row, deployment_name)
+            results.append((line_number, row, summary, row_usage))
+        except Exception as e:
+            print(f"[✗] Single-row classification failed for line {line_number}: {e}")
+    return results, n_fallback
+
+
+def classify_pages_batched(input_path, output_dir, batch_size=10, workers=4,
+                           deployment_name="gpt-4o-mini", log_dir=None, meta_dir=None):
+    input_path = Path(input_path).resolve()
+    output_dir = Path(output_dir).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if not input_path.exists():
+        raise FileNotFoundError(f"[✗] Input file not found: {input_path}")
+
+    timestamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    trace_dir = Path(log_dir).resolve() / "traces" if log_dir else None
+
+    rows = list(Artifact(input_path).records())
+
+    single_schema = load_schema(str(SINGLE_SCHEMA))
+    batch_schema = build_batch_schema(single_schema)
+    numbered = list(enumerate(rows))
+    batches = [numbered[i:i + batch_size] for i in range(0, len(numbered), batch_size)]
+    print(f"[ℹ] Classifying {len(rows)} rows in {len(batches)} batches of ≤{batch_size} ({workers} workers)")
+
+    started = time.perf_counter()
+    # Each batch runs in a copy of this context, so its calls go to this run's trace file (and perf stage)
+    with tracing_run(trace_dir, f"flow_pagecateg_batched_{timestamp}"), ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, classify_batch, b, deployment_name, single_schema,
+                               batch_schema) for b in batches]
+        outcomes = [f.result() for f in futures]
+    wall_time_s = time.perf_counter() - started
+
+    records = []
+    n_fallback = 0
+    for results, fallback in outcomes:
+        n_fallback += fallback
+        for line_number, row, summary, usage in results:
+            records.append({
+                "id": str(row.get("job_index")),
+                "serp_url": row.get("serp_url"),
+                "page_uid": row.get("page_uid"),
+                "summary": summary,
+                "usage": usage,
+                "line_number": line_number,
+            })
+    records.sort(key=lambda r: r["line_number"])
+
+    out_path = output_dir / f"{input_path.stem}_flow_pagecateg_batched_{timestamp}.jsonl"
+    with open(out_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print(f"[✓] Saved {len(records)} lines to: {out_path}")
+
+    record_usage(records)
+    report = build_usage_report(records, wall_time_s, flow_name="flow_pagecateg_batched",
+                                n_failed=len(rows) - len(records))
+    report.update(batch_size=batch_size, n_batches=len(batches), n_fallback_rows=n_fallback,
+                  input_file=str(input_path), output_file=str(out_path))
+    print(f"[ℹ] {len(batches)} batch calls + {n_fallback} single-row fallbacks for {len(rows)} rows "
+          f"in {wall_time_s:.1f}s")
+
+    if meta_dir:
+        meta_dir = Path(meta_dir).resolve()
+        meta_dir.mkdir(parents=True, exist_ok=True)
+        report_path = meta_dir / f"llm_report_flow_pagecateg_batched_{timestamp}.json"
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[✓] Usage report saved to: {report_path}")
+
+    return out_path
+
+
+# === CLI Entry Point ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify SERP pages with K rows per LLM call.")
+    parser.add_argument("--input", required=True, help="Path to serp_class_input JSONL file")
+    parser.add_argument("--output_dir", required=True, help="Directory to save annotated output")
+    parser.add_argument("--batch_size", type=int, default=10, help="Rows per LLM call (default: 10)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent batch calls (default: 4)")
+    parser.add_argument("--deployment_name", default="gpt-4o-mini")
+    parser.add_argument("--log_dir", help="Run log directory; LLM traces go to <log_dir>/traces")
+    parser.add_argument("--meta_dir", help="Run metadata directory for the LLM usage report")
+    parser.add_argument("--cache", choices=["on", "off", "refresh"], help="LLM response cache mode (default: on)")
+    add_profile_arg(parser)
+    args = parser.parse_args()
+
+    if args.cache:
+        os.environ["JOBSERP_LLM_CACHE"] = args.cache
+
+    with profiled("08_classify_pages_batched", args.log_dir, enabled=args.profile):
+        classify_pages_batched(args.input, args.output_dir, batch_size=args.batch_size, workers=args.workers,
+                               deployment_name=args.deployment_name, log_dir=args.log_dir, meta_dir=args.meta_dir)
@@ -1,7 +1,7 @@
 import subprocess
 import os
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 import argparse
 import sys
@@ -22,13 +22,28 @@ sys.modules["promptflow._sdk._telemetry.logging_handler"] = fake_telemetry_modul
 
 
 import importlib.util
-if not importlib.util.find_spec("promptflow._cli.pf"):
-    print("[✗] promptflow._cli.pf module not found in current environment.")
-    sys.exit(1)
+
+
+def require_promptflow():
+    """Checked per run (not at import) so the pipeline can import this stage without promptflow."""
+    try:
+        found = importlib.util.find_spec("promptflow._cli.pf")
+    except ModuleNotFoundError:
+        found = None
+    if not found:
+        raise RuntimeError("[✗] promptflow._cli.pf module not found in current environment.")
 
 import os
 os.environ["PYTHON_KEYRING_BACKEND"] = "keyrings.alt.file.PlaintextKeyring"
 
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from jobserp_explorer.utils.artifacts import Artifact
+from jobserp_explorer.utils.llm_usage import build_usage_report
+from jobserp_explorer.utils.perf import record_usage
+from jobserp_explorer.utils.profiling import DIR_ENV as PROFILE_DIR_ENV, PROFILE_ENV, add_profile_arg, profiled, profiling_enabled
+
 
 def ensure_promptflow_connection(flow_dir, openai_key, connection_name="open_ai_connection"):
     from pathlib import Path
@@ -73,8 +88,11 @@ def ensure_promptflow_connection(flow_dir, openai_key, connection_name="open_ai_
         print(result.stdout)
 
 
-def run_promptflow_flow(input_path, flow_dir, output_base="outputs/annotated", dry_run=False):
+def run_promptflow_flow(input_path, flow_dir, output_base="outputs/annotated", dry_run=False,
+                        log_dir=None, meta_dir=None, trace=False, trace_sample=None, cache_mode=None,
+                        cascade=None, cascade_band=None, run_uid=None):
     import shutil
+    import uuid
     input_path = Path(input_path).resolve()
     flow_dir = Path(flow_dir).resolve()
     output_base = Path(output_base).resolve()
@@ -86,6 +104,8 @@ def run_promptflow_flow(input_path, flow_dir, output_base="outputs/annotated", d
     if not flow_dir.exists():
         raise FileNotFoundError(f"[✗] Flow directory not found: {flow_dir}")
 
+    require_promptflow()
+
     flow_name = flow_dir.name
     print(f"[ℹ] Running PromptFlow on: {input_path.name}")
     print(f"[ℹ] Flow directory: {flow_dir}")
@@ -95,6 +115,33 @@ def run_promptflow_flow(input_path, flow_dir, output_base="outputs/annotated", d
     env = os.environ.copy()
     env["PYTHONPATH"] = ":".join(sys.path)
 
+    # LLM tool tracing (see utils/tracing.py): one JSONL file per worker process,
+    # written next to the run logs when a log dir is given.
+    timestamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    if trace:
+        env["JOBSERP_TRACE"] = "1"
+    if trace_sample is not None:
+        env["JOBSERP_TRACE_SAMPLE"] = str(trace_sample)
+    if log_dir:
+        env["JOBSERP_TRACE_DIR"] = str(Path(log_dir).resolve() / "traces")
+    env["JOBSERP_TRACE_RUN"] = f"{flow_name}_{timestamp}"
+
+    # LLM response cache (see utils/llm_cache.py): on / off / refresh
+    if cache_mode:
+        env["JOBSERP_LLM_CACHE"] = cache_mode
+
+    # Model cascade for final scoring (flow_jobposting): cheap tier first,
+    # escalate ambiguous answers. e.g. cascade="gpt-4.1-nano,gpt-4o"
+    if cascade:
+        env["JOBSERP_CASCADE_TIERS"] = cascade
+    if cascade_band:
+        env["JOBSERP_CASCADE_BAND"] = cascade_band
+
+    # Profiling (see utils/profiling.py): the flow tool writes per-worker
+    # profiles next to the run logs
+    if profiling_enabled() and log_dir:
+        env[PROFILE_DIR_ENV] = str(Path(log_dir).resolve() / "profile")
+
     # This should be set in the environment or secrets.toml
     openai_key = os.environ.get("OPENAI_API_KEY")
     if not openai_key:
@@ -105,10 +152,13 @@ def run_promptflow_flow(input_path, flow_dir, output_base="outputs/annotated", d
 
     # Execute
 
+    # Explicit run name: concurrent runs (batch mode) must not pick up each other's outputs
+    run_name = f"{flow_name}_{run_uid or uuid.uuid4().hex[:8]}_{timestamp}"
     pf_command = [
         str(PYTHON_BIN), "-m", "promptflow._cli.pf", "run", "create",
         "--flow", str(flow_dir),
         "--data", str(input_path),
+        "--name", run_name,
     ]
 
     print("\n[🔧] Running command:")
@@ -118,8 +168,7 @@ def run_promptflow_flow(input_path, flow_dir, output_base="outputs/annotated", d
         print("[DRY RUN] Skipping execution.")
         return None
 
-    # Record time before execution
-    before_time = datetime.now()
+    started = time.perf_counter()
 
 
     result = subprocess.run(
@@ -131,6 +180,8 @@ def run_promptflow_flow(input_path, flow_dir, output_base="outputs/annotated", d
     print("[🔍] PYTHONPATH being passed to subprocess:")
     print(env["PYTHONPATH"])
 
+    wall_time_s = time.perf_counter() - started
+
     if result.returncode != 0:
         error_msg = (
             f"[✗] PromptFlow execution failed with code {result.returncode}\n\n"
@@ -150,47 +201,58 @@ def run_promptflow_flow(input_path, flow_dir, output_base="outputs/annotated", d
     print(result.stderr)
 
 
-    # Sleep briefly to allow filesystem sync
-    time.sleep(1)
-
-    # Find most recent .runs folder
     pf_home = Path(os.environ.get("PROMPTFLOW_HOME", Path.home() / ".promptflow"))
-    pf_runs_dir = pf_home / ".runs"
+    latest_run_dir = pf_home / ".runs" / run_name
 
-    recent_runs = []
-
-    for d in pf_runs_dir.glob(f"{flow_name}_variant_*"):
-        mod_time = datetime.fromtimestamp(d.stat().st_mtime)
-        if mod_time > before_time - timedelta(seconds=10):
-            recent_runs.append((mod_time, d))
-
-    if not recent_runs:
-        raise RuntimeError(f"[✗] No recent run dirs found in {pf_runs_dir} for flow `{flow_name}`")
-
-    # Select most recent one
-    recent_runs.sort(reverse=True)
-    latest_run_dir = recent_runs[0][1]
-
-    print(f"[🗂️] Latest run dir: {latest_run_dir}")
+    print(f"[🗂️] Run dir: {latest_run_dir}")
 
     output_file = latest_run_dir / "outputs.jsonl"
     if not output_file.exists():
         raise RuntimeError(f"[✗] outputs.jsonl not found in {latest_run_dir}")
 
     # Prepare final output path
-    timestamp = datetime.now().strftime("%Y%m%dT%H%M%S")
     stem = input_path.stem
     out_path = output_base / f"{stem}_{flow_name}_{timestamp}.jsonl"
     output_base.mkdir(parents=True, exist_ok=True)
 
     # Copy file
     lines_written = 0
+    records = []
     with open(output_file, "r", encoding="utf-8") as src, open(out_path, "w", encoding="utf-8") as dst:
         for line in src:
             dst.write(line)
             lines_written += 1
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                pass
 
     print(f"[✓] Saved {lines_written} lines to: {out_path}")
+
+    # Run-level latency / token / cost report
+    n_inputs = Artifact(input_path).count()
+    record_usage(records)
+    report = build_usage_report(records, wall_time_s, flow_name=flow_name,
+                                n_failed=max(0, n_inputs - len(records)))
+    report.update(input_file=str(input_path), output_file=str(out_path), pf_run_dir=str(latest_run_dir))
+
+    print(f"[ℹ] LLM usage: p50 {report['latency_s']['p50']}s / p95 {report['latency_s']['p95']}s, "
+          f"{report['tokens']['prompt_per_row']} prompt tok/row "
+          f"(cached {report['tokens']['cached_ratio']:.1%}), "
+          f"~${report['cost_usd']['total_estimate']:.4f}, "
+          f"{report['throughput_rows_per_min']} rows/min")
+    if report["tiers"]["answered_by"]:
+        print(f"[ℹ] Cascade: answered by {report['tiers']['answered_by']}, "
+              f"{report['tiers']['n_escalated']} rows escalated")
+
+    if meta_dir:
+        meta_dir = Path(meta_dir).resolve()
+        meta_dir.mkdir(parents=True, exist_ok=True)
+        report_path = meta_dir / f"llm_report_{flow_name}_{timestamp}.json"
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[✓] Usage report saved to: {report_path}")
+
     return out_path
 
 
@@ -200,6 +262,22 @@ if __name__ == "__main__":
     parser.add_argument("--flow_dir", required=True, help="Path to PromptFlow directory")
     parser.add_argument("--output_dir", default="outputs/annotated", help="Directory to save final output")
     parser.add_argument("--dry_run", action="store_true", help="Print the command without executing")
+    parser.add_argument("--log_dir", help="Run log directory; LLM traces go to <log_dir>/traces")
+    parser.add_argument("--meta_dir", help="Run metadata directory for the LLM usage report")
+    parser.add_argument("--trace", action="store_true", help="Enable sampled LLM tracing (same as JOBSERP_TRACE=1)")
+    parser.add_argument("--trace_sample", type=float, help="Fraction of rows whose full prompt/response is traced")
+    parser.add_argument("--cache", choices=["on", "off", "refresh"], help="LLM response cache mode (default: on)")
+    parser.add_argument("--cascade", help="Comma-separated model tiers for final scoring, cheapest first")
+    parser.add_argument("--cascade_band", help="match_score band that escalates to the next tier (default: 0.4,0.7)")
+    parser.add_argument("--run_uid", help="Run UID, used in the promptflow run name")
+    add_profile_arg(parser, help="Profile this script and the flow tool workers into <log_dir>/profile (same as JOBSERP_PROFILE=1)")
     args = parser.parse_args()
 
-    run_promptflow_flow(args.input, args.flow_dir, output_base=args.output_dir, dry_run=args.dry_run)
+    if args.profile:
+        os.environ[PROFILE_ENV] = "1"  # inherited by the promptflow workers
+
+    with profiled("09_run_promptflow", args.log_dir):
+        run_promptflow_flow(args.input, args.flow_dir, output_base=args.output_dir, dry_run=args.dry_run,
+                            log_dir=args.log_dir, meta_dir=args.meta_dir, trace=args.trace,
+                            trace_sample=args.trace_sample, cache_mode=args.cache, cascade=args.cascade,
+                            cascade_band=args.cascade_band, run_uid=args.run_uid)
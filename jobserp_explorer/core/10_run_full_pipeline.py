@@ -10,6 +10,11 @@ import os
 sys.path.append('./')
 
 from jobserp_explorer.run_manager import *
+from jobserp_explorer.pipeline import run_pipeline
+from jobserp_explorer.utils.http_journal import LATENCY_MODES, journaled_run
+from jobserp_explorer.utils.manifest import latest_output
+from jobserp_explorer.utils.profiling import DIR_ENV as PROFILE_DIR_ENV, PROFILE_ENV, add_profile_arg
+from jobserp_explorer.utils import run_catalog
 
 # utils/paths.py
 from pathlib import Path
@@ -24,6 +29,7 @@ def make_run_dir(run_uid: str) -> dict:
         "scored_csv": base / "03_scored",
         "serp_jsonl_input_dir": base / "04_serp_jsonl_input",
         "page_classification_dir": base / "05_page_classification/00_jsonl_annotated",
+        "page_llm_input_dir": base / "05_page_classification/01_llm_input",
         "html_scraped_dir": base / "06_scraped_html",
         "final_scored_jsonl": base / "07_final_scored",
         "logs": base / "logs",
@@ -42,7 +48,13 @@ def run_command(cmd, desc=None):
 import json
 from datetime import datetime
 
-def main(query=None, input_csv=None, run_uid=None, limit=None):
+def main(query=None, input_csv=None, run_uid=None, limit=None, classify_batch_size=None,
+         preclassify=True, preclassify_threshold=0.9, use_subprocess=False, max_workers=4, force=False,
+         stream=False, profile=False, deployment_name=None):
+    if deployment_name and not stream:
+        print("[✗] --deployment_name only applies with --stream; the flows take theirs from flow.dag.yaml.")
+        sys.exit(1)
+
     timestamp = datetime.now().strftime("%Y%m%dT%H%M%S")
     if not run_uid:
         run_uid = timestamp  # fallback if none passed
@@ -55,14 +67,50 @@ def main(query=None, input_csv=None, run_uid=None, limit=None):
     metadata_path = paths["metadata"] / "meta.json"
     paths["metadata"].mkdir(parents=True, exist_ok=True)
 
+    metadata = {
+        "run_uid": run_uid,
+        "query": query,
+        "input_csv": str(input_csv),
+        "timestamp": timestamp
+    }
     with open(metadata_path, "w") as f:
-        json.dump({
-            "run_uid": run_uid,
-            "query": query,
-            "input_csv": str(input_csv),
-            "timestamp": timestamp
-        }, f, indent=2)
-
+        json.dump(metadata, f, indent=2)
+    run_catalog.record("upsert_run", run_uid, metadata, paths["base"])
+
+    # Profiling is passed through the environment so subprocess stages and
+    # promptflow workers pick it up too; everything lands in logs/profile
+    if profile:
+        os.environ[PROFILE_ENV] = "1"
+    if os.environ.get(PROFILE_ENV):
+        os.environ.setdefault(PROFILE_DIR_ENV, str(Path(paths["logs"]).resolve() / "profile"))
+
+
+    # Streaming mode: each query flows through fetch → score → classify → scrape → final
+    if stream:
+        from jobserp_explorer.streaming import run_streaming
+        if not query:
+            print("[✗] No query provided.")
+            sys.exit(1)
+        run_streaming(paths, query, limit=limit, deployment_name=deployment_name or "gpt-4o-mini",
+                      preclassify=preclassify, preclassify_threshold=preclassify_threshold,
+                      classify_batch_size=classify_batch_size, force=force)
+        print(f"[🏁] Pipeline complete for: {run_uid}")
+        return
+
+    # In-process DAG (default); the subprocess chain below is kept as a fallback
+    if not use_subprocess:
+        if not query:
+            print("[✗] No query provided.")
+            sys.exit(1)
+        try:
+            run_pipeline(paths, query, limit=limit, classify_batch_size=classify_batch_size,
+                         preclassify=preclassify, preclassify_threshold=preclassify_threshold,
+                         max_workers=max_workers, force=force)
+        except Exception as e:
+            print(f"[✗] Pipeline failed: {e}")
+            sys.exit(1)
+        print(f"[🏁] Pipeline complete for: {run_uid}")
+        return
 
     # === STEP 00: Fetch from Remotive if query provided ===
     if query:
@@ -143,12 +191,10 @@ def main(query=None, input_csv=None, run_uid=None, limit=None):
         "--log_dir", str(log_jsonl_dir)
     ])
 
-    jsonl_candidates = sorted(jsonl_input_dir.glob("serp_class_input_*.jsonl"), key=os.path.getmtime, reverse=True)
-    
-    if not jsonl_candidates:
+    jsonl_path = latest_output(paths["metadata"], "export_jsonl", jsonl_input_dir, "serp_class_input_*.jsonl")
+    if jsonl_path is None:
         print("[✗] No JSONL file found in", jsonl_input_dir)
         sys.exit(1)
-    jsonl_path = jsonl_candidates[0]
 
     # === STEP 03: PromptFlow - Page Classification ===
 
@@ -160,12 +206,43 @@ def main(query=None, input_csv=None, run_uid=None, limit=None):
     jsonl_finalannot = 	paths["final_scored_jsonl"]
 
 
-    run_command([
-        sys.executable, "jobserp_explorer/core/09_run_promptflow.py",
-        "--input", str(jsonl_path),
-        "--flow_dir", "jobserp_explorer/flow_pagecateg",
-        "--output_dir", paths["page_classification_dir"]
-    ], desc="Step 2: Run SERP-based page classification")
+    # Rule-based pre-classifier: confident URL/snippet matches skip the LLM
+    classify_input = jsonl_path
+    if preclassify:
+        run_command([
+            sys.executable, "jobserp_explorer/core/04_preclassify_pages.py",
+            "--input", str(jsonl_path),
+            "--output_dir", str(paths["page_classification_dir"]),
+            "--residual_dir", str(paths["page_llm_input_dir"]),
+            "--meta_dir", str(paths["metadata"]),
+            "--threshold", str(preclassify_threshold)
+        ], desc="Step 2: Rule-based page pre-classification")
+
+        residual_path = paths["page_llm_input_dir"] / f"{jsonl_path.stem}_residual.jsonl"
+        classify_input = residual_path if residual_path.exists() else None
+
+    if classify_input is None:
+        print("[ℹ] All rows pre-classified by rules; skipping LLM page classification.")
+    elif classify_batch_size and classify_batch_size > 1:
+        # Batched mode: K SERP rows per LLM call, single-row fallback for missing ids
+        run_command([
+            sys.executable, "jobserp_explorer/core/08_classify_pages_batched.py",
+            "--input", str(classify_input),
+            "--output_dir", str(paths["page_classification_dir"]),
+            "--batch_size", str(classify_batch_size),
+            "--log_dir", str(paths["logs"]),
+            "--meta_dir", str(paths["metadata"])
+        ], desc="Step 2: Run batched SERP-based page classification")
+    else:
+        run_command([
+            sys.executable, "jobserp_explorer/core/09_run_promptflow.py",
+            "--input", str(classify_input),
+            "--flow_dir", "jobserp_explorer/flow_pagecateg",
+            "--output_dir", paths["page_classification_dir"],
+            "--log_dir", str(paths["logs"]),
+            "--meta_dir", str(paths["metadata"]),
+            "--run_uid", run_uid
+        ], desc="Step 2: Run SERP-based page classification")
 
 
     # # Step 4: Scrape selected pages with Selenium
@@ -190,19 +267,18 @@ def main(query=None, input_csv=None, run_uid=None, limit=None):
     run_command(scrape_args, desc="Step 4: Scrape top SERP pages with Spider")
 
     # Step 6: Run PromptFlow for final match scoring
-    # Select most recent JSONL
-    jsonl_files = sorted(paths["serp_jsonl_input_dir"].glob("*.jsonl"), key=os.path.getmtime, reverse=True)
-    if not jsonl_files:
-        print("[✗] No JSONL file found in", jsonl_input_dir)
-        sys.exit(1)
-    jsonl_input = str(jsonl_files[0])
+    # Same export the page classifier used (manifest pointer)
+    jsonl_input = str(jsonl_path)
     print(f"[✓] Found JSONL file: {jsonl_input}")
 
     run_command([
         sys.executable, "jobserp_explorer/core/09_run_promptflow.py",
         "--input", jsonl_input,
         "--flow_dir", "jobserp_explorer/flow_jobposting",
-        "--output_dir", str(jsonl_finalannot)
+        "--output_dir", str(jsonl_finalannot),
+        "--log_dir", str(paths["logs"]),
+        "--meta_dir", str(paths["metadata"]),
+        "--run_uid", run_uid
     ], desc="Step 6: Run final PromptFlow (match relevance)")
 
     print(f"[🏁] Pipeline complete for: {run_uid}")
@@ -218,6 +294,18 @@ if __name__ == "__main__":
     parser.add_argument("--input_csv", type=str, help="Optional CSV file path")
     parser.add_argument("--run_uid", type=str, required=True, help="Run UID (e.g., 20250710T140520)")
     parser.add_argument("--limit", type=int, required=False, help="Limit for step zero search.")
+    parser.add_argument("--classify_batch_size", type=int, help="Classify pages K rows per LLM call instead of the per-row flow.")
+    parser.add_argument("--no_preclassify", dest="preclassify", action="store_false", help="Send every row to the LLM page classifier.")
+    parser.add_argument("--preclassify_threshold", type=float, default=0.9, help="Minimum rule confidence to skip the LLM (default: 0.9)")
+    parser.add_argument("--subprocess", dest="use_subprocess", action="store_true", help="Run each stage as a separate script (legacy mode)")
+    parser.add_argument("--force", action="store_true", help="Re-run every stage even if its manifest fingerprint is unchanged")
+    parser.add_argument("--stream", action="store_true", help="Stream each query through all stages via bounded queues")
+    parser.add_argument("--deployment_name", help="LLM deployment for --stream (other modes use each flow.dag.yaml)")
+    parser.add_argument("--max_workers", type=int, default=4, help="Stages run concurrently in in-process mode (default: 4)")
+    add_profile_arg(parser, help="Profile every stage into logs/profile (same as JOBSERP_PROFILE=1)")
+    parser.add_argument("--record", action="store_true", help="Journal every Spider/OpenAI call into metadata/http_journal.sqlite")
+    parser.add_argument("--replay_from", type=str, help="Answer API calls from this run's HTTP journal (offline)")
+    parser.add_argument("--replay_latency", choices=LATENCY_MODES, default="recorded", help="Replay at the recorded latency or with none")
     args = parser.parse_args()
 
     run = RunManager(args.run_uid)
@@ -239,4 +327,9 @@ if __name__ == "__main__":
     print(f"[📥] Using input CSV: {input_csv}")
 
     # Launch main
-    main(query=query, input_csv=input_csv, run_uid=args.run_uid, limit = args.limit)
+    with journaled_run(args.run_uid, record=args.record, replay_from=args.replay_from, latency=args.replay_latency):
+        main(query=query, input_csv=input_csv, run_uid=args.run_uid, limit = args.limit,
+             classify_batch_size=args.classify_batch_size,
+             preclassify=args.preclassify, preclassify_threshold=args.preclassify_threshold,
+             use_subprocess=args.use_subprocess, max_workers=args.max_workers, force=args.force,
+             stream=args.stream, profile=args.profile, deployment_name=args.deployment_name)
@@ -0,0 +1,379 @@
+# jobserp_explorer/mock_apis.py
+"""
+Local stand-ins for the external APIs, for offline end-to-end and load tests.
+
+One HTTP server answers:
+
+- ``POST /search``, ``POST /scrape``      Spider (``SPIDER_API_BASE=http://host:port``)
+- ``POST /v1/chat/completions``           OpenAI, forced tool calls (``OPENAI_BASE_URL=http://host:port/v1``)
+- ``GET  /api/remote-jobs``               Remotive (``REMOTIVE_API_BASE=http://host:port``)
+- ``GET  /__stats``                       per-route request counts, statuses and latency percentiles
+
+Each service has its own latency distribution, error rate (HTTP 500) and
+rate-limit rate (HTTP 429 with ``retry-after``). Content is fake but
+deterministic: it is derived from a hash of the request, so the same
+request always gets the same answer. Tool-call arguments are generated from
+the JSON schema sent in ``tools`` (enums, numbers, arrays; batch ``items``
+get one entry per ``id:`` in the prompt), so the pipeline parses them like
+real answers.
+
+    python -m jobserp_explorer.mock_apis --port 8700 --openai_latency lognormal:1500:0.5 --openai_429_rate 0.05
+    jobserp-explorer mock --port 8700
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_PORT = 8700
+WORDS = ["data", "pipeline", "python", "remote", "platform", "analytics", "cloud", "team", "product", "scale",
+         "engineer", "growth", "model", "warehouse", "streaming", "api", "customer", "mission"]
+TITLES = ["Data Engineer", "Senior Data Engineer", "Machine Learning Engineer", "Analytics Engineer",
+          "Data Scientist", "Platform Engineer"]
+SERP_DOMAINS = ["boards.greenhouse.io", "jobs.lever.co", "www.linkedin.com", "www.glassdoor.com",
+                "{c}.com", "careers.{c}.com", "blog.{c}.io", "news.example.org"]
+# Prompt prefixes OpenAI caches once seen, in 128-token steps past 1024 tokens
+CACHE_MIN_TOKENS = 1024
+CACHE_STEP_TOKENS = 128
+
+
+# === Behaviour ===
+@dataclass
+class Latency:
+    """``fixed:MS``, ``uniform:LOW_MS:HIGH_MS`` or ``lognormal:MEDIAN_MS:SIGMA``."""
+    kind: str = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        kind, *values = str(spec).split(":")
+        if kind not in {"fixed", "uniform", "lognormal"} or not values:
+            raise ValueError(f"Bad latency spec {spec!r} (fixed:MS | uniform:LOW:HIGH | lognormal:MEDIAN:SIGMA)")
+        values = [float(v) for v in values] + [0.0]
+        return cls(kind, values[0], values[1])
+
+    def sample(self, rng: random.Random) -> float:
+        """Seconds."""
+        if self.kind == "uniform":
+            ms = rng.uniform(self.a, self.b)
+        elif self.kind == "lognormal":
+            ms = self.a * math.exp(rng.gauss(0, self.b))
+        else:
+            ms = self.a
+        return max(0.0, ms) / 1000
+
+    def __str__(self):
+        return f"{self.kind}:{self.a:g}" + (f":{self.b:g}" if self.kind != "fixed" else "")
+
+
+@dataclass
+class ServiceBehavior:
+    latency: Latency = field(default_factory=Latency)
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after_s: float = 1.0
+
+
+# === Fake content ===
+def _seed(*parts) -> int:
+    return int(hashlib.md5(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:12], 16)
+
+
+def _sentence(rng: random.Random, n: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def fake_jobs(search: str, limit: int) -> list:
+    rng = random.Random(_seed("remotive", search))
+    return [
+        {"id": i, "title": f"{rng.choice(TITLES)}", "company_name": f"Company{rng.randrange(10 ** 4)}",
+         "candidate_required_location": rng.choice(["Worldwide", "Europe", "USA", "Americas"]),
+         "url": f"https://remotive.com/remote-jobs/{i}"}
+        for i in range(limit)
+    ]
+
+
+def fake_search(query: str, limit: int) -> dict:
+    rng = random.Random(_seed("search", query))
+    company = re.sub(r"[^a-z0-9]", "", query.split()[-1].lower()) if query.split() else "acme"
+    results = []
+    for i in range(limit):
+        domain = rng.choice(SERP_DOMAINS).format(c=company or "acme")
+        results.append({
+            "url": f"https://{domain}/jobs/{rng.randrange(10 ** 8)}",
+            "title": f"{query} — {rng.choice(['Apply now', 'Careers', 'Jobs', 'Hiring'])}",
+            "description": _sentence(rng, 20),
+        })
+    return {"content": results}
+
+
+def fake_page(url: str) -> list:
+    rng = random.Random(_seed("scrape", url))
+    sections = [f"## {rng.choice(['About the role', 'Requirements', 'Benefits', 'About us'])}\n"
+                + " ".join(_sentence(rng) for _ in range(rng.randint(3, 8))) for _ in range(rng.randint(3, 6))]
+    return [{"url": url, "status": 200, "content": f"# {rng.choice(TITLES)}\n\n" + "\n\n".join(sections)}]
+
+
+def fake_value(name: str, schema: dict, rng: random.Random, context: dict):
+    """A value valid for ``schema``; ``context`` holds the ids and URLs found in the prompt."""
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    kind = schema.get("type", "string")
+    if kind == "object":
+        return {key: fake_value(key, sub, rng, context) for key, sub in (schema.get("properties") or {}).items()}
+    if kind == "array":
+        items = schema.get("items") or {"type": "string"}
+        ids = context["ids"] if "id" in (items.get("properties") or {}) else []
+        if ids:
+            urls = context["urls"] if len(context["urls"]) == len(ids) else [None] * len(ids)
+            return [{**fake_value(name, items, rng, {**context, "ids": [], "urls": [url] if url else []}), "id": i}
+                    for i, url in zip(ids, urls)]
+        return [fake_value(name, items, rng, context) for _ in range(rng.randint(1, 3))]
+    if kind == "number":
+        return round(rng.random(), 2)
+    if kind == "integer":
+        return rng.randint(0, 10)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    if name.endswith("url") and context["urls"]:
+        return context["urls"][0]
+    return _sentence(rng, 6)
+
+
+def fake_completion(request: dict, cached_prefixes: set, lock: threading.Lock) -> dict:
+    messages = request.get("messages") or []
+    text = "\n".join(str(m.get("content") or "") for m in messages)
+    rng = random.Random(_seed("chat", request.get("model"), text))
+    tool = ((request.get("tools") or [{}])[0]).get("function") or {"name": "parsed_message", "parameters": {}}
+    context = {"ids": re.findall(r"^id: (\S+)$", text, re.MULTILINE),
+               "urls": re.findall(r"SERP URL: (\S+)", text)}
+    arguments = json.dumps(fake_value(tool["name"], tool.get("parameters") or {"type": "object"}, rng, context))
+
+    prompt_tokens = max(1, len(text) // 4)
+    prefix = json.dumps([tool, messages[0] if messages else None], sort_keys=True)
+    prefix_tokens = len(prefix) // 4
+    with lock:
+        seen = prefix in cached_prefixes
+        cached_prefixes.add(prefix)
+    cached = 0
+    if seen and prefix_tokens >= CACHE_MIN_TOKENS:
+        cached = min(prompt_tokens, prefix_tokens) // CACHE_STEP_TOKENS * CACHE_STEP_TOKENS
+    completion_tokens = max(1, len(arguments) // 4)
+
+    return {
+        "id": f"chatcmpl-mock{rng.randrange(16 ** 12):012x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "mock"),
+        "choices": [{
+            "index": 0,
+            "finish_reason": "tool_calls",
+            "message": {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{"id": f"call_{rng.randrange(16 ** 12):012x}", "type": "function",
+                                "function": {"name": tool["name"], "arguments": arguments}}],
+            },
+        }],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens,
+                  "prompt_tokens_details": {"cached_tokens": cached}},
+    }
+
+
+# === Server ===
+def _percentile(values: list, q: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(math.ceil(q * len(values))) - 1)], 4)
+
+
+class MockApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, spider: ServiceBehavior = None, openai: ServiceBehavior = None, seed: int = 0):
+        super().__init__(address, _Handler)
+        self.behaviors = {"spider": spider or ServiceBehavior(), "openai": openai or ServiceBehavior(),
+                          "remotive": ServiceBehavior()}
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.cached_prefixes = set()
+        self.stats_lock = threading.Lock()
+        self.requests = []  # (route, status, seconds)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> dict:
+        """Environment that points the stage clients at this server."""
+        return {"SPIDER_API_BASE": self.url, "OPENAI_BASE_URL": f"{self.url}/v1", "REMOTIVE_API_BASE": self.url,
+                "SPIDER_API_KEY": "mock", "OPENAI_API_KEY": "sk-mock"}
+
+    def draw(self, service: str):
+        """``(delay_s, status)`` for one request to ``service``."""
+        behavior = self.behaviors[service]
+        with self.rng_lock:
+            delay = behavior.latency.sample(self.rng)
+            roll = self.rng.random()
+        if roll < behavior.rate_limit_rate:
+            return delay, 429
+        if roll < behavior.rate_limit_rate + behavior.error_rate:
+            return delay, 500
+        return delay, 200
+
+    def record(self, route: str, status: int, seconds: float):
+        with self.stats_lock:
+            self.requests.append((route, status, seconds))
+
+    def stats(self) -> dict:
+        with self.stats_lock:
+            requests = list(self.requests)
+        routes = {}
+        for route in sorted({r for r, _, _ in requests}):
+            latencies = [s for r, _, s in requests if r == route]
+            statuses = {}
+            for r, status, _ in requests:
+                if r == route:
+                    statuses[str(status)] = statuses.get(str(status), 0) + 1
+            routes[route] = {
+                "requests": len(latencies),
+                "statuses": statuses,
+                "p50_s": _percentile(latencies, 0.50),
+                "p95_s": _percentile(latencies, 0.95),
+                "p99_s": _percentile(latencies, 0.99),
+                "max_s": round(max(latencies), 4),
+            }
+        return routes
+
+    def start(self) -> "MockApiServer":
+        threading.Thread(target=self.serve_forever, name="mock-apis", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    ROUTES = {
+        ("POST", "/search"): ("spider", "spider_search"),
+        ("POST", "/scrape"): ("spider", "spider_scrape"),
+        ("POST", "/v1/chat/completions"): ("openai", "openai_chat"),
+        ("POST", "/chat/completions"): ("openai", "openai_chat"),
+        ("GET", "/api/remote-jobs"): ("remotive", "remotive_jobs"),
+    }
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body, headers: dict = None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self, method: str):
+        started = time.perf_counter()
+        parsed = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+        if method == "GET" and parsed.path == "/__stats":
+            return self._send(200, self.server.stats())
+        if (method, parsed.path) not in self.ROUTES:
+            return self._send(404, {"error": {"message": f"No mock for {method} {parsed.path}"}})
+
+        service, route = self.ROUTES[(method, parsed.path)]
+        delay, status = self.server.draw(service)
+        time.sleep(delay)
+
+        behavior = self.server.behaviors[service]
+        if status == 429:
+            self._send(429, {"error": {"message": "Rate limit reached (mock)", "type": "requests",
+                                       "code": "rate_limit_exceeded"}},
+                       {"retry-after": f"{behavior.retry_after_s:g}",
+                        "retry-after-ms": str(int(behavior.retry_after_s * 1000))})
+        elif status == 500:
+            self._send(500, {"error": {"message": "Internal error (mock)", "type": "server_error"}})
+        elif route == "spider_search":
+            self._send(200, fake_search(str(body.get("search", "")), int(body.get("search_limit") or 8)))
+        elif route == "spider_scrape":
+            self._send(200, fake_page(str(body.get("url", ""))))
+        elif route == "openai_chat":
+            self._send(200, fake_completion(body, self.server.cached_prefixes, self.server.rng_lock),
+                       {"x-ratelimit-remaining-requests": "10000", "x-ratelimit-remaining-tokens": "10000000"})
+        else:
+            query = parse_qs(parsed.query)
+            limit = int((query.get("limit") or ["50"])[0])
+            self._send(200, {"jobs": fake_jobs((query.get("search") or [""])[0], limit)})
+        self.server.record(route, status, time.perf_counter() - started)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+# === CLI ===
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latencies and injected errors")
+    for service, latency in (("spider", "lognormal:400:0.5"), ("openai", "lognormal:1200:0.6")):
+        parser.add_argument(f"--{service}_latency", default=latency,
+                            help=f"fixed:MS | uniform:LOW:HIGH | lognormal:MEDIAN:SIGMA (default: {latency})")
+        parser.add_argument(f"--{service}_error_rate", type=float, default=0.0, help="Share of HTTP 500 answers")
+        parser.add_argument(f"--{service}_429_rate", type=float, default=0.0, help="Share of HTTP 429 answers")
+    parser.add_argument("--retry_after", type=float, default=1.0, help="retry-after seconds sent with 429s")
+
+
+def server_from_args(args) -> MockApiServer:
+    def behavior(service):
+        return ServiceBehavior(latency=Latency.parse(getattr(args, f"{service}_latency")),
+                               error_rate=getattr(args, f"{service}_error_rate"),
+                               rate_limit_rate=getattr(args, f"{service}_429_rate"),
+                               retry_after_s=args.retry_after)
+    return MockApiServer((args.host, args.port), spider=behavior("spider"), openai=behavior("openai"), seed=args.seed)
+
+
+def serve(args):
+    server = server_from_args(args)
+    print(f"[✓] Mock Spider / OpenAI / Remotive APIs on {server.url}")
+    for name, value in server.env().items():
+        print(f"export {name}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.stats(), indent=2))
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local mock Spider / OpenAI / Remotive APIs.")
+    add_arguments(parser)
+    serve(parser.parse_args())
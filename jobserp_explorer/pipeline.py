@@ -0,0 +1,357 @@
+# jobserp_explorer/pipeline.py
+"""
+In-process runner for the full pipeline.
+
+Each ``core/0X_*.py`` stage is wrapped as a typed function (paths in, paths
+out) and the stages are wired into a small DAG that runs in one interpreter:
+imports, pandas and the LLM cache / rate limiter are shared, and stages
+whose inputs are ready run concurrently (page classification and page
+scraping both only need the scored SERPs). ``10_run_full_pipeline.py
+--subprocess`` keeps the old one-process-per-stage chain as a fallback.
+
+Every stage records a manifest (see ``utils/manifest.py``); on a re-run only
+stages whose inputs, parameters, templates/schemas or code changed execute.
+Stage status and outputs are also recorded in the run catalog
+(``utils/run_catalog.py``) and their records ingested into the warehouse
+(``utils/warehouse.py``).
+"""
+import importlib
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from jobserp_explorer.utils.manifest import fingerprint, is_fresh, load_manifest, manifest_outputs, write_manifest
+from jobserp_explorer.utils.perf import measure
+from jobserp_explorer.utils.profiling import profiled
+from jobserp_explorer.utils import run_catalog, warehouse
+from jobserp_explorer.utils.tables import list_tables
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+CORE_DIR = PACKAGE_DIR / "core"
+FLOW_PAGECATEG_DIR = Path("jobserp_explorer/flow_pagecateg")
+FLOW_JOBPOSTING_DIR = Path("jobserp_explorer/flow_jobposting")
+
+
+def core_module(name: str):
+    """Import a numbered stage script, e.g. ``core_module("02_label_and_score")``."""
+    return importlib.import_module(f"jobserp_explorer.core.{name}")
+
+
+# === Stage functions ===
+def fetch_jobs(query: str, output_csv: Path, limit: Optional[int] = None) -> Path:
+    """00: Remotive jobs matching ``query`` → job CSV."""
+    stage = core_module("00_fetch_remotive_jobs")
+    return stage.save_remotive_jobs(query, output_csv, limit if limit is not None else 50)
+
+
+def fetch_serps(input_csv: Path, paths: dict, limit: Optional[int] = None) -> Path:
+    """01: Spider SERP search per job → expanded SERP CSV."""
+    stage = core_module("01_serp_scraper")
+    return stage.run_serp_scraper(
+        input_csv, paths["scraped_jsonl"], paths["scraped_jsonl"], paths["logs"], paths["metadata"],
+        paths["base"] / "done_tracker.csv", limit=limit,
+    )
+
+
+def label_and_score(paths: dict, force: bool = False) -> List[Path]:
+    """02: label domains, score and keep the top candidates → ``*_results`` tables (CSV or Parquet)."""
+    stage = core_module("02_label_and_score")
+    return stage.main(str(paths["scraped_jsonl"]), str(paths["scored_csv"]), str(paths["logs"]),
+                      str(paths["metadata"]), debug=True, force=force)
+
+
+def export_jsonl(paths: dict) -> Path:
+    """03: scored tables → serp_class_input JSONL."""
+    stage = core_module("03_export_results_to_jsonl")
+    return stage.export_jsonl(paths["scored_csv"], paths["serp_jsonl_input_dir"], paths["metadata"], paths["logs"])
+
+
+def preclassify_pages(jsonl_path: Path, paths: dict, threshold: float) -> tuple:
+    """
+    04: rule-based page classification. Returns ``(rules_path, residual_path)``:
+    the rule classifications and the residual JSONL for the LLM (None if empty).
+    """
+    stage = core_module("04_preclassify_pages")
+    return stage.preclassify_jsonl(
+        jsonl_path, paths["page_classification_dir"], paths["page_llm_input_dir"], paths["metadata"], threshold
+    )
+
+
+def residual_input(preclassified) -> Optional[Path]:
+    """LLM input from the ``preclassify_pages`` output (manifests from before it was a pair hold only that path)."""
+    return preclassified[1] if isinstance(preclassified, tuple) else preclassified
+
+
+def classify_pages(input_path: Optional[Path], paths: dict, batch_size: Optional[int] = None) -> Optional[Path]:
+    """08/09: LLM page classification (batched when ``batch_size > 1``)."""
+    if input_path is None:
+        print("[ℹ] All rows pre-classified by rules; skipping LLM page classification.")
+        return None
+    if batch_size and batch_size > 1:
+        stage = core_module("08_classify_pages_batched")
+        return stage.classify_pages_batched(input_path, paths["page_classification_dir"], batch_size=batch_size,
+                                            log_dir=paths["logs"], meta_dir=paths["metadata"])
+    stage = core_module("09_run_promptflow")
+    return stage.run_promptflow_flow(input_path, FLOW_PAGECATEG_DIR, paths["page_classification_dir"],
+                                     log_dir=paths["logs"], meta_dir=paths["metadata"],
+                                     run_uid=run_catalog.run_uid_from_dir(paths["base"]))
+
+
+def scrape_pages(paths: dict) -> List[Path]:
+    """05: Spider scrape of the top SERP pages → scraped JSONL files."""
+    stage = core_module("05_export_jsonl_with_scraping")
+    return stage.scrape_results_dir(paths["scored_csv"], paths["html_scraped_dir"], return_format="markdown",
+                                    readability=True, clean_html=True, filter_output_main_only=True)
+
+
+def score_matches(jsonl_path: Path, paths: dict) -> Path:
+    """09: final match-relevance scoring with flow_jobposting."""
+    stage = core_module("09_run_promptflow")
+    return stage.run_promptflow_flow(jsonl_path, FLOW_JOBPOSTING_DIR, paths["final_scored_jsonl"],
+                                     log_dir=paths["logs"], meta_dir=paths["metadata"],
+                                     run_uid=run_catalog.run_uid_from_dir(paths["base"]))
+
+
+# === DAG ===
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[Dict[str, object]], object]  # receives the outputs of finished stages
+    deps: List[str] = field(default_factory=list)
+
+
+def run_dag(stages: List[Stage], max_workers: int = 4, submit: Optional[Callable] = None,
+            on_event: Optional[Callable[[str, str], None]] = None, label: str = "") -> Dict[str, object]:
+    """
+    Run ``stages`` as soon as their dependencies finish, up to ``max_workers``
+    at a time. Returns ``{stage name: output}``; the first failure stops
+    scheduling, waits for running stages and is re-raised.
+
+    ``submit(fn, *args) -> Future`` runs stages on an external pool instead
+    (``max_workers`` is then ignored); ``on_event(stage, status)`` is called
+    with "started", "done" or "failed". ``label`` prefixes the progress lines.
+    """
+    by_name = {s.name: s for s in stages}
+    for s in stages:
+        unknown = [d for d in s.deps if d not in by_name]
+        if unknown:
+            raise ValueError(f"Stage `{s.name}` depends on unknown stages: {unknown}")
+
+    def notify(name, status):
+        if on_event is not None:
+            on_event(name, status)
+
+    results: Dict[str, object] = {}
+    pending = dict(by_name)
+    running = {}
+    failure = None
+
+    with ExitStack() as stack:
+        if submit is None:
+            submit = stack.enter_context(ThreadPoolExecutor(max_workers=max_workers)).submit
+        while pending or running:
+            if failure is None:
+                for name, s in list(pending.items()):
+                    if all(d in results for d in s.deps):
+                        print(f"\n[↪] {label}{name}")
+                        notify(name, "started")
+                        running[submit(_timed, s, dict(results))] = name
+                        del pending[name]
+            if not running:
+                if pending and failure is None:
+                    raise RuntimeError(f"Unsatisfiable stage dependencies: {sorted(pending)}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name], elapsed = future.result()
+                    print(f"[✓] {label}{name} ({elapsed:.1f}s)")
+                    notify(name, "done")
+                except (Exception, SystemExit) as e:  # stage scripts sys.exit on missing deps
+                    print(f"[✗] {label}{name}: {e}")
+                    logging.exception(f"[PIPELINE] Stage `{name}` failed")
+                    notify(name, "failed")
+                    failure = failure or e
+
+    if failure is not None:
+        raise failure
+    return results
+
+
+def _timed(stage: Stage, results: dict):
+    started = time.perf_counter()
+    output = stage.run(results)
+    return output, time.perf_counter() - started
+
+
+# === Incremental execution ===
+def _code(*names) -> list:
+    return [CORE_DIR / f"{name}.py" for name in names]
+
+
+def _flow_files(flow_dir: Path) -> list:
+    flow_dir = Path(flow_dir)
+    return sorted(flow_dir.glob("*.jinja2")) + sorted(flow_dir.glob("*.json")) + [
+        flow_dir / "flow.dag.yaml", flow_dir / "llm_wrapper.py",
+    ]
+
+
+def incremental(paths: dict, stage: str, run: Callable[[], object], inputs=(), params: dict = None,
+                files=(), force: bool = False):
+    """
+    Run ``run()`` unless the stage manifest shows the same fingerprint and its
+    outputs still exist, in which case the recorded outputs are returned.
+    Either way the stage's resource use is recorded in ``metadata/perf.json``;
+    with ``JOBSERP_PROFILE=1`` executed stages are also profiled into
+    ``logs/profile``.
+    """
+    run_uid = run_catalog.run_uid_from_dir(paths["base"])
+    with measure(stage, paths["metadata"]) as perf:
+        inputs = [p for p in inputs if p]
+        manifest = load_manifest(paths["metadata"], stage)
+        if not force and is_fresh(manifest, fingerprint(inputs, params, files)):
+            print(f"[↷] {stage}: inputs unchanged, reusing {len(manifest['outputs'])} output(s)")
+            perf["reused"] = True
+            run_catalog.record("step_finished", run_uid, stage, "reused", manifest["outputs"])
+            warehouse.record("ingest_outputs", run_uid, stage, manifest["outputs"])
+            return manifest_outputs(manifest)
+
+        run_catalog.record("step_started", run_uid, stage)
+        try:
+            with profiled(stage, paths["logs"]):
+                outputs = run()
+        except BaseException:
+            run_catalog.record("step_finished", run_uid, stage, "failed")
+            raise
+    manifest = write_manifest(paths["metadata"], stage, outputs, inputs=inputs, params=params, files=files)
+    run_catalog.record("step_finished", run_uid, stage, "done", manifest["outputs"])
+    warehouse.record("ingest_outputs", run_uid, stage, manifest["outputs"])
+    return outputs
+
+
+def stage_spec(stage: str, paths: dict, upstream: dict = None, query: str = None, limit: Optional[int] = None,
+               classify_batch_size: Optional[int] = None, preclassify: bool = True,
+               preclassify_threshold: float = 0.9) -> dict:
+    """
+    ``inputs`` / ``params`` / ``files`` recorded in ``stage``'s manifest, given
+    the outputs of the stages it depends on (``upstream``). Shared by the DAG,
+    the 03 CLI and streaming mode, so each reuses the others' outputs.
+    """
+    upstream = upstream or {}
+    specs = {
+        "fetch_jobs": lambda: {"params": {"query": query, "limit": limit}, "files": _code("00_fetch_remotive_jobs")},
+        "fetch_serps": lambda: {"inputs": [upstream["fetch_jobs"]], "files": _code("01_serp_scraper")},
+        "label_and_score": lambda: {"inputs": list_tables(paths["scraped_jsonl"], "serp_expanded_*"),
+                                    "files": _code("02_label_and_score")},
+        "export_jsonl": lambda: {"inputs": list_tables(paths["scored_csv"], "*_results"),
+                                 "files": _code("03_export_results_to_jsonl")},
+        "preclassify_pages": lambda: {"inputs": [upstream["export_jsonl"]],
+                                      "params": {"enabled": preclassify, "threshold": preclassify_threshold},
+                                      "files": _code("04_preclassify_pages")
+                                      + [PACKAGE_DIR / "utils" / "page_rules.py"]},
+        "classify_pages": lambda: {"inputs": [residual_input(upstream["preclassify_pages"])],
+                                   "params": {"batch_size": classify_batch_size},
+                                   "files": _flow_files(PACKAGE_DIR / "flow_pagecateg")
+                                   + _code("08_classify_pages_batched", "09_run_promptflow")},
+        "scrape_pages": lambda: {"inputs": upstream["label_and_score"],
+                                 "params": {"format": "markdown", "readability": True, "main_only": True},
+                                 "files": _code("05_export_jsonl_with_scraping")},
+        "score_matches": lambda: {"inputs": [upstream["export_jsonl"]],
+                                  "params": {k: os.environ.get(k) for k in ("JOBSERP_CASCADE_TIERS",
+                                                                            "JOBSERP_CASCADE_BAND")},
+                                  "files": _flow_files(PACKAGE_DIR / "flow_jobposting") + _code("09_run_promptflow")},
+    }
+    return specs[stage]()
+
+
+def write_stage_manifest(paths: dict, stage: str, outputs, upstream: dict = None, **options) -> dict:
+    """Record ``stage`` as finished outside the DAG (03 CLI, streaming mode) with the manifest the DAG would write."""
+    spec = stage_spec(stage, paths, upstream, **options)
+    spec["inputs"] = [p for p in spec.get("inputs", ()) if p]
+    return write_manifest(paths["metadata"], stage, outputs, **spec)
+
+
+def build_stages(paths: dict, query: str, limit: Optional[int] = None, classify_batch_size: Optional[int] = None,
+                 preclassify: bool = True, preclassify_threshold: float = 0.9, force: bool = False) -> List[Stage]:
+    """The full pipeline DAG for one run directory, each stage skipped when its fingerprint is unchanged."""
+    options = {"query": query, "limit": limit, "classify_batch_size": classify_batch_size,
+               "preclassify": preclassify, "preclassify_threshold": preclassify_threshold}
+
+    def step(stage, run, r):
+        return incremental(paths, stage, run, force=force, **stage_spec(stage, paths, r, **options))
+
+    return [
+        Stage("fetch_jobs", lambda r: step(
+            "fetch_jobs", lambda: fetch_jobs(query, paths["query_csv"], limit), r)),
+        Stage("fetch_serps", lambda r: step(
+            "fetch_serps", lambda: fetch_serps(r["fetch_jobs"], paths), r), ["fetch_jobs"]),
+        Stage("label_and_score", lambda r: step(
+            "label_and_score", lambda: label_and_score(paths, force=True), r), ["fetch_serps"]),
+        Stage("export_jsonl", lambda r: step(
+            "export_jsonl", lambda: export_jsonl(paths), r), ["label_and_score"]),
+        Stage("preclassify_pages", lambda r: step(
+            "preclassify_pages",
+            lambda: (preclassify_pages(r["export_jsonl"], paths, preclassify_threshold)
+                     if preclassify else (None, r["export_jsonl"])), r), ["export_jsonl"]),
+        Stage("classify_pages", lambda r: step(
+            "classify_pages", lambda: classify_pages(residual_input(r["preclassify_pages"]), paths,
+                                                     classify_batch_size), r), ["preclassify_pages"]),
+        Stage("scrape_pages", lambda r: step(
+            "scrape_pages", lambda: scrape_pages(paths), r), ["label_and_score"]),
+        Stage("score_matches", lambda r: step(
+            "score_matches", lambda: score_matches(r["export_jsonl"], paths), r), ["export_jsonl", "scrape_pages"]),
+    ]
+
+
+def run_stage(paths: dict, name: str, query: str = None, force: bool = False, **options):
+    """
+    Run one DAG stage on its own, taking the dependency outputs from their
+    manifests (used by the ``jobserp-explorer`` stage subcommands).
+    ``options`` are passed to ``build_stages``.
+    """
+    for key in ("base", "logs", "metadata"):
+        Path(paths[key]).mkdir(parents=True, exist_ok=True)
+    stages = {s.name: s for s in build_stages(paths, query, force=force, **options)}
+    if name not in stages:
+        raise ValueError(f"Unknown stage `{name}`; expected one of {sorted(stages)}")
+
+    results = {}
+    for dep in stages[name].deps:
+        manifest = load_manifest(paths["metadata"], dep)
+        if manifest is None:
+            raise RuntimeError(f"Stage `{dep}` has not run for {paths['base']}; run it before `{name}`")
+        results[dep] = manifest_outputs(manifest)
+    output, elapsed = _timed(stages[name], results)
+    print(f"[✓] {name} ({elapsed:.1f}s)")
+    return output
+
+
+def run_pipeline(paths: dict, query: str, limit: Optional[int] = None, classify_batch_size: Optional[int] = None,
+                 preclassify: bool = True, preclassify_threshold: float = 0.9, max_workers: int = 4,
+                 force: bool = False, submit: Optional[Callable] = None,
+                 on_event: Optional[Callable[[str, str], None]] = None, label: str = "") -> dict:
+    """
+    Run the stages for ``paths`` (see ``make_run_dir``) in this process.
+    Stages whose manifest fingerprint is unchanged are skipped unless ``force``.
+    ``submit`` / ``on_event`` / ``label`` are passed to ``run_dag`` (used by ``batch.py``).
+    """
+    for key in ("base", "logs", "metadata"):
+        Path(paths[key]).mkdir(parents=True, exist_ok=True)
+
+    # One log file for all stages; the per-stage basicConfig calls become no-ops
+    logging.basicConfig(
+        filename=Path(paths["logs"]) / "pipeline.log",
+        level=logging.INFO,
+        format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s'
+    )
+
+    stages = build_stages(paths, query, limit=limit, classify_batch_size=classify_batch_size,
+                          preclassify=preclassify, preclassify_threshold=preclassify_threshold, force=force)
+    return run_dag(stages, max_workers=max_workers, submit=submit, on_event=on_event, label=label)
@@ -5,6 +5,8 @@ import sys
 
 sys.path.append('./')
 
+from jobserp_explorer.utils import run_catalog
+
 
 def make_run_dir(run_uid: str) -> dict:
     base = Path(f"data/01_fetch_serps/run_{run_uid}")
@@ -16,6 +18,7 @@ def make_run_dir(run_uid: str) -> dict:
         "scored_csv": base / "03_scored",
         "serp_jsonl_input_dir": base / "04_serp_jsonl_input",
         "page_classification_dir": base / "05_page_classification/00_jsonl_annotated",
+        "page_llm_input_dir": base / "05_page_classification/01_llm_input",
         "html_scraped_dir": base / "06_scraped_html",
         "final_scored_jsonl": base / "07_final_scored",
         "logs": base / "logs",
@@ -41,17 +44,61 @@ class RunManager:
         log_path = self.paths["logs"] / f"{step}.log"
         if log_path.exists():
             return log_path.read_text()
+        archive = self.archive()
+        if archive is not None and archive.member(log_path):
+            return archive.read_text(archive.member(log_path))
         return "No log available."
 
+    def archive(self):
+        """The run's ``RunArchive`` once it has been packed (``runs pack``), else None."""
+        from jobserp_explorer.utils.retention import RunArchive
+        return RunArchive.open(self.run_dir)
+
+    def artifact(self, step: str):
+        """
+        Latest output of ``step``, either a pipeline stage (``"score_matches"``) or
+        a path key (``"final_scored_jsonl"``), as a lazy ``Artifact``. It comes
+        from the run catalog or the stage manifest; older runs fall back to
+        the newest file in the step directory. Packed runs extract it from
+        their archive.
+        """
+        from jobserp_explorer.utils.artifacts import Artifact, latest_file
+        from jobserp_explorer.utils.manifest import latest_output
+        from jobserp_explorer.utils.tables import list_tables
+
+        stage_keys = run_catalog.STAGE_DIRS
+        stage = step if step in stage_keys else next((s for s, k in stage_keys.items() if k == step), None)
+        key = stage_keys.get(stage, step)
+
+        path = wanted = None
+        pattern = run_catalog.STAGE_PATTERNS.get(stage, "*.jsonl")
+        if stage:
+            path = wanted = self.latest_artifact(stage) or latest_output(self.metadata_dir, stage)
+        if (path is None or not Path(path).exists()) and key in self.paths:
+            if pattern.endswith(".csv"):
+                tables = list_tables(self.paths[key], pattern[:-len(".csv")])
+                path = max(tables, key=lambda p: p.stat().st_mtime) if tables else None
+            else:
+                path = latest_file(self.paths[key], (pattern,))
+        if (path is None or not Path(path).exists()) and key in self.paths:
+            archive = self.archive()
+            patterns = (pattern, pattern[:-len(".csv")] + ".parquet") if pattern.endswith(".csv") else (pattern,)
+            name = archive and ((wanted and archive.member(wanted)) or archive.latest(self.paths[key], patterns))
+            path = archive.extract(name) if name else None
+        return Artifact(path, stage) if path and Path(path).is_file() else None
+
     def get_output(self, step: str):
-        path = self.paths.get(step)
-        if path and path.exists():
-            if path.suffix == ".jsonl":
-                return [json.loads(line) for line in path.open()]
-            elif path.suffix == ".csv":
-                import pandas as pd
-                return pd.read_csv(path)
-        return None
+        """
+        Whole output of ``step``: a list of records for JSONL, a DataFrame for
+        CSV / Parquet. Prefer ``artifact(step)`` with ``page`` / ``records`` for large outputs.
+        """
+        artifact = self.artifact(step)
+        if artifact is None:
+            return None
+        if artifact.kind == "jsonl":
+            return list(artifact.records())
+        from jobserp_explorer.utils.tables import read_table
+        return read_table(artifact.path)
 
     def query_metadata(self) -> dict:
         if self.metadata_file.exists():
@@ -75,10 +122,25 @@ class RunManager:
 
         with self.metadata_file.open("w") as f:
             json.dump(current, f, indent=2)
+        run_catalog.record("upsert_run", self.run_uid, current, self.run_dir)
 
+    def steps(self) -> dict:
+        """Catalog status per pipeline stage: ``{stage: {status, n_rows, started_at, finished_at}}``."""
+        return run_catalog.record("steps", self.run_uid) or {}
 
+    def latest_artifact(self, stage: str):
+        """Newest output file the catalog holds for ``stage`` (e.g. ``"score_matches"``), or None."""
+        return run_catalog.record("latest_artifact", self.run_uid, stage)
+
+    @staticmethod
+    def list_runs(limit: int = None):
+        runs = run_catalog.record("list_runs", limit)
+        if runs is None:  # catalog unavailable
+            all_runs = sorted(RunManager.BASE_DIR.glob("run_*"), reverse=True)[:limit]
+            runs = [r.name.replace("run_", "") for r in all_runs]
+        return runs
 
     @staticmethod
-    def list_runs():
-        all_runs = sorted(RunManager.BASE_DIR.glob("run_*"), reverse=True)
-        return [r.name.replace("run_", "") for r in all_runs]
+    def rebuild_catalog() -> int:
+        """Re-register every run directory in the catalog; returns the number of runs."""
+        return run_catalog.get_catalog().rebuild(RunManager.BASE_DIR)
@@ -0,0 +1,404 @@
+# jobserp_explorer/streaming.py
+"""
+Streaming execution mode for the full pipeline.
+
+Instead of finishing each stage over the whole run before starting the
+next, every job query flows through bounded queues:
+
+    SERP fetch → label/score → page classification → scrape → final scoring
+
+with a small worker pool per stage. The first queries reach
+``07_final_scored`` while later ones are still being fetched, and the wall
+time approaches that of the slowest stage rather than the sum of all
+stages. Bounded queues apply back-pressure so a fast stage cannot run
+arbitrarily far ahead of a slow one.
+
+Output files keep the batch layout and formats of the run directory; the
+JSONL outputs are appended and flushed record by record. Each stage's
+manifest is written as the DAG would write it, so a later non-streaming run
+reuses the outputs.
+"""
+import contextvars
+import json
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from jobserp_explorer.pipeline import core_module, fetch_jobs, residual_input, write_stage_manifest
+from jobserp_explorer.utils.perf import measure, record_usage
+from jobserp_explorer.utils.profiling import profiled
+from jobserp_explorer.utils import run_catalog, warehouse
+from jobserp_explorer.utils.tables import write_table
+
+STOP = object()
+
+DEFAULT_WORKERS = {"fetch": 4, "score": 2, "classify": 2, "scrape": 8, "final": 4}
+DEFAULT_QUEUE_SIZE = 32
+
+FLOW_DIR = Path(__file__).resolve().parent / "flow_jobposting"
+JOBPOSTING_TEMPLATE = FLOW_DIR / "session_summarizer3.jinja2"
+JOBPOSTING_SCHEMA = FLOW_DIR / "session_schema3.json"
+
+
+# === Generic bounded-queue runner ===
+@dataclass
+class StreamStage:
+    name: str
+    fn: Callable[[object], Iterable]  # one input item → downstream items
+    workers: int = 1
+
+
+def run_stream(items: Iterable, stages: List[StreamStage], maxsize: int = DEFAULT_QUEUE_SIZE) -> Dict[str, dict]:
+    """
+    Push ``items`` through ``stages`` with ``stage.workers`` threads each.
+
+    A failing item is logged and counted, not fatal. Returns per-stage stats:
+    items in/out, errors, busy seconds and the time of the first output.
+    """
+    queues = [queue.Queue(maxsize=maxsize) for _ in stages]
+    stats = {s.name: {"n_in": 0, "n_out": 0, "n_errors": 0, "busy_s": 0.0, "first_output_s": None} for s in stages}
+    remaining = [s.workers for s in stages]
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def worker(i: int):
+        stage = stages[i]
+        inbox = queues[i]
+        outbox = queues[i + 1] if i + 1 < len(stages) else None
+        stage_stats = stats[stage.name]
+
+        item = None
+        try:
+            while True:
+                item = inbox.get()
+                if item is STOP:
+                    break
+                t0 = time.perf_counter()
+                try:
+                    outputs = list(stage.fn(item) or [])
+                except Exception:
+                    logging.exception(f"[STREAM] {stage.name} failed on one item")
+                    outputs = None
+                elapsed = time.perf_counter() - t0
+
+                with lock:
+                    stage_stats["n_in"] += 1
+                    stage_stats["busy_s"] += elapsed
+                    if outputs is None:
+                        stage_stats["n_errors"] += 1
+                    else:
+                        stage_stats["n_out"] += len(outputs)
+                        if outputs and stage_stats["first_output_s"] is None:
+                            stage_stats["first_output_s"] = round(time.perf_counter() - started, 3)
+
+                if outbox is not None:
+                    for output in outputs or []:
+                        outbox.put(output)
+        finally:
+            # Also on a BaseException: drain the inbox so upstream put()s never block,
+            # and let the last worker of the stage pass STOP downstream
+            if item is not STOP:
+                while inbox.get() is not STOP:
+                    pass
+            with lock:
+                remaining[i] -= 1
+                last = remaining[i] == 0
+            if last and outbox is not None:
+                for _ in range(stages[i + 1].workers):
+                    outbox.put(STOP)
+
+    # Workers inherit the caller's context so API calls are attributed to its perf measurement
+    threads = [
+        threading.Thread(target=contextvars.copy_context().run, args=(worker, i), name=f"{stage.name}-{k}",
+                         daemon=True)
+        for i, stage in enumerate(stages)
+        for k in range(stage.workers)
+    ]
+    for t in threads:
+        t.start()
+    for item in items:
+        queues[0].put(item)
+    for _ in range(stages[0].workers):
+        queues[0].put(STOP)
+    for t in threads:
+        t.join()
+
+    for stage_stats in stats.values():
+        stage_stats["busy_s"] = round(stage_stats["busy_s"], 3)
+    return stats
+
+
+class JsonlSink:
+    """Thread-safe JSONL writer that flushes every record."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = open(self.path, "w", encoding="utf-8")
+        self._lock = threading.Lock()
+        self.n_records = 0
+
+    def write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._f.write(line)
+            self._f.flush()
+            self.n_records += 1
+
+    def close(self):
+        self._f.close()
+
+
+# === Pipeline in streaming mode ===
+def run_streaming(paths: dict, query: str, limit: Optional[int] = None, deployment_name: str = "gpt-4o-mini",
+                  preclassify: bool = True, preclassify_threshold: float = 0.9,
+                  classify_batch_size: Optional[int] = None, force: bool = False, workers: dict = None,
+                  maxsize: int = DEFAULT_QUEUE_SIZE) -> dict:
+    """
+    Run the pipeline for ``paths`` (see ``make_run_dir``) query by query.
+
+    Pages are scraped and scored only when page classification recommends
+    crawling them. The pages of one query that the rules leave open are
+    classified in calls of ``classify_batch_size`` rows (all of them in one
+    call when None). ``force`` re-runs queries already in the done tracker.
+    Returns the run summary that is also written to
+    ``metadata/stream_<timestamp>.json``.
+    """
+    serp = core_module("01_serp_scraper")
+    scoring = core_module("02_label_and_score")
+    export = core_module("03_export_results_to_jsonl")
+    scraper = core_module("05_export_jsonl_with_scraping")
+    batched = core_module("08_classify_pages_batched")
+    from jobserp_explorer.utils.llm_client import load_schema, run_llm_schema_tiered
+    from jobserp_explorer.utils.llm_usage import build_usage_report
+    from jobserp_explorer.utils.page_rules import preclassify as rule_match, rule_summary
+
+    workers = {**DEFAULT_WORKERS, **(workers or {})}
+    for key in ("base", "logs", "metadata"):
+        Path(paths[key]).mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(
+        filename=Path(paths["logs"]) / "pipeline.log",
+        level=logging.INFO,
+        format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s'
+    )
+
+    timestamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    input_csv = fetch_jobs(query, paths["query_csv"], limit)
+    jobs = pd.read_csv(input_csv)
+
+    done_file = Path(paths["base"]) / "done_tracker.csv"
+    done_set = set(pd.read_csv(done_file)["query_uid"]) if done_file.exists() and not force else set()
+
+    stem = f"serp_class_input_{timestamp}"
+    export_sink = JsonlSink(Path(paths["serp_jsonl_input_dir"]) / f"{stem}.jsonl")
+    # Same split as the DAG: rule classifications (04), the residual left for the LLM and its results (08)
+    rules_sink = residual_sink = None
+    if preclassify:
+        rules_sink = JsonlSink(Path(paths["page_classification_dir"]) / f"{stem}_rules_stream.jsonl")
+        residual_sink = JsonlSink(Path(paths["page_llm_input_dir"]) / f"{stem}_residual.jsonl")
+    classified_sink = JsonlSink(Path(paths["page_classification_dir"]) / f"{stem}_flow_pagecateg_stream.jsonl")
+    scraped_sink = JsonlSink(Path(paths["html_scraped_dir"]) / f"serp_expanded_{timestamp}_results_spider_scraped.jsonl")
+    final_sink = JsonlSink(Path(paths["final_scored_jsonl"]) / f"{stem}_flow_jobposting_stream.jsonl")
+
+    single_schema = load_schema(str(batched.SINGLE_SCHEMA))
+    batch_schema = batched.build_batch_schema(single_schema)
+    spider_headers = scraper.spider_headers()
+
+    lock = threading.Lock()
+    expanded_rows, scored_frames, filtered_frames, done_rows, final_records = [], [], [], [], []
+    line_numbers = iter(range(10 ** 9))
+
+    def next_line_number():
+        with lock:
+            return next(line_numbers)
+
+    # --- stage functions: each returns the items for the next stage ---
+    def fetch(item):
+        idx, row = item
+        query_uid = serp.make_query_uid(row["Job Title"], row["Company"])
+        if query_uid in done_set:
+            return []
+        results_list = serp.results_as_list(serp.get_serp_results(row["Job Title"], row["Company"]))
+
+        jsonl_dir = Path(paths["scraped_jsonl"])
+        jsonl_dir.mkdir(parents=True, exist_ok=True)
+        with open(jsonl_dir / f"serp_{query_uid}.jsonl", "w", encoding="utf-8") as f:
+            for result in results_list:
+                result["page_uid"] = serp.make_page_uid(result.get("url", ""))
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+        rows = serp.expand_serp_results(idx, row, query_uid, results_list)
+        with lock:
+            expanded_rows.extend(rows)
+            done_rows.append({"query_uid": query_uid, "Job Title": row["Job Title"], "Company": row["Company"],
+                              "done_at": datetime.now().isoformat()})
+        return [rows] if rows else []
+
+    def score(rows):
+        scored, filtered = scoring.score_frame(pd.DataFrame(rows))
+        with lock:
+            scored_frames.append(scored)
+            filtered_frames.append(filtered)
+        pages = []
+        for row in filtered.to_dict(orient="records"):
+            record = export.export_record(row)
+            export_sink.write(record)
+            pages.append((next_line_number(), row, record))
+        return [pages] if pages else []
+
+    def classify(pages):
+        residual = []
+        for line_number, row, record in pages:
+            if preclassify:
+                page_type, confidence, rule = rule_match(record["serp_url"], record["domain"], record["label"],
+                                                         record["serp_title"])
+            else:
+                page_type, confidence, rule = None, 0.0, None
+            if page_type and confidence >= preclassify_threshold:
+                summary = rule_summary(record["serp_url"], page_type, confidence, rule)
+                yield _classified(rules_sink, line_number, row, record, summary)
+            else:
+                residual.append((line_number, row, record))
+                if residual_sink is not None:
+                    residual_sink.write(record)
+
+        by_line = {line_number: (row, record) for line_number, row, record in residual}
+        size = classify_batch_size or max(1, len(residual))
+        for start in range(0, len(residual), size):
+            batch = [(n, rec) for n, _, rec in residual[start:start + size]]
+            results, _ = batched.classify_batch(batch, deployment_name, single_schema, batch_schema)
+            for line_number, _, summary, usage in results:
+                row, record = by_line[line_number]
+                yield _classified(classified_sink, line_number, row, record, summary, usage)
+
+    def _classified(sink, line_number, row, record, summary, usage=None):
+        out = {"id": str(record["job_index"]), "serp_url": record["serp_url"], "page_uid": record["page_uid"],
+               "summary": summary, "line_number": line_number}
+        if usage is not None:
+            out["usage"] = usage
+            record_usage([out])
+        sink.write(out)
+        return line_number, row, record, summary
+
+    def scrape(item):
+        line_number, row, record, summary = item
+        if summary.get("recommend_crawl") != "Yes":
+            return []
+        content = scraper.scrape_url(record["serp_url"], return_format="markdown", readability=True,
+                                     clean_html=True, filter_output_main_only=True, headers=spider_headers)
+        scraped_sink.write(scraper.scraped_record(row, content))
+        if not content:
+            return []
+        return [(line_number, {**record, "scraped_data": content})]
+
+    def final(item):
+        line_number, record = item
+        prompt = batched.render_template(JOBPOSTING_TEMPLATE, **record)
+        summary, usage = run_llm_schema_tiered(prompt=prompt, deployment_name=deployment_name,
+                                               schema_path=str(JOBPOSTING_SCHEMA))
+        out = {"id": str(record["job_index"]), "serp_url": record["serp_url"], "page_uid": record["page_uid"],
+               "summary": summary, "usage": usage, "line_number": line_number}
+        final_sink.write(out)
+        record_usage([out])
+        with lock:
+            final_records.append(out)
+        return [out]
+
+    stages = [
+        StreamStage("fetch", fetch, workers["fetch"]),
+        StreamStage("score", score, workers["score"]),
+        StreamStage("classify", classify, workers["classify"]),
+        StreamStage("scrape", scrape, workers["scrape"]),
+        StreamStage("final", final, workers["final"]),
+    ]
+
+    print(f"[ℹ] Streaming {len(jobs)} queries through {' → '.join(s.name for s in stages)}")
+    started = time.perf_counter()
+    try:
+        with measure("stream", paths["metadata"]), profiled("stream", paths["logs"]):
+            stats = run_stream(jobs.to_dict(orient="index").items(), stages, maxsize=maxsize)
+    finally:
+        for sink in (export_sink, rules_sink, residual_sink, classified_sink, scraped_sink, final_sink):
+            if sink is not None:
+                sink.close()
+    wall_time_s = time.perf_counter() - started
+
+    # --- batch-layout artifacts for the rest of the tooling ---
+    expanded_path = write_table(pd.DataFrame(expanded_rows),
+                                Path(paths["scraped_jsonl"]) / f"serp_expanded_{timestamp}.csv", "serp_expanded")
+
+    scored_dir = Path(paths["scored_csv"])
+    scored_dir.mkdir(parents=True, exist_ok=True)
+    results_path = scored_dir / f"serp_expanded_{timestamp}_results.csv"
+    if scored_frames:
+        write_table(pd.concat(scored_frames, ignore_index=True),
+                    scored_dir / f"serp_expanded_{timestamp}_scored_full.csv", "scored")
+        results_path = write_table(pd.concat(filtered_frames, ignore_index=True), results_path, "scored",
+                                   keep_csv=True)
+
+    if done_rows:
+        previous = pd.read_csv(done_file) if done_file.exists() else pd.DataFrame()
+        pd.concat([previous, pd.DataFrame(done_rows)], ignore_index=True).to_csv(done_file, index=False)
+
+    if preclassify:
+        if not residual_sink.n_records:
+            residual_sink.path.unlink(missing_ok=True)
+        preclassified = (rules_sink.path, residual_sink.path if residual_sink.n_records else None)
+    else:
+        preclassified = (None, export_sink.path)
+    classified = classified_sink.path if residual_input(preclassified) else None
+    if classified is None:
+        classified_sink.path.unlink(missing_ok=True)
+    # Outputs in the shape each DAG stage returns them
+    outputs = {
+        "fetch_jobs": input_csv,
+        "fetch_serps": expanded_path,
+        "label_and_score": [results_path] if results_path.exists() else [],
+        "export_jsonl": export_sink.path,
+        "preclassify_pages": preclassified,
+        "classify_pages": classified,
+        "scrape_pages": [scraped_sink.path],
+        "score_matches": final_sink.path,
+    }
+
+    summary = {
+        "mode": "streaming",
+        "timestamp": timestamp,
+        "query": query,
+        "n_queries": len(jobs),
+        "wall_time_s": round(wall_time_s, 3),
+        "first_final_s": stats["final"]["first_output_s"],
+        "stages": stats,
+        "outputs": {
+            "serp_class_input": str(export_sink.path),
+            "page_rules": str(preclassified[0]) if preclassified[0] else None,
+            "page_classification": str(classified) if classified else None,
+            "scraped": str(scraped_sink.path),
+            "final_scored": str(final_sink.path),
+        },
+        "final_scoring_usage": build_usage_report(final_records, wall_time_s, flow_name="flow_jobposting_stream"),
+    }
+    with open(Path(paths["metadata"]) / f"stream_{timestamp}.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    # Same manifests as the DAG, so a later non-streaming run of this directory reuses these outputs
+    options = {"query": query, "limit": limit, "classify_batch_size": classify_batch_size,
+               "preclassify": preclassify, "preclassify_threshold": preclassify_threshold}
+    run_uid = run_catalog.run_uid_from_dir(paths["base"])
+    for stage, output in outputs.items():
+        manifest = write_stage_manifest(paths, stage, output, outputs, **options)
+        run_catalog.record("step_finished", run_uid, stage, "done", manifest["outputs"])
+        warehouse.record("ingest_outputs", run_uid, stage, manifest["outputs"])
+
+    busiest = max(stats.items(), key=lambda kv: kv[1]["busy_s"] / max(1, workers[kv[0]]))[0]
+    print(f"[✓] Streamed {len(jobs)} queries in {wall_time_s:.1f}s; "
+          f"first final score after {summary['first_final_s']}s, {final_sink.n_records} pages scored "
+          f"(bottleneck: {busiest})")
+    return summary
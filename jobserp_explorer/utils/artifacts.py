@@ -0,0 +1,154 @@
+# utils/artifacts.py
+"""
+Lazy, paginated access to stage artifacts (JSONL, CSV, Parquet).
+
+``Artifact.records()`` streams records. ``Artifact.page(n, size)`` reads only
+the requested rows. ``Artifact.count()`` counts rows without parsing them.
+
+For JSONL the byte offsets of every non-empty line are computed once, in
+one pass over the file, and persisted as a ``.npy`` file under
+``data/cache/line_index``. The index is keyed by the file's path, size and
+mtime, so a rewritten file gets a fresh index. Pages are then sliced out of
+a memory-mapped file, and only those lines are parsed. CSV pages skip rows
+while parsing and Parquet pages read record batches, so neither loads the
+whole table.
+
+``RunManager.artifact(step)`` resolves the latest artifact of a step.
+"""
+import hashlib
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from jobserp_explorer.config.paths import CACHE_DIR
+
+INDEX_DIR = CACHE_DIR / "line_index"
+INDEX_DIR_ENV = "JOBSERP_LINE_INDEX_DIR"
+SCAN_CHUNK = 16 << 20
+DEFAULT_PAGE_SIZE = 50
+
+
+def _index_dir() -> Path:
+    return Path(os.environ.get(INDEX_DIR_ENV) or INDEX_DIR)
+
+
+class Artifact:
+    """One output file of a stage. ``kind`` is ``jsonl``, ``csv`` or ``parquet`` (from the suffix)."""
+
+    def __init__(self, path, stage: Optional[str] = None):
+        self.path = Path(path)
+        self.stage = stage
+        self.kind = {".jsonl": "jsonl", ".parquet": "parquet"}.get(self.path.suffix, "csv")
+
+    def __repr__(self):
+        return f"Artifact({str(self.path)!r}, stage={self.stage!r})"
+
+    def __len__(self):
+        return self.count()
+
+    def exists(self) -> bool:
+        return self.path.is_file()
+
+    # === Line-offset index (JSONL) ===
+    def _index_path(self) -> Path:
+        stat = self.path.stat()
+        key = f"{self.path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}"
+        return _index_dir() / f"{hashlib.sha1(key.encode()).hexdigest()}.npy"
+
+    def line_index(self):
+        """``(n, 2)`` uint64 array of ``[start, end)`` byte offsets of the non-empty lines."""
+        import numpy as np
+
+        index_path = self._index_path()
+        if index_path.exists():
+            return np.load(index_path, mmap_mode="r")
+
+        size = self.path.stat().st_size
+        newlines = []
+        with open(self.path, "rb") as f:
+            offset = 0
+            for chunk in iter(lambda: f.read(SCAN_CHUNK), b""):
+                newlines.append(np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == 10) + offset)
+                offset += len(chunk)
+        ends = np.concatenate(newlines + [np.array([size])]).astype(np.uint64)
+        starts = np.concatenate([np.array([0], dtype=np.uint64), ends[:-1] + 1])
+        keep = ends > starts  # drop empty lines (and the empty tail after a final newline)
+        index = np.stack([starts[keep], ends[keep]], axis=1)
+
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = index_path.with_name(f"{index_path.stem}.{os.getpid()}.tmp.npy")
+        np.save(tmp, index)
+        os.replace(tmp, index_path)
+        return index
+
+    # === Reads ===
+    def count(self) -> int:
+        """Number of records, without parsing them."""
+        if self.kind == "jsonl":
+            return 0 if self.path.stat().st_size == 0 else len(self.line_index())
+        if self.kind == "parquet":
+            from jobserp_explorer.utils.tables import table_rows
+            return table_rows(self.path)
+        from jobserp_explorer.utils.run_catalog import count_rows
+        return count_rows(self.path)
+
+    def records(self, chunksize: int = 10_000) -> Iterator[dict]:
+        """Every record, one at a time (CSV / Parquet are read ``chunksize`` rows at a time)."""
+        if self.kind == "jsonl":
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        elif self.kind == "parquet":
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(self.path).iter_batches(batch_size=chunksize):
+                yield from batch.to_pandas().to_dict(orient="records")
+        else:
+            from jobserp_explorer.utils.tables import apply_schema, kind_of
+            import pandas as pd
+            for chunk in pd.read_csv(self.path, encoding="utf-8", chunksize=chunksize):
+                yield from apply_schema(chunk, kind_of(self.path)).to_dict(orient="records")
+
+    def read_lines(self, start: int, stop: int) -> List[dict]:
+        """JSONL records ``start:stop`` (by non-empty line), parsed from a memory map."""
+        index = self.line_index()
+        rows = index[start:stop]
+        if len(rows) == 0:
+            return []
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return [json.loads(mm[int(s):int(e)]) for s, e in rows]
+
+    def page(self, n: int, size: int = DEFAULT_PAGE_SIZE) -> List[dict]:
+        """Records of page ``n`` (0-based) with ``size`` records per page."""
+        start, stop = n * size, (n + 1) * size
+        if self.kind == "jsonl":
+            return [] if self.path.stat().st_size == 0 else self.read_lines(start, stop)
+        if self.kind == "parquet":
+            import pyarrow.parquet as pq
+            out, seen = [], 0
+            for batch in pq.ParquetFile(self.path).iter_batches(batch_size=max(size, 1024)):
+                if seen + batch.num_rows > start:
+                    offset = max(0, start - seen)
+                    out.extend(batch.slice(offset, min(batch.num_rows, stop - seen) - offset).to_pylist())
+                seen += batch.num_rows
+                if seen >= stop:
+                    break
+            return out[:size]
+        from jobserp_explorer.utils.tables import apply_schema, kind_of
+        import pandas as pd
+        df = pd.read_csv(self.path, encoding="utf-8", skiprows=range(1, start + 1), nrows=size)
+        return apply_schema(df, kind_of(self.path)).to_dict(orient="records")
+
+    def n_pages(self, size: int = DEFAULT_PAGE_SIZE) -> int:
+        return -(-self.count() // size)
+
+
+def latest_file(directory, patterns=("*.jsonl", "*.parquet", "*.csv")) -> Optional[Path]:
+    """Newest file matching any of ``patterns`` in ``directory``."""
+    directory = Path(directory)
+    if directory.is_file():
+        return directory
+    candidates = [p for pattern in patterns for p in directory.glob(pattern) if p.is_file()]
+    return max(candidates, key=lambda p: p.stat().st_mtime) if candidates else None
@@ -0,0 +1,367 @@
+# utils/http_journal.py
+"""
+Record / replay journal of the external HTTP calls of a run.
+
+A local proxy sits between the stage clients and the APIs; the clients are
+pointed at it through their base-URL settings (``SPIDER_API_BASE``,
+``OPENAI_BASE_URL``, ``AZURE_OPENAI_API_BASE``, ``REMOTIVE_API_BASE``), which
+subprocess stages and promptflow workers inherit.
+
+- ``record``: requests are forwarded to the real APIs (or whatever the base
+  URLs pointed at before) and every exchange is appended to
+  ``<run>/metadata/http_journal.sqlite``. The LLM cache is put in
+  ``refresh`` mode so every call goes out and the journal is complete.
+- ``replay``: answers come from a recorded journal, with the recorded
+  latency or none at all; nothing leaves the machine and the LLM cache is
+  off. Identical requests are answered in recorded order (a 429 followed by
+  a 200 replays the same way); a request the journal does not have gets a
+  404.
+
+Bodies are zlib-compressed; exchanges are indexed by a hash of service,
+method, path, query and canonical JSON body. API keys are never stored.
+Some request ids depend on thread timing (streaming mode numbers pages as
+they are scored), so a request without an exact match is matched again
+with standalone integers masked, and the ids that differ are swapped back
+in the reply.
+
+    jobserp-explorer run --run_uid A --query "data engineer" --record
+    jobserp-explorer run --run_uid B --query "data engineer" --replay_from A --replay_latency zero
+    jobserp-explorer runs journal A
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+JOURNAL_FILENAME = "http_journal.sqlite"
+LATENCY_MODES = ("recorded", "zero")
+UPSTREAM_TIMEOUT_S = 120
+
+# proxy path prefix → (base-URL env var, default upstream)
+SERVICES = {
+    "spider": ("SPIDER_API_BASE", "https://api.spider.cloud"),
+    "openai": ("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+    "azure": ("AZURE_OPENAI_API_BASE", None),
+    "remotive": ("REMOTIVE_API_BASE", "https://remotive.com"),
+}
+FORWARDED_REQUEST_HEADERS = ("authorization", "api-key", "content-type", "openai-organization", "user-agent")
+KEPT_RESPONSE_HEADERS = ("content-type", "retry-after", "retry-after-ms", "x-ratelimit-remaining-requests",
+                         "x-ratelimit-remaining-tokens", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS exchanges (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    loose_key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    service TEXT NOT NULL,
+    method TEXT NOT NULL,
+    path TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    latency_s REAL NOT NULL,
+    recorded_at REAL NOT NULL,
+    response_headers TEXT NOT NULL,
+    request BLOB,
+    response BLOB
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_exchanges_key ON exchanges(key, seq);
+CREATE INDEX IF NOT EXISTS idx_exchanges_loose_key ON exchanges(loose_key);
+"""
+# Integers that stand alone ("id: 12", "max_tokens": 400), not parts of names, URLs or decimals
+_STANDALONE_INT = re.compile(rb"(?<![\w/.\-])\d+(?![\w/.\-])")
+_QUOTED_INT = re.compile(rb'(\\?")(\d+)(\\?")')
+
+
+def journal_path(meta_dir) -> Path:
+    return Path(meta_dir) / JOURNAL_FILENAME
+
+
+def canonical_body(body: bytes) -> bytes:
+    try:
+        return json.dumps(json.loads(body), sort_keys=True, ensure_ascii=False).encode() if body else b""
+    except (ValueError, UnicodeDecodeError):
+        return body
+
+
+def request_keys(service: str, method: str, path: str, body: bytes) -> tuple:
+    """``(exact key, loose key)``; the loose key ignores the values of standalone integers."""
+    canonical = canonical_body(body)
+    head = [service.encode(), method.encode(), path.encode()]
+    return tuple(hashlib.sha256(b"\0".join([*head, b])).hexdigest()
+                 for b in (canonical, _STANDALONE_INT.sub(b"#", canonical)))
+
+
+def remap_ids(reply: bytes, recorded_request: bytes, request: bytes) -> bytes:
+    """Swap the standalone integers that differ between the two requests where the reply quotes them."""
+    mapping = {}
+    for old, new in zip(_STANDALONE_INT.findall(canonical_body(recorded_request)),
+                        _STANDALONE_INT.findall(canonical_body(request))):
+        if old != new and mapping.setdefault(old, new) != new:
+            return reply  # ambiguous: the same number became different ones
+    if not mapping:
+        return reply
+    return _QUOTED_INT.sub(lambda m: m.group(1) + mapping.get(m.group(2), m.group(2)) + m.group(3), reply)
+
+
+# === Journal file ===
+class Journal:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._served = {}  # key → replies served so far (replay)
+        self._served_ids = set()
+
+    def append(self, keys: tuple, service, method, path, status, latency_s, headers: dict, request: bytes,
+               response: bytes):
+        key, loose_key = keys
+        with self._lock:
+            seq = self._conn.execute("SELECT COUNT(*) FROM exchanges WHERE key = ?", (key,)).fetchone()[0]
+            self._conn.execute(
+                "INSERT INTO exchanges(key, loose_key, seq, service, method, path, status, latency_s, recorded_at, "
+                "response_headers, request, response) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, loose_key, seq, service, method, path, status, latency_s, time.time(), json.dumps(headers),
+                 zlib.compress(request), zlib.compress(response)),
+            )
+
+    def next_reply(self, keys: tuple, request: bytes = b""):
+        """``(status, headers, body, latency_s)`` for the next replay of this request, or None."""
+        key, loose_key = keys
+        with self._lock:
+            seq = self._served.get(key, 0)
+            # Past the recorded count, keep answering with the last recorded reply
+            row = self._conn.execute(
+                "SELECT id, status, response_headers, response, latency_s FROM exchanges WHERE key = ? AND seq <= ? "
+                "ORDER BY seq DESC LIMIT 1", (key, seq)).fetchone()
+            if row is not None:
+                self._served[key] = seq + 1
+                self._served_ids.add(row[0])
+                exchange_id, status, headers, body, latency_s = row
+                return status, json.loads(headers), zlib.decompress(body), latency_s
+
+            rows = self._conn.execute(
+                "SELECT id, status, response_headers, response, latency_s, request FROM exchanges "
+                "WHERE loose_key = ? ORDER BY id", (loose_key,)).fetchall()
+            if not rows:
+                return None
+            row = next((r for r in rows if r[0] not in self._served_ids), rows[-1])
+            self._served_ids.add(row[0])
+        exchange_id, status, headers, body, latency_s, recorded_request = row
+        body = remap_ids(zlib.decompress(body), zlib.decompress(recorded_request), request)
+        return status, json.loads(headers), body, latency_s
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT service, path, status, COUNT(*), SUM(latency_s), MAX(latency_s), "
+                "SUM(LENGTH(request) + LENGTH(response)) FROM exchanges GROUP BY service, path, status"
+            ).fetchall()
+        return {
+            "path": str(self.path),
+            "size_bytes": self.path.stat().st_size if self.path.exists() else 0,
+            "exchanges": [
+                {"service": service, "path": path, "status": status, "count": count,
+                 "total_latency_s": round(total or 0, 3), "max_latency_s": round(peak or 0, 3),
+                 "compressed_bytes": size}
+                for service, path, status, count, total, peak, size in rows
+            ],
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# === Proxy ===
+class JournalProxy(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, journal: Journal, mode: str, upstreams: dict = None, latency: str = "recorded",
+                 address=("127.0.0.1", 0)):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown journal mode: {mode}")
+        if latency not in LATENCY_MODES:
+            raise ValueError(f"Unknown replay latency: {latency} (expected one of {LATENCY_MODES})")
+        super().__init__(address, _ProxyHandler)
+        self.journal = journal
+        self.mode = mode
+        self.latency = latency
+        self.upstreams = upstreams or current_upstreams()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> dict:
+        env = {var: f"{self.url}/{service}" for service, (var, _) in SERVICES.items()}
+        env["JOBSERP_LLM_CACHE"] = "refresh" if self.mode == "record" else "off"
+        return env
+
+
+def current_upstreams() -> dict:
+    """Where each service points right now (before the proxy takes over the base URLs)."""
+    from dotenv import load_dotenv
+
+    load_dotenv()  # base URLs set only in .env must be read before the proxy overrides them
+    return {service: os.environ.get(var) or default for service, (var, default) in SERVICES.items()}
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, headers: dict = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            if name.lower() in KEPT_RESPONSE_HEADERS:
+                self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str):
+        self._send(status, json.dumps({"error": {"message": message, "type": "journal"}}).encode(),
+                   {"content-type": "application/json"})
+
+    def _handle(self, method: str):
+        service, _, rest = self.path.lstrip("/").partition("/")
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if service not in SERVICES:
+            return self._error(404, f"Unknown service prefix: /{service}")
+        keys = request_keys(service, method, "/" + rest, body)
+        server = self.server
+
+        if server.mode == "replay":
+            reply = server.journal.next_reply(keys, body)
+            if reply is None:
+                return self._error(404, f"Not in the journal: {method} /{service}/{rest}")
+            status, headers, payload, latency_s = reply
+            if server.latency == "recorded":
+                time.sleep(latency_s)
+            return self._send(status, payload, headers)
+
+        upstream = server.upstreams.get(service)
+        if not upstream:
+            return self._error(502, f"No upstream configured for {service} ({SERVICES[service][0]})")
+        headers = {k: v for k, v in self.headers.items() if k.lower() in FORWARDED_REQUEST_HEADERS}
+        request = urllib.request.Request(f"{upstream.rstrip('/')}/{rest}", data=body or None, headers=headers,
+                                         method=method)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=UPSTREAM_TIMEOUT_S) as response:
+                status, payload, response_headers = response.status, response.read(), dict(response.headers)
+        except urllib.error.HTTPError as e:
+            status, payload, response_headers = e.code, e.read(), dict(e.headers)
+        except (urllib.error.URLError, OSError) as e:
+            return self._error(502, f"Upstream unreachable: {e}")
+        latency_s = time.perf_counter() - started
+
+        kept = {k: v for k, v in response_headers.items() if k.lower() in KEPT_RESPONSE_HEADERS}
+        server.journal.append(keys, service, method, "/" + urlsplit(rest).path, status, latency_s, kept, body,
+                              payload)
+        self._send(status, payload, kept)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+@contextmanager
+def journaled(meta_dir=None, mode: str = None, replay_meta_dir=None, latency: str = "recorded"):
+    """
+    Run the enclosed block with its API traffic recorded into
+    ``meta_dir``'s journal (``mode="record"``) or replayed from
+    ``replay_meta_dir``'s (``mode="replay"``). No-op when ``mode`` is None.
+    """
+    if mode is None:
+        yield None
+        return
+
+    path = journal_path(replay_meta_dir if mode == "replay" else meta_dir)
+    if mode == "replay" and not path.exists():
+        raise FileNotFoundError(f"No HTTP journal to replay: {path}")
+    journal = Journal(path)
+    proxy = JournalProxy(journal, mode, latency=latency)
+    threading.Thread(target=proxy.serve_forever, name="http-journal", daemon=True).start()
+
+    env = proxy.env()
+    previous = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+    print(f"[ℹ] HTTP journal ({mode}{', ' + latency + ' latency' if mode == 'replay' else ''}) → {path}")
+    try:
+        yield proxy
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        proxy.shutdown()
+        proxy.server_close()
+        journal.close()
+
+
+@contextmanager
+def journaled_run(run_uid: str, record: bool = False, replay_from: str = None, latency: str = "recorded"):
+    """``journaled`` for a run UID: record into its own journal or replay another run's."""
+    from jobserp_explorer.run_manager import RunManager
+
+    if record and replay_from:
+        raise ValueError("Choose either record or replay, not both.")
+    mode = "record" if record else "replay" if replay_from else None
+    replay_dir = RunManager(replay_from).metadata_dir if replay_from else None
+    with journaled(RunManager(run_uid).metadata_dir, mode, replay_dir, latency) as proxy:
+        yield proxy
+
+
+# === CLI Entry Point ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record / replay journal of a run's API calls.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    stats = sub.add_parser("stats", help="Summarize a run's journal")
+    stats.add_argument("run_uid")
+    serve = sub.add_parser("serve", help="Serve a run's journal (replay) or record into it, until Ctrl+C")
+    serve.add_argument("run_uid")
+    serve.add_argument("--mode", choices=["record", "replay"], default="replay")
+    serve.add_argument("--latency", choices=LATENCY_MODES, default="recorded")
+    serve.add_argument("--port", type=int, default=8710)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    from jobserp_explorer.run_manager import RunManager
+
+    path = journal_path(RunManager(args.run_uid).metadata_dir)
+    if args.command == "stats":
+        if not path.exists():
+            print(f"[✗] No journal at {path}")
+            sys.exit(1)
+        print(json.dumps(Journal(path).stats(), indent=2))
+    else:
+        proxy = JournalProxy(Journal(path), args.mode, latency=args.latency, address=("127.0.0.1", args.port))
+        print(f"[✓] HTTP journal proxy ({args.mode}) on {proxy.url} for {path}")
+        for name, value in proxy.env().items():
+            print(f"export {name}={value}")
+        try:
+            proxy.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,174 @@
+# utils/llm_cache.py
+"""
+Persistent SQLite cache for LLM function-call results.
+
+Entries are keyed by a hash of everything that determines the model output:
+rendered prompt, system prompt, schema JSON, deployment name and sampling
+parameters. The cache is shared by all promptflow workers (WAL mode), capped
+in size with least-recently-used eviction, and keeps hit/miss counters.
+
+Environment:
+- ``JOBSERP_LLM_CACHE``: ``on`` (default), ``off`` (no reads or writes) or
+  ``refresh`` (bypass reads, overwrite entries with fresh results).
+- ``JOBSERP_LLM_CACHE_PATH``: database location.
+- ``JOBSERP_LLM_CACHE_MAX_MB``: size cap before eviction (default 512).
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from jobserp_explorer.config.paths import LLM_CACHE_PATH
+
+MODE_ENV = "JOBSERP_LLM_CACHE"
+PATH_ENV = "JOBSERP_LLM_CACHE_PATH"
+MAX_MB_ENV = "JOBSERP_LLM_CACHE_MAX_MB"
+
+DEFAULT_MAX_MB = 512
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def make_cache_key(prompt: str, schema: dict, deployment_name: str, params: dict) -> str:
+    payload = json.dumps(
+        {"prompt": prompt, "schema": schema, "deployment": deployment_name, "params": params},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path: Path = LLM_CACHE_PATH, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _bump(self, name: str, delta: int = 1):
+        self._conn.execute(
+            "INSERT INTO stats(name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, delta),
+        )
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._bump("misses")
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._bump("hits")
+        return json.loads(row[0])
+
+    def put(self, key: str, value):
+        data = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses(key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, data, len(data), now, now),
+                )
+                self._bump("bytes", len(data) - (old[0] if old else 0))
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self):
+        """Drop least-recently-used entries until the cache is back under 90% of the cap."""
+        total = self._stat("bytes")
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        freed = evicted = 0
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            if total - freed <= target:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            freed += size
+            evicted += 1
+        self._bump("bytes", -freed)
+        self._bump("evictions", evicted)
+
+    def _stat(self, name: str) -> int:
+        row = self._conn.execute("SELECT value FROM stats WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            n_entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {
+                "entries": n_entries,
+                "bytes": self._stat("bytes"),
+                "hits": self._stat("hits"),
+                "misses": self._stat("misses"),
+                "evictions": self._stat("evictions"),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.execute("DELETE FROM stats")
+            self._conn.execute("VACUUM")
+
+
+def cache_mode() -> str:
+    mode = os.environ.get(MODE_ENV, "on").strip().lower()
+    return mode if mode in {"on", "off", "refresh"} else "on"
+
+
+_cache = None
+
+
+def get_cache() -> LLMCache:
+    """Process-wide cache instance, configured from the environment on first use."""
+    global _cache
+    if _cache is None:
+        try:
+            max_mb = float(os.environ.get(MAX_MB_ENV, DEFAULT_MAX_MB))
+        except ValueError:
+            max_mb = DEFAULT_MAX_MB
+        _cache = LLMCache(
+            path=Path(os.environ.get(PATH_ENV) or LLM_CACHE_PATH),
+            max_bytes=int(max_mb * 1024 * 1024),
+        )
+    return _cache
+
+
+# === CLI Entry Point ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the LLM response cache.")
+    parser.add_argument("--clear", action="store_true", help="Delete all cached responses and counters")
+    args = parser.parse_args()
+
+    cache = get_cache()
+    if args.clear:
+        cache.clear()
+        print(f"[✓] Cleared LLM cache at {cache.path}")
+    print(json.dumps(cache.stats(), indent=2))
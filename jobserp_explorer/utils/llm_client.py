@@ -0,0 +1,402 @@
+# utils/llm_client.py
+"""
+Shared OpenAI function-calling logic behind the promptflow `llm_wrapper.py` tools.
+"""
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from jobserp_explorer.utils.llm_cache import cache_mode, get_cache, make_cache_key
+from jobserp_explorer.utils.llm_usage import cache_hit_usage, extract_usage
+from jobserp_explorer.utils.rate_limit import estimate_tokens, get_rate_limiter, retry_after_seconds
+from jobserp_explorer.utils.tracing import get_tracer
+
+MAX_RETRIES_ENV = "JOBSERP_LLM_MAX_RETRIES"
+DEFAULT_MAX_RETRIES = 3
+# How long a call may stay queued behind 429s when the shared rate limiter is on
+MAX_QUEUE_ENV = "JOBSERP_LLM_MAX_QUEUE_S"
+DEFAULT_MAX_QUEUE_S = 600
+
+SYSTEM_PROMPT = "You are an expert summarization assistant. Always call the function `{function_name}` with complete structured JSON."
+
+# promptflow-style role markers on their own line ("system:", "# user:")
+_SYSTEM_MARKER = re.compile(r"^[ \t]*#?[ \t]*system:[ \t]*$", re.IGNORECASE | re.MULTILINE)
+_USER_MARKER = re.compile(r"^[ \t]*#?[ \t]*user:[ \t]*$", re.IGNORECASE | re.MULTILINE)
+
+
+def to_bool(value) -> bool:
+    return str(value).lower() == "true"
+
+
+def get_client():
+    from openai.version import VERSION as OPENAI_VERSION
+
+    if OPENAI_VERSION.startswith("0."):
+        raise Exception(
+            "Please upgrade your OpenAI package to version >= 1.0.0 or using the command: pip install --upgrade openai."
+        )
+
+    if "OPENAI_API_KEY" not in os.environ or "AZURE_OPENAI_API_BASE" not in os.environ:
+        # load environment variables from .env file
+        load_dotenv()
+
+    if "OPENAI_API_KEY" not in os.environ:
+        raise Exception("Please specify environment variables: OPENAI_API_KEY")
+
+    api_key = os.environ["OPENAI_API_KEY"]
+    # Retries are done in `create_with_retries` so they can be counted per row
+    conn = dict(api_key=api_key, max_retries=0)
+    if api_key.startswith("sk-"):
+        from openai import OpenAI as Client
+        if os.environ.get("OPENAI_BASE_URL"):  # mock / replay server
+            conn["base_url"] = os.environ["OPENAI_BASE_URL"]
+    else:
+        from openai import AzureOpenAI as Client
+        conn.update(
+            azure_endpoint=os.environ.get("AZURE_OPENAI_API_BASE", "azure"),
+            api_version=os.environ.get("OPENAI_API_VERSION", "2023-07-01-preview"),
+        )
+
+    return Client(**conn)
+
+
+def _is_retryable(exc: Exception) -> bool:
+    import openai
+
+    return isinstance(exc, (
+        openai.RateLimitError,
+        openai.APIConnectionError,  # includes APITimeoutError
+        openai.InternalServerError,
+    ))
+
+
+def _is_rate_limited(exc: Exception) -> bool:
+    import openai
+
+    # insufficient_quota is also a 429 but will not clear by waiting
+    return isinstance(exc, openai.RateLimitError) and getattr(exc, "code", None) != "insufficient_quota"
+
+
+def _response_headers(obj):
+    response = getattr(obj, "response", None)
+    return getattr(response, "headers", None) or {}
+
+
+def create_with_retries(client, max_retries: int = None, **request):
+    """
+    ``client.chat.completions.create`` with exponential backoff on transient errors.
+
+    When the shared rate limiter is configured (``JOBSERP_LLM_RPM`` /
+    ``JOBSERP_LLM_TPM``), each attempt first waits for budget, and 429s pause
+    the bucket for all workers and re-queue the call instead of using up the
+    retry budget. Returns ``(response, retries)``.
+    """
+    if max_retries is None:
+        max_retries = int(os.environ.get(MAX_RETRIES_ENV, DEFAULT_MAX_RETRIES))
+    max_queue_s = float(os.environ.get(MAX_QUEUE_ENV, DEFAULT_MAX_QUEUE_S))
+
+    limiter = get_rate_limiter()
+    bucket = request.get("model", "default")
+    estimated = estimate_tokens([request.get("messages"), request.get("tools")])
+    queued_s = 0.0
+
+    retries = 0
+    while True:
+        queued_s += limiter.acquire(bucket, estimated)
+        try:
+            raw = client.chat.completions.with_raw_response.create(**request)
+            response = raw.parse()
+        except Exception as e:
+            if limiter.enabled and _is_rate_limited(e) and queued_s < max_queue_s:
+                wait = retry_after_seconds(_response_headers(e))
+                limiter.penalize(bucket, wait)
+                continue
+            if retries >= max_retries or not _is_retryable(e):
+                e.retries = retries
+                raise
+            time.sleep(min(2 ** retries, 30))
+            retries += 1
+            continue
+
+        usage = getattr(response, "usage", None)
+        limiter.update(
+            bucket,
+            estimated_tokens=estimated,
+            actual_tokens=getattr(usage, "total_tokens", None),
+            headers=raw.headers,
+        )
+        return response, retries
+
+
+def load_schema(file_path: str):
+    # Load JSON schema from the specified file path
+    with open(file_path, 'r') as schema_file:
+        return json.load(schema_file)
+
+
+def extract_arguments(response):
+    """Return ``(fn_name, raw_args)`` from either the tool-call or legacy function-call format."""
+    msg = response.choices[0].message
+    if msg.tool_calls:
+        tool_call = msg.tool_calls[0]
+        return tool_call.function.name, tool_call.function.arguments
+    if msg.function_call:  # legacy / older models
+        return msg.function_call.name, msg.function_call.arguments
+    return "unknown", "{}"
+
+
+def split_prompt(prompt: str):
+    """
+    Split a rendered template into ``(system, user)`` parts on its role markers.
+
+    Templates put the static profile/instructions under ``system:`` and the
+    per-row data under ``user:`` so that the tools + system message form a
+    stable prefix the provider can cache. Only the first ``system:`` and the
+    first following ``user:`` marker count, so scraped page text can never
+    re-split the prompt. Prompts without markers are sent as the user message.
+    """
+    system_marker = _SYSTEM_MARKER.search(prompt)
+    if not system_marker or prompt[:system_marker.start()].strip():
+        return "", prompt
+
+    user_marker = _USER_MARKER.search(prompt, system_marker.end())
+    if not user_marker:
+        return "", prompt
+    return prompt[system_marker.end():user_marker.start()].strip(), prompt[user_marker.end():].strip()
+
+
+def build_messages(prompt: str, function_name: str):
+    static_part, row_part = split_prompt(prompt)
+    system_prompt = SYSTEM_PROMPT.format(function_name=function_name)
+    if static_part:
+        system_prompt = f"{system_prompt}\n\n{static_part}"
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": row_part},
+    ]
+
+
+def run_llm_schema(
+    prompt: str,
+    deployment_name: str,
+    schema_path: str = None,
+    function_name: str = "parsed_message",
+    max_tokens: int = 16000,
+    temperature: float = .4,
+    top_p: float = 1.0,
+    n: int = 1,
+    stop: list = None,
+    presence_penalty: float = 0,
+    frequency_penalty: float = 0,
+    logit_bias: dict = None,
+    user: str = "",
+    use_cache: bool = True,
+    schema: dict = None,
+):
+    """
+    Call the model with ``schema_path`` as a forced tool.
+
+    Returns ``(parsed_arguments, usage)`` where usage holds the prompt,
+    completion and cached prompt token counts, the wall latency (including
+    retries) and the retry count of the call.
+
+    Results are served from / stored in the persistent LLM cache unless
+    ``use_cache`` is false (no reads or writes) or ``JOBSERP_LLM_CACHE`` says
+    otherwise.
+    ``schema`` may be passed directly instead of ``schema_path``.
+    """
+    tracer = get_tracer()
+    keep_bodies = tracer.sample()
+
+    if schema is None:
+        schema_path = Path(schema_path).expanduser().resolve()
+        assert schema_path.exists(), f"Schema path does not exist: {schema_path}"
+        schema = load_schema(str(schema_path))
+
+    if "name" not in schema or schema["name"] != function_name:
+        raise ValueError(f"Schema does not match expected name '{function_name}': got {schema}")
+
+    messages = build_messages(prompt, function_name)
+    params = {
+        "max_tokens": int(max_tokens),
+        "temperature": float(temperature),
+        "top_p": float(top_p),
+        "n": int(n),
+        "stop": stop if stop else None,
+        "presence_penalty": float(presence_penalty),
+        "frequency_penalty": float(frequency_penalty),
+        "logit_bias": logit_bias or {},
+    }
+
+    trace_fields = {
+        "function_name": function_name,
+        "model": deployment_name,
+        "prompt_chars": len(prompt),
+    }
+
+    # -------------------------------
+    # 💾 Response cache
+    # -------------------------------
+    mode = cache_mode() if use_cache else "off"
+    cache_key = None
+    if mode != "off":
+        cache_key = make_cache_key(json.dumps(messages, ensure_ascii=False), schema, deployment_name, params)
+        if mode == "on":
+            lookup_started = time.perf_counter()
+            cached = get_cache().get(cache_key)
+            if cached is not None:
+                tracer.emit("llm_cache_hit", **trace_fields, cache_key=cache_key)
+                return cached, cache_hit_usage(deployment_name, time.perf_counter() - lookup_started)
+
+    client = get_client()
+
+    # -------------------------------
+    # 🚀 Call model
+    # -------------------------------
+    started = time.perf_counter()
+    try:
+        response, retries = create_with_retries(
+            client,
+            tools=[{"type": "function", "function": schema}],
+            tool_choice={"type": "function", "function": {"name": function_name}},
+            messages=messages,
+            model=deployment_name,
+            user=user,
+            **params,
+        )
+    except Exception as e:
+        tracer.emit(
+            "llm_call_failed",
+            **trace_fields,
+            latency_s=round(time.perf_counter() - started, 3),
+            retries=getattr(e, "retries", 0),
+            error_type=type(e).__name__,
+            error=str(e),
+            http_response=str(getattr(e, "response", "")) or None,
+            prompt=prompt,
+            schema=schema,
+        )
+        raise
+    latency_s = round(time.perf_counter() - started, 3)
+
+    # -------------------------------
+    # 🧪 Parse function output
+    # -------------------------------
+    fn_name, raw_args = extract_arguments(response)
+    try:
+        parsed = json.loads(raw_args)
+    except json.JSONDecodeError as e:
+        tracer.emit(
+            "llm_parse_failed",
+            **trace_fields,
+            latency_s=latency_s,
+            error=str(e),
+            prompt=prompt,
+            response=response.model_dump(),
+        )
+        raise ValueError(f"Function call output is not valid JSON:\n{raw_args}") from e
+
+    usage = extract_usage(response)
+    usage.update(deployment=deployment_name, latency_s=latency_s, retries=retries)
+    bodies = {"prompt": prompt, "response": response.model_dump()} if keep_bodies else {}
+    tracer.emit(
+        "llm_call",
+        **trace_fields,
+        latency_s=latency_s,
+        called_function=fn_name,
+        usage=usage,
+        sampled=keep_bodies,
+        **bodies,
+    )
+
+    if cache_key is not None:
+        get_cache().put(cache_key, parsed)
+    return parsed, usage
+
+
+# === Model cascade (final scoring) ===
+CASCADE_TIERS_ENV = "JOBSERP_CASCADE_TIERS"
+CASCADE_BAND_ENV = "JOBSERP_CASCADE_BAND"
+DEFAULT_AMBIGUOUS_BAND = (0.4, 0.7)
+
+
+def parse_tiers(value) -> list:
+    """``"gpt-4.1-nano,gpt-4o"`` → ``["gpt-4.1-nano", "gpt-4o"]``."""
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [t.strip() for t in str(value).split(",") if t.strip()]
+
+
+def parse_band(value) -> tuple:
+    """``"0.4,0.7"`` → ``(0.4, 0.7)``; falls back to the default band."""
+    try:
+        low, high = (float(x) for x in str(value).split(","))
+        return (min(low, high), max(low, high))
+    except (TypeError, ValueError):
+        return DEFAULT_AMBIGUOUS_BAND
+
+
+def is_ambiguous_match(summary: dict, band=DEFAULT_AMBIGUOUS_BAND) -> bool:
+    """
+    Whether a final-scoring answer should be re-run on a stronger model:
+    ``potential_match`` is "Maybe", or ``match_score`` falls inside ``band``.
+    """
+    if str(summary.get("potential_match", "")).strip().lower() == "maybe":
+        return True
+    try:
+        score = float(summary.get("match_score"))
+    except (TypeError, ValueError):
+        return True
+    low, high = band
+    return low <= score <= high
+
+
+def run_llm_schema_cascade(prompt: str, tiers: list, band=DEFAULT_AMBIGUOUS_BAND,
+                           is_ambiguous=is_ambiguous_match, **kwargs):
+    """
+    Run ``prompt`` on the cheapest tier first and escalate to the next tier
+    only while the answer is ambiguous. Returns ``(parsed, usage)`` where
+    usage sums tokens over all tiers tried, and records the deployment that
+    produced the answer (``tier``), its position (``tier_index``) and the
+    per-tier breakdown (``tiers``).
+    """
+    tried = []
+    parsed = None
+    for index, deployment_name in enumerate(tiers):
+        parsed, usage = run_llm_schema(prompt=prompt, deployment_name=deployment_name, **kwargs)
+        tried.append(usage)
+        if index == len(tiers) - 1 or not is_ambiguous(parsed, band):
+            break
+
+    final = tried[-1]
+    combined = {
+        "prompt_tokens": sum(u.get("prompt_tokens", 0) for u in tried),
+        "completion_tokens": sum(u.get("completion_tokens", 0) for u in tried),
+        "cached_tokens": sum(u.get("cached_tokens", 0) for u in tried),
+        "deployment": final.get("deployment"),
+        "latency_s": round(sum(u.get("latency_s", 0) for u in tried), 3),
+        "retries": sum(u.get("retries", 0) for u in tried),
+        "cache_hit": all(u.get("cache_hit") for u in tried),
+        "tier": final.get("deployment"),
+        "tier_index": len(tried) - 1,
+        "tiers": tried,
+    }
+    return parsed, combined
+
+
+def run_llm_schema_tiered(prompt: str, deployment_name: str, cascade_tiers="", ambiguous_band="", **request):
+    """
+    ``run_llm_schema`` on ``deployment_name``, or the model cascade when
+    ``cascade_tiers`` (or ``JOBSERP_CASCADE_TIERS``) names two or more tiers.
+    """
+    tiers = parse_tiers(os.getenv(CASCADE_TIERS_ENV) or cascade_tiers)
+    band = parse_band(os.getenv(CASCADE_BAND_ENV) or ambiguous_band)
+    if len(tiers) > 1:
+        return run_llm_schema_cascade(prompt, tiers=tiers, band=band, **request)
+    return run_llm_schema(prompt=prompt, deployment_name=tiers[0] if tiers else deployment_name, **request)
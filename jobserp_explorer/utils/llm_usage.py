@@ -0,0 +1,152 @@
+# utils/llm_usage.py
+"""
+Token usage, latency and cost bookkeeping for LLM calls.
+"""
+import math
+from collections import Counter
+from datetime import datetime
+
+# USD per 1M tokens: (input, cached input, output)
+PRICES_PER_1M = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+}
+
+
+def extract_usage(response) -> dict:
+    """Flatten ``response.usage`` into prompt / completion / cached token counts."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", 0) if details is not None else 0
+    return {
+        "prompt_tokens": usage.prompt_tokens or 0,
+        "completion_tokens": usage.completion_tokens or 0,
+        "cached_tokens": cached or 0,
+    }
+
+
+def cache_hit_usage(deployment_name: str = None, latency_s: float = 0.0) -> dict:
+    """Usage record for a row served from the local response cache (no API call)."""
+    return {
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cached_tokens": 0,
+        "deployment": deployment_name,
+        "latency_s": round(latency_s, 4),
+        "retries": 0,
+        "cache_hit": True,
+    }
+
+
+def estimate_cost(usage: dict):
+    """USD cost of one call, or None when the deployment has no known price."""
+    if usage.get("tiers"):
+        costs = [estimate_cost(u) for u in usage["tiers"] if not u.get("cache_hit")]
+        return None if None in costs else sum(costs)
+    prices = PRICES_PER_1M.get(usage.get("deployment"))
+    if prices is None:
+        return None
+    input_price, cached_price, output_price = prices
+    cached = usage.get("cached_tokens", 0)
+    uncached = usage.get("prompt_tokens", 0) - cached
+    return (uncached * input_price + cached * cached_price + usage.get("completion_tokens", 0) * output_price) / 1e6
+
+
+def percentile(values, pct: float):
+    """Nearest-rank percentile; None for an empty sequence."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize_cached_tokens(records) -> dict:
+    """Aggregate the ``usage`` field of flow output records."""
+    usages = [r.get("usage") or {} for r in records]
+    prompt_tokens = sum(u.get("prompt_tokens", 0) for u in usages)
+    cached_tokens = sum(u.get("cached_tokens", 0) for u in usages)
+    return {
+        "n_rows": len(usages),
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "cached_ratio": round(cached_tokens / prompt_tokens, 4) if prompt_tokens else 0.0,
+    }
+
+
+def distinct_calls(usages) -> list:
+    """One usage per API call: rows of one batched call (same ``batch_id``) count once."""
+    calls, seen = [], set()
+    for u in usages:
+        batch_id = u.get("batch_id")
+        if batch_id is not None:
+            if batch_id in seen:
+                continue
+            seen.add(batch_id)
+        calls.append(u)
+    return calls
+
+
+def build_usage_report(records, wall_time_s: float, flow_name: str = None, n_failed: int = 0) -> dict:
+    """
+    Run-level latency / token / cost report from flow output records.
+
+    Calls, retries and latency percentiles are computed over distinct calls
+    that actually hit the API, so a batched call counts once. Tokens and cost
+    are summed over rows, which carry their share of the batch. Cache hits
+    are counted separately.
+    """
+    usages = [r.get("usage") or {} for r in records]
+    row_calls = [u for u in usages if u and not u.get("cache_hit")]
+    api_calls = distinct_calls(row_calls)
+    latencies = [u["latency_s"] for u in api_calls if u.get("latency_s") is not None]
+    n_rows = len(usages)
+
+    totals = {
+        "prompt_tokens": sum(u.get("prompt_tokens", 0) for u in usages),
+        "completion_tokens": sum(u.get("completion_tokens", 0) for u in usages),
+        "cached_tokens": sum(u.get("cached_tokens", 0) for u in usages),
+    }
+    costs = [estimate_cost(u) for u in row_calls]
+    known_costs = [c for c in costs if c is not None]
+
+    return {
+        "flow": flow_name,
+        "timestamp": datetime.now().isoformat(),
+        "n_rows": n_rows,
+        "n_failed": n_failed,
+        "n_api_calls": len(api_calls),
+        "n_cache_hits": sum(1 for u in usages if u.get("cache_hit")),
+        "n_retries": sum(u.get("retries", 0) for u in distinct_calls(usages)),
+        "latency_s": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "max": max(latencies) if latencies else None,
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        },
+        "tokens": {
+            **totals,
+            "cached_ratio": round(totals["cached_tokens"] / totals["prompt_tokens"], 4) if totals["prompt_tokens"] else 0.0,
+            "prompt_per_row": round(totals["prompt_tokens"] / n_rows, 1) if n_rows else 0.0,
+            "completion_per_row": round(totals["completion_tokens"] / n_rows, 1) if n_rows else 0.0,
+        },
+        "cost_usd": {
+            "total_estimate": round(sum(known_costs), 6),
+            "per_row": round(sum(known_costs) / n_rows, 6) if n_rows else 0.0,
+            "unpriced_calls": sum(1 for u in api_calls if estimate_cost(u) is None),
+        },
+        "deployments": sorted({t.get("deployment") for u in usages for t in (u.get("tiers") or [u])
+                               if t.get("deployment")}),
+        "tiers": {
+            "answered_by": dict(Counter(u["tier"] for u in usages if u.get("tier"))),
+            "n_escalated": sum(1 for u in usages if u.get("tier_index", 0) > 0),
+        },
+        "wall_time_s": round(wall_time_s, 3),
+        "throughput_rows_per_min": round(n_rows / wall_time_s * 60, 2) if wall_time_s > 0 else None,
+    }
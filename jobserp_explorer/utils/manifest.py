@@ -0,0 +1,127 @@
+# utils/manifest.py
+"""
+Per-stage manifests for incremental re-runs.
+
+A manifest records what a stage consumed (content hashes of its input
+files), how it was configured (parameters plus hashes of templates, schemas
+and the stage code) and what it produced. The fingerprint over those parts
+decides whether a re-run can reuse the recorded outputs, and the recorded
+outputs replace "newest file in the directory" lookups.
+
+Manifests live in ``<run>/metadata/manifests/<stage>.json``.
+"""
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+
+MANIFEST_DIRNAME = "manifests"
+
+
+def file_hash(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _hashes(paths) -> dict:
+    return {str(p): file_hash(p) for p in sorted(Path(p) for p in paths) if Path(p).is_file()}
+
+
+def fingerprint(inputs=(), params: dict = None, files=()) -> str:
+    """
+    Hash of input contents, parameters and dependency files.
+
+    Input file *names* are left out so that an upstream stage re-writing the
+    same content under a new timestamped name does not invalidate this one.
+    """
+    payload = {
+        "inputs": sorted(_hashes(inputs).values()),
+        "params": params or {},
+        "files": _hashes(files),
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _flatten(outputs) -> list:
+    if outputs is None:
+        return []
+    if isinstance(outputs, (list, tuple)):
+        return [str(p) for p in outputs if p is not None]
+    return [str(outputs)]
+
+
+def manifest_path(meta_dir, stage: str) -> Path:
+    return Path(meta_dir) / MANIFEST_DIRNAME / f"{stage}.json"
+
+
+def load_manifest(meta_dir, stage: str):
+    path = manifest_path(meta_dir, stage)
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return None
+
+
+def write_manifest(meta_dir, stage: str, outputs, inputs=(), params: dict = None, files=()) -> dict:
+    """Record a finished stage. ``outputs`` may be a path, a list of paths or None."""
+    manifest = {
+        "stage": stage,
+        "fingerprint": fingerprint(inputs, params, files),
+        "inputs": _hashes(inputs),
+        "params": params or {},
+        "files": _hashes(files),
+        "outputs": _flatten(outputs),
+        "output_kind": ("tuple" if isinstance(outputs, tuple) else "list" if isinstance(outputs, list)
+                        else "none" if outputs is None else "path"),
+        "finished_at": datetime.now().isoformat(),
+    }
+    if isinstance(outputs, tuple):  # positional outputs, some of which may be None
+        manifest["output_slots"] = [None if p is None else str(p) for p in outputs]
+    path = manifest_path(meta_dir, stage)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    return manifest
+
+
+def manifest_outputs(manifest: dict):
+    """Recorded outputs in the shape the stage returned them (path, list, tuple or None)."""
+    paths = [Path(p) for p in manifest.get("outputs", [])]
+    kind = manifest.get("output_kind", "path")
+    if kind == "tuple":
+        return tuple(None if p is None else Path(p) for p in manifest.get("output_slots", []))
+    if kind == "list":
+        return paths
+    if kind == "none":
+        return None
+    return paths[0] if paths else None
+
+
+def is_fresh(manifest, fp: str) -> bool:
+    """Same fingerprint and every recorded output still on disk."""
+    if not manifest or manifest.get("fingerprint") != fp:
+        return False
+    return all(Path(p).exists() for p in manifest.get("outputs", []))
+
+
+def latest_output(meta_dir, stage: str, fallback_dir=None, pattern: str = "*.jsonl"):
+    """
+    Output recorded by ``stage``'s manifest; runs made before manifests fall
+    back to the newest ``pattern`` file in ``fallback_dir``.
+    """
+    manifest = load_manifest(meta_dir, stage)
+    if manifest:
+        outputs = [Path(p) for p in manifest.get("outputs", []) if Path(p).exists()]
+        if outputs:
+            return outputs[-1]
+    if fallback_dir is not None:
+        candidates = sorted(Path(fallback_dir).glob(pattern), key=lambda p: p.stat().st_mtime)
+        if candidates:
+            return candidates[-1]
+    return None
@@ -0,0 +1,109 @@
+# utils/page_rules.py
+"""
+Rule-based page-type pre-classifier for SERP results.
+
+Many SERP URLs can be classified from their shape alone (ATS posting URLs,
+job-board listing pages, company profiles). Each rule carries a confidence;
+rows whose best match clears the threshold skip the LLM page classifier.
+"""
+import re
+from urllib.parse import urlparse
+
+DEFAULT_THRESHOLD = 0.9
+
+# (rule name, regex on "<netloc><path>", page_type, confidence)
+URL_RULES = [
+    # ATS posting pages
+    ("greenhouse_job", r"(^|\.)greenhouse\.io/[^/]+/jobs/\d+", "Job Posting", 0.98),
+    ("lever_job", r"^jobs\.(eu\.)?lever\.co/[^/]+/[0-9a-f]{8}-[0-9a-f-]{27}", "Job Posting", 0.98),
+    ("ashby_job", r"^jobs\.ashbyhq\.com/[^/]+/[0-9a-f]{8}-[0-9a-f-]{27}", "Job Posting", 0.98),
+    ("workable_job", r"^apply\.workable\.com/[^/]+/j/[0-9A-Z]+", "Job Posting", 0.97),
+    ("personio_job", r"\.jobs\.personio\.(de|com)/job/\d+", "Job Posting", 0.96),
+    ("breezy_job", r"\.breezy\.hr/p/[0-9a-f]+", "Job Posting", 0.95),
+    ("smartrecruiters_job", r"^jobs\.smartrecruiters\.com/[^/]+/\d+", "Job Posting", 0.95),
+
+    # ATS board indexes
+    ("greenhouse_board", r"(^|\.)greenhouse\.io/[^/]+/?$", "List of Jobs", 0.95),
+    ("lever_board", r"^jobs\.(eu\.)?lever\.co/[^/]+/?$", "List of Jobs", 0.95),
+    ("ashby_board", r"^jobs\.ashbyhq\.com/[^/]+/?$", "List of Jobs", 0.95),
+
+    # Aggregators
+    ("linkedin_job", r"(^|\.)linkedin\.com/jobs/view/", "Job Posting", 0.95),
+    ("linkedin_search", r"(^|\.)linkedin\.com/jobs/(search|collections)?", "List of Jobs", 0.9),
+    ("linkedin_company", r"(^|\.)linkedin\.com/company/", "Company Page", 0.92),
+    ("linkedin_profile", r"(^|\.)linkedin\.com/in/", "Other", 0.95),
+    ("indeed_job", r"(^|\.)indeed\.com/(viewjob|rc/clk|m/basecamp/viewjob)", "Job Posting", 0.93),
+    ("indeed_salaries", r"(^|\.)indeed\.com/cmp/[^/]+/salaries", "Other", 0.9),
+    ("indeed_company", r"(^|\.)indeed\.com/cmp/", "Company Page", 0.88),
+    ("glassdoor_job", r"(^|\.)glassdoor\.[a-z.]+/job-listing/", "Job Posting", 0.93),
+    ("glassdoor_jobs", r"(^|\.)glassdoor\.[a-z.]+/Jobs?/", "List of Jobs", 0.9),
+    ("glassdoor_company", r"(^|\.)glassdoor\.[a-z.]+/(Overview|Reviews|Salary|Salaries)/", "Company Page", 0.9),
+    ("remotive_job", r"(^|\.)remotive\.com/remote(-jobs|/jobs)/[^/]+/[^/]+-\d+/?$", "Job Posting", 0.93),
+    ("weworkremotely_job", r"(^|\.)weworkremotely\.com/remote-jobs/[^/]+-[^/]+/?$", "Job Posting", 0.9),
+    ("himalayas_job", r"(^|\.)himalayas\.app/companies/[^/]+/jobs/[^/]+", "Job Posting", 0.9),
+    ("builtin_job", r"(^|\.)builtin[a-z]*\.[a-z.]+/job/[^/]+/\d+", "Job Posting", 0.92),
+    ("remotive_company", r"(^|\.)remotive\.com/remote-companies/", "Company Page", 0.92),
+    ("wellfound_company", r"(^|\.)wellfound\.com/company/[^/]+/?(jobs)?/?$", "Company Page", 0.85),
+    ("theorg", r"(^|\.)theorg\.com/", "Company Page", 0.95),
+
+    # Generic employer-site shapes
+    ("careers_index", r"^[^/]+/(careers?|jobs|join-us|work-with-us)(/(current-openings|open-positions|openings|positions))?/?$", "List of Jobs", 0.9),
+    ("site_root", r"^[^/]+/?$", "Home Page", 0.9),
+]
+
+# (rule name, regex on the SERP title, page_type, confidence)
+TITLE_RULES = [
+    ("title_n_jobs", r"\b\d[\d,]*\+?\s+(best\s+)?[\w\s\-–&/]*\bjobs\b", "List of Jobs", 0.85),
+    ("title_jobs_search", r"\bjob (openings|search)\b|\bjobs (in|at|near)\b", "List of Jobs", 0.75),
+    ("title_salaries", r"\bsalar(y|ies)\b.*\b(in|for)\b", "Other", 0.7),
+]
+
+_URL_RULES = [(name, re.compile(rx, re.IGNORECASE), page_type, conf) for name, rx, page_type, conf in URL_RULES]
+_TITLE_RULES = [(name, re.compile(rx, re.IGNORECASE), page_type, conf) for name, rx, page_type, conf in TITLE_RULES]
+
+CRAWL_PAGE_TYPES = {"Job Posting", "List of Jobs"}
+
+
+def _url_key(url: str, domain: str = "") -> str:
+    parsed = urlparse(str(url or ""))
+    netloc = (domain or parsed.netloc or "").lower()
+    if netloc.startswith("www."):
+        netloc = netloc[4:]
+    return f"{netloc}{parsed.path or '/'}"
+
+
+def preclassify(serp_url: str, domain: str = "", label: str = "", serp_title: str = ""):
+    """
+    Best rule match for a SERP row as ``(page_type, confidence, rule)``.
+
+    Returns ``(None, 0.0, None)`` when no rule applies. ``label`` is the
+    02_label_and_score label: the generic careers/root shapes are only
+    trusted on Employer/ATS domains and down-weighted elsewhere.
+    """
+    key = _url_key(serp_url, domain)
+    best = (None, 0.0, None)
+
+    for name, rx, page_type, conf in _URL_RULES:
+        if name in ("careers_index", "site_root") and label not in ("Employer", "ATS"):
+            conf -= 0.2
+        if conf > best[1] and rx.search(key):
+            best = (page_type, conf, name)
+
+    for name, rx, page_type, conf in _TITLE_RULES:
+        if conf > best[1] and serp_title and rx.search(str(serp_title)):
+            best = (page_type, conf, name)
+
+    return best
+
+
+def rule_summary(serp_url: str, page_type: str, confidence: float, rule: str) -> dict:
+    """Rule verdict shaped like a flow_pagecateg `parsed_message` summary."""
+    return {
+        "page_url": serp_url,
+        "page_type": page_type,
+        "detected_elements": ["URL pattern"],
+        "recommend_crawl": "Yes" if page_type in CRAWL_PAGE_TYPES else "No",
+        "recommendation_reasons": [f"Matched pre-classifier rule `{rule}` (confidence {confidence:.2f})"],
+        "classified_by": "rules",
+        "confidence": confidence,
+    }
@@ -12,6 +12,7 @@ def make_run_dir(run_uid: str) -> dict:
         "scored_csv": base / "03_scored",
         "serp_jsonl_input_dir": base / "04_serp_jsonl_input",
         "page_classification_dir": base / "05_page_classification/00_jsonl_annotated",
+        "page_llm_input_dir": base / "05_page_classification/01_llm_input",
         "html_scraped_dir": base / "06_scraped_html",
         "final_scored_jsonl": base / "07_final_scored",
         "logs": base / "logs",
@@ -0,0 +1,308 @@
+# utils/perf.py
+"""
+Per-stage resource profiling, recorded in ``<run>/metadata/perf.json``.
+
+``measure(stage)`` wraps one pipeline stage and records:
+
+- wall time, CPU time (this process + finished child processes such as
+  ``pf run``) and the CPU time of the stage's own thread,
+- peak RSS while the stage ran (sampled from ``/proc/self/statm``),
+- bytes read / written by the process (``/proc/self/io``; includes sockets),
+- external API calls per service: count, errors, total and max latency.
+
+API calls are attributed through a context variable: Spider calls are
+recorded where they are made (``api_call("spider")``), OpenAI calls from the
+per-row ``usage`` records of the flow outputs (``record_usage``), since
+promptflow runs them in a subprocess.
+
+CPU, RSS and I/O are process-wide counters; when DAG stages run
+concurrently they overlap, which is why each entry lists the stages it
+``overlapped_with``.
+
+    python -m jobserp_explorer.utils.perf compare <run_uid_a> <run_uid_b>
+"""
+import argparse
+import contextvars
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+PERF_FILENAME = "perf.json"
+RSS_SAMPLE_INTERVAL_S = 0.05
+
+_current = contextvars.ContextVar("perf_stage", default=None)
+_active = {}  # id(entry) → (stage, names of stages that overlapped it so far)
+_active_lock = threading.Lock()
+_file_lock = threading.Lock()
+
+
+# === Process counters ===
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # High-water mark only: kilobytes on Linux, bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def _io_bytes():
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _children_cpu() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class _RssSampler(threading.Thread):
+    def __init__(self):
+        super().__init__(name="perf-rss", daemon=True)
+        self.peak = _rss_bytes()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(RSS_SAMPLE_INTERVAL_S):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        self.join()
+        return max(self.peak, _rss_bytes())
+
+
+# === API call attribution ===
+class _ApiStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.services = {}
+
+    def add(self, service: str, latency_s: float, calls: float = 1, error: bool = False):
+        with self._lock:
+            s = self.services.setdefault(service, {"calls": 0, "errors": 0, "total_latency_s": 0.0,
+                                                   "max_latency_s": 0.0})
+            s["calls"] += calls
+            s["errors"] += int(error)
+            s["total_latency_s"] += latency_s
+            s["max_latency_s"] = max(s["max_latency_s"], latency_s)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                name: {**s, "calls": round(s["calls"], 2), "total_latency_s": round(s["total_latency_s"], 3),
+                       "max_latency_s": round(s["max_latency_s"], 3)}
+                for name, s in self.services.items()
+            }
+
+
+def record_api_call(service: str, latency_s: float, calls: float = 1, error: bool = False):
+    """Attribute an external call to the stage being measured (no-op outside ``measure``)."""
+    stats = _current.get()
+    if stats is not None:
+        stats.add(service, latency_s, calls=calls, error=error)
+
+
+@contextmanager
+def api_call(service: str):
+    """Time the enclosed request; an exception counts as an error and is re-raised."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        record_api_call(service, time.perf_counter() - started, error=True)
+        raise
+    record_api_call(service, time.perf_counter() - started)
+
+
+def record_usage(records, service: str = "openai"):
+    """
+    Record the LLM calls behind flow output records (their ``usage`` field).
+    Rows of one batched call share it, so each counts ``1 / batch_size``.
+    """
+    for record in records:
+        usage = record.get("usage") or {}
+        if not usage or usage.get("cache_hit"):
+            continue
+        share = 1 / (usage.get("batch_size") or 1)
+        calls = len(usage.get("tiers") or [usage]) * share
+        record_api_call(service, (usage.get("latency_s") or 0.0) * share, calls=calls)
+
+
+# === Stage measurement ===
+@contextmanager
+def measure(stage: str, meta_dir=None):
+    """
+    Measure the enclosed stage and, when ``meta_dir`` is given, merge the
+    result into ``meta_dir/perf.json``. Yields the entry being filled in.
+    """
+    entry = {"stage": stage}
+    api = _ApiStats()
+    token = _current.set(api)
+    with _active_lock:
+        overlaps = set()
+        for other_stage, other_overlaps in _active.values():
+            other_overlaps.add(stage)
+            overlaps.add(other_stage)
+        _active[id(entry)] = (stage, overlaps)
+    sampler = _RssSampler()
+    sampler.start()
+
+    wall0, cpu0, thread0, children0 = time.perf_counter(), time.process_time(), time.thread_time(), _children_cpu()
+    read0, write0 = _io_bytes()
+    status = "ok"
+    try:
+        yield entry
+    except BaseException:
+        status = "failed"
+        raise
+    finally:
+        wall = time.perf_counter() - wall0
+        read1, write1 = _io_bytes()
+        with _active_lock:
+            _, overlaps = _active.pop(id(entry))
+        _current.reset(token)
+        entry.update({
+            "status": status,
+            "finished_at": datetime.now().isoformat(),
+            "wall_s": round(wall, 3),
+            "cpu_s": round(time.process_time() - cpu0 + _children_cpu() - children0, 3),
+            "thread_cpu_s": round(time.thread_time() - thread0, 3),
+            "peak_rss_mb": round(sampler.stop() / 2 ** 20, 1),
+            "read_bytes": read1 - read0 if read0 is not None else None,
+            "write_bytes": write1 - write0 if write0 is not None else None,
+            "api": api.as_dict(),
+            "overlapped_with": sorted(overlaps),
+        })
+        api_latency = sum(s["total_latency_s"] for s in entry["api"].values())
+        entry["api_latency_s"] = round(api_latency, 3)
+        if meta_dir is not None:
+            write_perf(meta_dir, entry)
+
+
+def perf_path(meta_dir) -> Path:
+    return Path(meta_dir) / PERF_FILENAME
+
+
+def load_perf(meta_dir) -> dict:
+    path = perf_path(meta_dir)
+    if not path.exists():
+        return {"stages": {}}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return {"stages": {}}
+
+
+def write_perf(meta_dir, entry: dict):
+    """
+    Merge one stage entry into ``perf.json`` (latest measurement per stage
+    wins). A stage reused from its manifest keeps the measurement of the run
+    that produced the outputs and only gets ``reused_at``.
+    """
+    with _file_lock:
+        perf = load_perf(meta_dir)
+        stages = perf.setdefault("stages", {})
+        previous = stages.get(entry["stage"])
+        if entry.get("reused") and previous and not previous.get("reused"):
+            previous["reused_at"] = entry["finished_at"]
+        else:
+            stages[entry["stage"]] = entry
+        perf["updated_at"] = datetime.now().isoformat()
+        path = perf_path(meta_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(perf, indent=2), encoding="utf-8")
+        tmp.replace(path)
+
+
+# === Comparison ===
+def _own_s(entry: dict) -> float:
+    """Wall time not spent waiting on external APIs (floored at 0: API calls may run in parallel)."""
+    return max(0.0, entry.get("wall_s", 0.0) - entry.get("api_latency_s", 0.0))
+
+
+def compare_perf(perf_a: dict, perf_b: dict) -> list:
+    """One row per stage: wall / CPU / RSS / API latency per service for both runs."""
+    stages_a, stages_b = perf_a.get("stages", {}), perf_b.get("stages", {})
+    rows = []
+    for stage in list(dict.fromkeys([*stages_a, *stages_b])):
+        a, b = stages_a.get(stage, {}), stages_b.get(stage, {})
+        services = sorted(set(a.get("api", {})) | set(b.get("api", {})))
+        rows.append({
+            "stage": stage,
+            "wall_s": (a.get("wall_s"), b.get("wall_s")),
+            "cpu_s": (a.get("cpu_s"), b.get("cpu_s")),
+            "own_s": (_own_s(a) if a else None, _own_s(b) if b else None),
+            "peak_rss_mb": (a.get("peak_rss_mb"), b.get("peak_rss_mb")),
+            "api": {
+                svc: ((a.get("api", {}).get(svc) or {}).get("total_latency_s"),
+                      (b.get("api", {}).get(svc) or {}).get("total_latency_s"),
+                      (a.get("api", {}).get(svc) or {}).get("calls"),
+                      (b.get("api", {}).get(svc) or {}).get("calls"))
+                for svc in services
+            },
+        })
+    return rows
+
+
+def _fmt(value, unit="") -> str:
+    return "-" if value is None else f"{value:.2f}{unit}"
+
+
+def _delta(a, b) -> str:
+    if a is None or b is None:
+        return ""
+    if not a:
+        return f"+{b:.1f}"
+    return f"{(b - a) / a:+.0%}"
+
+
+def print_comparison(uid_a: str, uid_b: str, rows: list):
+    print(f"A = {uid_a}\nB = {uid_b}\n")
+    print(f"{'stage':<20} {'wall A':>8} {'wall B':>8} {'Δ':>6}  {'cpu A':>7} {'cpu B':>7}  "
+          f"{'own A':>7} {'own B':>7}  {'rss A':>7} {'rss B':>7}  api latency (A → B, calls)")
+    for r in rows:
+        api = "; ".join(f"{svc} {_fmt(la, 's')} → {_fmt(lb, 's')} ({_fmt(ca)} → {_fmt(cb)})"
+                        for svc, (la, lb, ca, cb) in r["api"].items()) or "-"
+        print(f"{r['stage']:<20} {_fmt(r['wall_s'][0]):>8} {_fmt(r['wall_s'][1]):>8} "
+              f"{_delta(*r['wall_s']):>6}  {_fmt(r['cpu_s'][0]):>7} {_fmt(r['cpu_s'][1]):>7}  "
+              f"{_fmt(r['own_s'][0]):>7} {_fmt(r['own_s'][1]):>7}  "
+              f"{_fmt(r['peak_rss_mb'][0]):>7} {_fmt(r['peak_rss_mb'][1]):>7}  {api}")
+
+
+def compare_runs(uid_a: str, uid_b: str) -> list:
+    from jobserp_explorer.run_manager import RunManager
+
+    rows = compare_perf(load_perf(RunManager(uid_a).metadata_dir), load_perf(RunManager(uid_b).metadata_dir))
+    print_comparison(uid_a, uid_b, rows)
+    return rows
+
+
+# === CLI Entry Point ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage performance records.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("show", help="Print a run's perf.json")
+    show.add_argument("run_uid")
+    cmp_ = sub.add_parser("compare", help="Compare two runs stage by stage")
+    cmp_.add_argument("run_uid_a")
+    cmp_.add_argument("run_uid_b")
+    args = parser.parse_args()
+
+    if args.command == "show":
+        from jobserp_explorer.run_manager import RunManager
+        print(json.dumps(load_perf(RunManager(args.run_uid).metadata_dir), indent=2))
+    else:
+        compare_runs(args.run_uid_a, args.run_uid_b)
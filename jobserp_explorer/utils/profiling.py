@@ -0,0 +1,246 @@
+# utils/profiling.py
+"""
+Opt-in CPU profiling for the core stages and the flow tools.
+
+Profiling is off unless ``JOBSERP_PROFILE`` is truthy or a stage script is
+run with ``--profile``. A profiled stage writes to ``<log_dir>/profile/``
+(or ``JOBSERP_PROFILE_DIR``):
+
+- ``<name>_<ts>_<pid>.prof``: ``cProfile`` stats of the stage thread
+  (open with ``snakeviz`` or ``python -m pstats``),
+- ``<name>_<ts>_<pid>.collapsed``: stack samples of every thread in
+  collapsed format (``thread;outer;...;inner count``) for ``flamegraph.pl``
+  or speedscope,
+- ``<name>_<ts>_<pid>_top.txt``: top-N functions by self and cumulative time,
+
+and logs the top-N hot functions. Only one ``cProfile`` can be active per
+process, so when DAG stages overlap the later ones get stack samples only.
+
+The flow tools run inside promptflow worker processes; ``ToolProfiler``
+accumulates one profile per worker and rewrites its files every
+``FLUSH_EVERY`` calls and at exit.
+"""
+import atexit
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+PROFILE_ENV = "JOBSERP_PROFILE"
+DIR_ENV = "JOBSERP_PROFILE_DIR"
+TOP_ENV = "JOBSERP_PROFILE_TOP"
+INTERVAL_ENV = "JOBSERP_PROFILE_INTERVAL_MS"
+
+DEFAULT_PROFILE_DIR = Path(tempfile.gettempdir()) / "jobserp_profile"
+# Instrumentation threads left out of the stack samples
+IGNORED_THREADS = ("profile-sampler", "perf-rss")
+DEFAULT_TOP_N = 25
+DEFAULT_INTERVAL_MS = 5
+FLUSH_EVERY = 50
+PROFILE_ARG_HELP = "Write cProfile/collapsed-stack output to <log_dir>/profile (same as JOBSERP_PROFILE=1)"
+
+_cprofile_lock = threading.Lock()
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name) or default)
+    except ValueError:
+        return default
+
+
+def profiling_enabled() -> bool:
+    return _env_flag(PROFILE_ENV)
+
+
+def profile_dir(log_dir=None) -> Path:
+    if log_dir:
+        return Path(log_dir) / "profile"
+    return Path(os.environ.get(DIR_ENV) or DEFAULT_PROFILE_DIR)
+
+
+def add_profile_arg(parser, help: str = PROFILE_ARG_HELP):
+    """The ``--profile`` flag of a stage script."""
+    parser.add_argument("--profile", action="store_true", help=help)
+
+
+# === Stack sampling ===
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """Samples the Python stacks of all other threads every ``interval_ms``."""
+
+    def __init__(self, interval_ms: int = None):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = (interval_ms or _env_int(INTERVAL_ENV, DEFAULT_INTERVAL_MS)) / 1000
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or names.get(ident, "").startswith(IGNORED_THREADS):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                key = ";".join([names.get(ident, str(ident)), *reversed(stack)])
+                with self._lock:
+                    self.stacks[key] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def write(self, path: Path):
+        with self._lock:
+            lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+# === Reports ===
+def top_functions(stats: pstats.Stats, n: int = DEFAULT_TOP_N, sort: str = "tottime") -> list:
+    """``[(ncalls, tottime, cumtime, "file:line(func)")]`` for the top ``n`` functions."""
+    index = {"tottime": 1, "cumtime": 2}[sort]
+    rows = [
+        (nc, tt, ct, f"{Path(filename).name}:{line}({func})")
+        for (filename, line, func), (_, nc, tt, ct, _) in stats.stats.items()
+    ]
+    return sorted(rows, key=lambda r: r[index], reverse=True)[:n]
+
+
+def write_reports(name: str, out_dir: Path, profile: cProfile.Profile = None, sampler: StackSampler = None,
+                  top_n: int = None, stem: str = None) -> dict:
+    """Dump the ``.prof`` / ``.collapsed`` / ``_top.txt`` files and log the hot functions."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = stem or f"{name}_{datetime.now().strftime('%Y%m%dT%H%M%S')}_{os.getpid()}"
+    top_n = top_n or _env_int(TOP_ENV, DEFAULT_TOP_N)
+    files = {}
+
+    if sampler is not None:
+        files["collapsed"] = out_dir / f"{stem}.collapsed"
+        sampler.write(files["collapsed"])
+
+    if profile is not None:
+        files["prof"] = out_dir / f"{stem}.prof"
+        profile.dump_stats(files["prof"])
+        try:
+            stats = pstats.Stats(profile, stream=io.StringIO())
+        except TypeError:  # nothing was recorded
+            stats = None
+        if stats is not None:
+            report = [f"# {name}: top {top_n} functions"]
+            for sort in ("tottime", "cumtime"):
+                report.append(f"\n## by {sort}\n{'ncalls':>10} {'tottime':>9} {'cumtime':>9}  function")
+                report += [f"{nc:>10} {tt:>9.3f} {ct:>9.3f}  {fn}" for nc, tt, ct, fn in top_functions(stats, top_n, sort)]
+            files["top"] = out_dir / f"{stem}_top.txt"
+            files["top"].write_text("\n".join(report) + "\n", encoding="utf-8")
+
+            hot = top_functions(stats, top_n, "tottime")
+            logging.info(f"[PROFILE] {name}: top {len(hot)} functions by self time → {files['prof']}")
+            for nc, tt, ct, fn in hot:
+                logging.info(f"[PROFILE] {name}: {tt:8.3f}s self {ct:8.3f}s cum {nc:>8} calls  {fn}")
+
+    return files
+
+
+# === Hooks ===
+@contextmanager
+def profiled(name: str, log_dir=None, enabled: bool = False):
+    """
+    Profile the enclosed block when ``enabled`` or ``JOBSERP_PROFILE`` is set;
+    otherwise a no-op.
+    """
+    if not (enabled or profiling_enabled()):
+        yield
+        return
+
+    sampler = StackSampler()
+    sampler.start()
+    profile = cProfile.Profile() if _cprofile_lock.acquire(blocking=False) else None
+    started = time.perf_counter()
+    if profile is not None:
+        profile.enable()
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.disable()
+            _cprofile_lock.release()
+        sampler.stop()
+        files = write_reports(name, profile_dir(log_dir), profile, sampler)
+        print(f"[ℹ] Profiled {name} ({time.perf_counter() - started:.1f}s) → {files.get('prof') or files['collapsed']}")
+
+
+class ToolProfiler:
+    """
+    Per-process profile for a flow tool, used as ``with profiler(): ...``
+    around the tool body. When ``JOBSERP_PROFILE`` is set, calls are profiled
+    into one profile per worker process (calls that overlap an already
+    profiled one are covered by stack samples only).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.profile = None
+        self.sampler = None
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._stem = None
+
+    def _start(self):
+        self._stem = f"{self.name}_{datetime.now().strftime('%Y%m%dT%H%M%S')}_{os.getpid()}"
+        self.profile = cProfile.Profile()
+        self.sampler = StackSampler()
+        self.sampler.start()
+        atexit.register(self.flush)
+
+    def flush(self):
+        # dump_stats disables the profile, so wait until no call is being profiled
+        with _cprofile_lock, self._lock:
+            if self.profile is not None:
+                write_reports(self.name, profile_dir(), self.profile, self.sampler, stem=self._stem)
+
+    @contextmanager
+    def __call__(self):
+        if not profiling_enabled():
+            yield
+            return
+        with self._lock:
+            if self.profile is None:
+                self._start()
+        owns = _cprofile_lock.acquire(blocking=False)
+        if owns:
+            self.profile.enable()
+        try:
+            yield
+        finally:
+            if owns:
+                self.profile.disable()
+                _cprofile_lock.release()
+            with self._lock:
+                self.calls += 1
+                due = self.calls % FLUSH_EVERY == 0
+            if due:
+                self.flush()
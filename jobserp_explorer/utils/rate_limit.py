@@ -0,0 +1,278 @@
+# utils/rate_limit.py
+"""
+Token-bucket rate limiter shared by every LLM worker thread and process.
+
+Each deployment has one bucket of requests and one of tokens, stored in a
+small SQLite database (WAL mode, ``BEGIN IMMEDIATE`` for the read-modify-
+write), so promptflow workers in separate processes draw from the same
+per-minute budget. Callers ``acquire`` an estimated token count before a
+request and block until it fits; ``update`` corrects the estimate with the
+real usage and the provider's ``x-ratelimit-*`` headers; ``penalize``
+pauses the bucket after a 429.
+
+Environment:
+- ``JOBSERP_LLM_RPM`` / ``JOBSERP_LLM_TPM``: requests / tokens per minute.
+  The limiter is disabled (and never opens the database) unless at least
+  one of them is set.
+- ``JOBSERP_SPIDER_RPM``: requests per minute to the Spider API (search and
+  scrape), shared the same way. Disabled when unset.
+- ``JOBSERP_RATE_LIMIT_PATH``: database location.
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from jobserp_explorer.config.paths import RATE_LIMIT_PATH
+
+RPM_ENV = "JOBSERP_LLM_RPM"
+TPM_ENV = "JOBSERP_LLM_TPM"
+SPIDER_RPM_ENV = "JOBSERP_SPIDER_RPM"
+PATH_ENV = "JOBSERP_RATE_LIMIT_PATH"
+
+# Rough prompt token estimate for OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    requests REAL NOT NULL,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    blocked_until REAL NOT NULL DEFAULT 0
+);
+"""
+
+_DURATION_PART = re.compile(r"([\d.]+)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def estimate_tokens(payload) -> int:
+    """Prompt token estimate for a request payload (messages, tools, ...)."""
+    text = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False, default=str)
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def parse_duration(value) -> float:
+    """``"6m0s"`` / ``"1.5s"`` / ``"20ms"`` / ``"2"`` → seconds (0.0 when unparseable)."""
+    if value is None:
+        return 0.0
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in _DURATION_PART.findall(value))
+
+
+class RateLimiter:
+    def __init__(self, path: Path = RATE_LIMIT_PATH, rpm: float = 0, tpm: float = 0):
+        self.path = Path(path)
+        self.rpm = float(rpm or 0)
+        self.tpm = float(tpm or 0)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.rpm > 0 or self.tpm > 0
+
+    def _db(self) -> sqlite3.Connection:
+        """The database connection, opened on first use (callers hold ``_lock``); a disabled limiter never opens it."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _transaction(self, name: str, fn):
+        """Run ``fn(requests, tokens, blocked_until, now)`` on a refilled bucket and store its result."""
+        with self._lock:
+            conn = self._db()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = conn.execute(
+                    "SELECT requests, tokens, updated_at, blocked_until FROM buckets WHERE name = ?", (name,)
+                ).fetchone()
+                if row is None:
+                    requests, tokens, blocked_until = self.rpm, self.tpm, 0.0
+                else:
+                    requests, tokens, updated_at, blocked_until = row
+                    elapsed = max(0.0, now - updated_at)
+                    requests = min(self.rpm, requests + elapsed * self.rpm / 60)
+                    tokens = min(self.tpm, tokens + elapsed * self.tpm / 60)
+
+                requests, tokens, blocked_until, result = fn(requests, tokens, blocked_until, now)
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets(name, requests, tokens, updated_at, blocked_until) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (name, requests, tokens, now, blocked_until),
+                )
+                conn.execute("COMMIT")
+                return result
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _try_take(self, name: str, n_tokens: int) -> float:
+        """Take one request and ``n_tokens`` if available; otherwise return the seconds to wait."""
+        # A single request larger than the whole budget waits for a full bucket
+        need = min(n_tokens, self.tpm) if self.tpm else 0
+
+        def take(requests, tokens, blocked_until, now):
+            if blocked_until > now:
+                return requests, tokens, blocked_until, blocked_until - now
+            waits = []
+            if self.rpm and requests < 1:
+                waits.append((1 - requests) * 60 / self.rpm)
+            if self.tpm and tokens < need:
+                waits.append((need - tokens) * 60 / self.tpm)
+            if waits:
+                return requests, tokens, blocked_until, max(waits)
+            if self.rpm:
+                requests -= 1
+            if self.tpm:
+                tokens -= n_tokens
+            return requests, tokens, blocked_until, 0.0
+
+        return self._transaction(name, take)
+
+    def acquire(self, name: str, n_tokens: int = 0) -> float:
+        """Block until one request of ``n_tokens`` fits the budget; returns the seconds waited."""
+        if not self.enabled:
+            return 0.0
+        started = time.perf_counter()
+        while True:
+            wait = self._try_take(name, n_tokens)
+            if wait <= 0:
+                return time.perf_counter() - started
+            time.sleep(min(wait, 5.0) + 0.01)
+
+    def update(self, name: str, estimated_tokens: int = 0, actual_tokens: int = None, headers=None):
+        """
+        Reconcile a finished call: charge the difference between estimated and
+        actual tokens, then clamp the buckets to what the provider reports as
+        remaining (``x-ratelimit-remaining-requests`` / ``-tokens``).
+        """
+        if not self.enabled:
+            return
+        headers = headers or {}
+        remaining_requests = _header_float(headers, "x-ratelimit-remaining-requests")
+        remaining_tokens = _header_float(headers, "x-ratelimit-remaining-tokens")
+
+        def reconcile(requests, tokens, blocked_until, now):
+            if self.tpm and actual_tokens is not None:
+                tokens -= actual_tokens - estimated_tokens
+            if self.rpm and remaining_requests is not None:
+                requests = min(requests, remaining_requests)
+            if self.tpm and remaining_tokens is not None:
+                tokens = min(tokens, remaining_tokens)
+            return requests, tokens, blocked_until, None
+
+        self._transaction(name, reconcile)
+
+    def penalize(self, name: str, retry_after: float):
+        """Pause the bucket for every worker after a 429."""
+        if not self.enabled:
+            return
+
+        def block(requests, tokens, blocked_until, now):
+            return requests, tokens, max(blocked_until, now + retry_after), None
+
+        self._transaction(name, block)
+
+    def status(self) -> dict:
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT name, requests, tokens, updated_at, blocked_until FROM buckets ORDER BY name"
+            ).fetchall()
+        return {
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "buckets": {
+                name: {"requests": round(r, 2), "tokens": round(t, 1), "updated_at": u,
+                       "blocked_for_s": round(max(0.0, b - time.time()), 2)}
+                for name, r, t, u, b in rows
+            },
+        }
+
+    def reset(self):
+        with self._lock:
+            self._db().execute("DELETE FROM buckets")
+
+
+def _header_float(headers, name: str):
+    try:
+        value = headers.get(name)
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_seconds(headers, default: float = 1.0) -> float:
+    """Seconds to back off after a 429, from ``retry-after`` or the reset headers."""
+    headers = headers or {}
+    for name in ("retry-after-ms", "retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        value = headers.get(name)
+        if value is None:
+            continue
+        seconds = parse_duration(value)
+        if name == "retry-after-ms":
+            seconds /= 1000
+        if seconds > 0:
+            return seconds
+    return default
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+# kind → (RPM env var, TPM env var)
+_LIMIT_ENVS = {
+    "llm": (RPM_ENV, TPM_ENV),
+    "spider": (SPIDER_RPM_ENV, None),
+}
+
+
+def get_rate_limiter(kind: str = "llm") -> RateLimiter:
+    """
+    Process-wide limiter for ``kind`` ("llm" or "spider") and the current
+    database path, configured from the environment on first use.
+    """
+    path = Path(os.environ.get(PATH_ENV) or RATE_LIMIT_PATH)
+    with _limiters_lock:
+        if (kind, path) not in _limiters:
+            def _env_float(name):
+                try:
+                    return float(os.environ.get(name) or 0) if name else 0.0
+                except ValueError:
+                    return 0.0
+
+            rpm_env, tpm_env = _LIMIT_ENVS[kind]
+            _limiters[kind, path] = RateLimiter(
+                path=path,
+                rpm=_env_float(rpm_env),
+                tpm=_env_float(tpm_env),
+            )
+        return _limiters[kind, path]
+
+
+# === CLI Entry Point ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or reset the shared LLM rate-limit buckets.")
+    parser.add_argument("--reset", action="store_true", help="Drop all bucket state")
+    args = parser.parse_args()
+
+    limiters = {kind: get_rate_limiter(kind) for kind in _LIMIT_ENVS}
+    if args.reset:
+        limiters["llm"].reset()
+        print(f"[✓] Reset rate-limit buckets at {limiters['llm'].path}")
+    print(json.dumps({kind: limiter.status() for kind, limiter in limiters.items()}, indent=2))
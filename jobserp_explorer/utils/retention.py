@@ -0,0 +1,383 @@
+# utils/retention.py
+"""
+Retention for run directories and promptflow run folders.
+
+- ``pack_run``: moves a finished run's outputs (per-query ``serp_*.jsonl``,
+  tables, logs, flow outputs) into one zip at
+  ``data/01_fetch_serps/archive/run_<uid>.zip``. ``metadata/`` stays on disk
+  so manifests, the catalog and ``meta.json`` keep working. Zip members are
+  compressed one by one, so ``RunManager.artifact`` / ``read_log`` extract
+  only the member they need (into ``data/cache/unpacked``).
+- Scraped bodies (``scraped_data`` of the 05 JSONL) are deduplicated across
+  runs while packing. Each body is stored once, zlib-compressed, in
+  ``archive/bodies.sqlite`` and referenced by hash from the archived JSONL.
+  Extracted files get their bodies back.
+- ``gc_promptflow_runs``: deletes ``~/.promptflow/.runs`` folders older than
+  a policy, keeping the newest few per flow. ``pf``'s own run records are
+  not touched. It also clears members extracted before the same cutoff.
+
+Every operation returns the bytes it reclaimed.
+
+    jobserp-explorer runs pack --older_than_days 7 [--dry_run]
+    jobserp-explorer runs unpack UID
+    jobserp-explorer runs gc --older_than_days 14 --keep 20
+"""
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import zipfile
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+from jobserp_explorer.config.paths import CACHE_DIR
+
+ARCHIVE_DIR_ENV = "JOBSERP_ARCHIVE_DIR"
+UNPACK_DIR_ENV = "JOBSERP_UNPACK_DIR"
+UNPACK_DIR = CACHE_DIR / "unpacked"
+PACKAGE_DIR = Path(__file__).resolve().parents[1]
+ARCHIVE_INFO = "archive.json"  # in <run>/metadata once packed
+KEEP_UNPACKED = ("metadata",)
+BODY_DIRS = ("06_scraped_html",)  # members whose records carry ``scraped_data``
+STORED_SUFFIXES = (".parquet", ".zip", ".gz", ".zst")  # already compressed
+
+_BODY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bodies (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def archive_dir() -> Path:
+    from jobserp_explorer.run_manager import RunManager
+    return Path(os.environ.get(ARCHIVE_DIR_ENV) or RunManager.BASE_DIR / "archive")
+
+
+def unpack_dir() -> Path:
+    return Path(os.environ.get(UNPACK_DIR_ENV) or UNPACK_DIR)
+
+
+def dir_size(path) -> int:
+    path = Path(path)
+    if path.is_file():
+        return path.stat().st_size
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file() and not f.is_symlink())
+
+
+def fmt_bytes(n: int) -> str:
+    return f"{n / 1e6:.1f} MB"
+
+
+# === Deduplicated scraped bodies ===
+class BodyStore:
+    """Content-addressed store of scraped bodies (JSON values), one row per distinct body."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_BODY_SCHEMA)
+
+    @staticmethod
+    def key(body: str) -> str:
+        return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+    def put(self, body: str) -> tuple:
+        """Store ``body`` (a JSON string) once; returns ``(hash, bytes newly stored)``."""
+        key = self.key(body)
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM bodies WHERE hash = ?", (key,)).fetchone():
+                return key, 0
+            data = zlib.compress(body.encode("utf-8"), 6)
+            self._conn.execute("INSERT OR IGNORE INTO bodies(hash, size, data, created_at) VALUES (?, ?, ?, ?)",
+                               (key, len(body), data, time.time()))
+        return key, len(data)
+
+    def get(self, key: str):
+        row = self._conn.execute("SELECT data FROM bodies WHERE hash = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(f"scraped body {key} missing from {self.path}")
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def stats(self) -> dict:
+        n, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM bodies").fetchone()
+        return {"bodies": n, "body_bytes": size, "file_bytes": self.path.stat().st_size}
+
+
+_stores = {}
+
+
+def get_body_store() -> BodyStore:
+    path = archive_dir() / "bodies.sqlite"
+    if path not in _stores:
+        _stores[path] = BodyStore(path)
+    return _stores[path]
+
+
+def _is_body_member(name: str) -> bool:
+    return name.endswith(".jsonl") and name.split("/", 1)[0] in BODY_DIRS
+
+
+def dedupe_bodies(lines: Iterable[str], store: BodyStore) -> tuple:
+    """Replace each record's ``scraped_data`` with ``{"$body": hash}``; returns ``(text, new bytes stored)``."""
+    out, stored = [], 0
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        content = record.get("scraped_data")
+        if content:
+            key, n = store.put(json.dumps(content, ensure_ascii=False))
+            record["scraped_data"] = {"$body": key}
+            stored += n
+        out.append(json.dumps(record, ensure_ascii=False) + "\n")
+    return "".join(out), stored
+
+
+def restore_bodies(lines: Iterable[str], store: BodyStore) -> str:
+    out = []
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        content = record.get("scraped_data")
+        if isinstance(content, dict) and set(content) == {"$body"}:
+            record["scraped_data"] = store.get(content["$body"])
+        out.append(json.dumps(record, ensure_ascii=False) + "\n")
+    return "".join(out)
+
+
+# === Run archives ===
+class RunArchive:
+    """Read access to a packed run; members are paths relative to the run directory."""
+
+    def __init__(self, run_dir, zip_path):
+        self.run_dir = Path(run_dir)
+        self.zip_path = Path(zip_path)
+        self.run_uid = self.run_dir.name.replace("run_", "", 1)
+        with zipfile.ZipFile(self.zip_path) as zf:
+            self._infos = {info.filename: info for info in zf.infolist()}
+
+    @classmethod
+    def open(cls, run_dir) -> Optional["RunArchive"]:
+        """The archive of ``run_dir``, or None when the run is not packed."""
+        info_file = Path(run_dir) / "metadata" / ARCHIVE_INFO
+        if not info_file.exists():
+            return None
+        zip_path = Path(json.loads(info_file.read_text(encoding="utf-8"))["archive"])
+        return cls(run_dir, zip_path) if zip_path.exists() else None
+
+    def names(self) -> list:
+        return sorted(self._infos)
+
+    def member(self, path) -> Optional[str]:
+        """Member name of ``path`` (a path inside the run directory), if archived."""
+        try:
+            name = Path(path).resolve().relative_to(self.run_dir.resolve()).as_posix()
+        except ValueError:
+            return None
+        return name if name in self._infos else None
+
+    def latest(self, directory, patterns) -> Optional[str]:
+        """Newest member in ``directory`` matching one of ``patterns`` (Parquet wins ties with CSV)."""
+        name = self.member(directory)
+        if name is not None:
+            return name
+        try:
+            prefix = Path(directory).resolve().relative_to(self.run_dir.resolve()).as_posix()
+        except ValueError:
+            return None
+        candidates = [
+            info for n, info in self._infos.items()
+            if n.rsplit("/", 1)[0] == prefix and any(fnmatch.fnmatch(n.rsplit("/", 1)[-1], p) for p in patterns)
+        ]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda i: (i.date_time, i.filename.endswith(".parquet"))).filename
+
+    def extract(self, name: str) -> Path:
+        """Member ``name`` as a file under the extraction cache (re-used while it is up to date)."""
+        out = unpack_dir() / self.run_uid / name
+        if out.exists() and out.stat().st_mtime >= self.zip_path.stat().st_mtime:
+            return out
+        self._write_member(name, out)
+        return out
+
+    def read_text(self, name: str) -> str:
+        with zipfile.ZipFile(self.zip_path) as zf:
+            return zf.read(name).decode("utf-8")
+
+    def _write_member(self, name: str, out: Path):
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_name(f"{out.name}.{os.getpid()}.tmp")
+        with zipfile.ZipFile(self.zip_path) as zf:
+            if _is_body_member(name):
+                with zf.open(name) as src:
+                    text = restore_bodies((line.decode("utf-8") for line in src), get_body_store())
+                tmp.write_text(text, encoding="utf-8")
+            else:
+                with zf.open(name) as src, open(tmp, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+        os.replace(tmp, out)
+
+    def unpack(self) -> int:
+        """Restore every member into the run directory and delete the archive; returns its size."""
+        for name in self.names():
+            self._write_member(name, self.run_dir / name)
+        size = self.zip_path.stat().st_size
+        self.zip_path.unlink()
+        (self.run_dir / "metadata" / ARCHIVE_INFO).unlink(missing_ok=True)
+        shutil.rmtree(unpack_dir() / self.run_uid, ignore_errors=True)
+        return size
+
+
+def is_finished(run_uid: str, older_than_days: float = 0) -> bool:
+    """No stage running, at least one stage done, and nothing written for ``older_than_days``."""
+    from jobserp_explorer.run_manager import RunManager
+
+    run = RunManager(run_uid)
+    steps = run.steps()
+    if not steps or any(s["status"] == "running" for s in steps.values()):
+        return False
+    if not any(s["status"] in ("done", "reused") for s in steps.values()):
+        return False
+    files = [f for f in run.run_dir.rglob("*") if f.is_file()]
+    newest = max((f.stat().st_mtime for f in files), default=0)
+    return time.time() - newest >= older_than_days * 86400
+
+
+def pack_run(run_uid: str, dry_run: bool = False) -> dict:
+    """
+    Pack ``run_uid``'s outputs (everything but ``metadata/``) into its archive
+    and delete them from the run directory. Records are ingested into the
+    warehouse first, so cross-run queries still see them.
+    """
+    from jobserp_explorer.run_manager import RunManager
+    from jobserp_explorer.utils import warehouse
+
+    run = RunManager(run_uid)
+    files = sorted(f for f in run.run_dir.rglob("*")
+                   if f.is_file() and f.relative_to(run.run_dir).parts[0] not in KEEP_UNPACKED)
+    before = sum(f.stat().st_size for f in files)
+    report = {"run_uid": run_uid, "files": len(files), "bytes_before": before, "bytes_after": 0,
+              "body_bytes": 0, "reclaimed": 0}
+    if not files or RunArchive.open(run.run_dir) is not None:
+        return report
+    if dry_run:
+        return report
+
+    warehouse.record("ingest_run", run_uid)
+    store = get_body_store()
+    zip_path = archive_dir() / f"run_{run_uid}.zip"
+    zip_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = zip_path.with_name(f"{zip_path.name}.{os.getpid()}.tmp")
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        for f in files:
+            name = f.relative_to(run.run_dir).as_posix()
+            info = zipfile.ZipInfo.from_file(f, name)
+            info.compress_type = zipfile.ZIP_STORED if f.suffix in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+            if _is_body_member(name):
+                with open(f, "r", encoding="utf-8") as src:
+                    text, stored = dedupe_bodies(src, store)
+                report["body_bytes"] += stored
+                zf.writestr(info, text)
+            else:
+                with open(f, "rb") as src, zf.open(info, "w") as dst:
+                    shutil.copyfileobj(src, dst)
+    with zipfile.ZipFile(tmp) as zf:
+        bad = zf.testzip()
+    if bad is not None:
+        tmp.unlink()
+        raise RuntimeError(f"[✗] Archive of {run_uid} failed its CRC check at {bad}")
+    os.replace(tmp, zip_path)
+
+    run.metadata_dir.mkdir(parents=True, exist_ok=True)
+    (run.metadata_dir / ARCHIVE_INFO).write_text(json.dumps({
+        "archive": str(zip_path.resolve()), "packed_at": datetime.now().isoformat(timespec="seconds"),
+        "files": len(files), "bytes_before": before,
+    }, indent=2), encoding="utf-8")
+    for f in files:
+        f.unlink()
+    for d in sorted((d for d in run.run_dir.rglob("*") if d.is_dir()), key=lambda d: len(d.parts), reverse=True):
+        if not any(d.iterdir()):
+            d.rmdir()
+
+    report["bytes_after"] = zip_path.stat().st_size
+    report["reclaimed"] = before - report["bytes_after"] - report["body_bytes"]
+    return report
+
+
+def pack_runs(run_uids=None, older_than_days: float = 7, dry_run: bool = False) -> list:
+    """Pack ``run_uids`` (default: every finished run idle for ``older_than_days``)."""
+    from jobserp_explorer.run_manager import RunManager
+
+    if run_uids is None:
+        run_uids = [uid for uid in RunManager.list_runs()
+                    if RunArchive.open(RunManager(uid).run_dir) is None and is_finished(uid, older_than_days)]
+    return [pack_run(uid, dry_run=dry_run) for uid in run_uids]
+
+
+# === Promptflow run folders ===
+def promptflow_runs_dir() -> Path:
+    pf_home = Path(os.environ.get("PROMPTFLOW_HOME", Path.home() / ".promptflow"))
+    return pf_home / ".runs"
+
+
+def flow_of_run(name: str) -> Optional[str]:
+    """
+    Flow of this package a promptflow run folder belongs to, e.g.
+    ``flow_pagecateg``; None for runs of other projects sharing ``.runs``.
+    """
+    flows = [d.name for d in PACKAGE_DIR.glob("flow_*") if d.is_dir()]
+    return max((f for f in flows if name.startswith(f + "_")), key=len, default=None)
+
+
+def gc_promptflow_runs(older_than_days: float = 14, keep: int = 20, dry_run: bool = False) -> dict:
+    """
+    Delete promptflow run folders older than ``older_than_days``, keeping the
+    ``keep`` newest per flow (``<flow>_<run_uid>_<ts>`` from 09, or pf's own
+    ``<flow>_variant_*`` names). Only runs of this package's ``flow_*``
+    directories are considered. 09 copies ``outputs.jsonl``
+    into the run directory, so nothing downstream reads these folders.
+    """
+    runs_dir = promptflow_runs_dir()
+    by_flow = {}
+    for d in runs_dir.glob("*") if runs_dir.exists() else []:
+        flow = flow_of_run(d.name) if d.is_dir() else None
+        if flow is not None:
+            by_flow.setdefault(flow, []).append((d.stat().st_mtime, d))
+
+    cutoff = time.time() - older_than_days * 86400
+    deleted, reclaimed = [], 0
+    for flow_runs in by_flow.values():
+        flow_runs.sort(reverse=True)
+        for mtime, d in flow_runs[keep:]:
+            if mtime >= cutoff:
+                continue
+            reclaimed += dir_size(d)
+            deleted.append(d.name)
+            if not dry_run:
+                shutil.rmtree(d, ignore_errors=True)
+
+    unpacked = unpack_dir()
+    n_unpacked = 0
+    for f in unpacked.rglob("*") if unpacked.exists() else []:
+        if f.is_file() and f.stat().st_mtime < cutoff:
+            reclaimed += f.stat().st_size
+            n_unpacked += 1
+            if not dry_run:
+                f.unlink()
+    return {"runs_dir": str(runs_dir), "deleted": deleted, "kept": sum(len(v) for v in by_flow.values()) - len(deleted),
+            "unpacked_files": n_unpacked, "reclaimed": reclaimed}
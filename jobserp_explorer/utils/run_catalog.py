@@ -0,0 +1,314 @@
+# utils/run_catalog.py
+"""
+SQLite catalog of runs, their steps and artifacts.
+
+The pipeline updates it as runs are created and stages start and finish, so
+``RunManager.list_runs()`` and the Streamlit tabs answer with indexed
+lookups instead of globbing ``run_*`` directories and parsing ``meta.json``
+on every rerun. ``rebuild`` reconstructs it from disk (``meta.json``,
+stage manifests and step directories) for runs made before the catalog or
+outside the pipeline.
+
+Catalog writes never fail a stage: errors are logged and the catalog can be
+rebuilt.
+
+- ``JOBSERP_CATALOG_PATH``: database location (default
+  ``<RunManager.BASE_DIR>/catalog.sqlite``).
+
+    jobserp-explorer runs rebuild
+"""
+import csv
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+PATH_ENV = "JOBSERP_CATALOG_PATH"
+CATALOG_FILENAME = "catalog.sqlite"
+
+# pipeline stage → run directory key (see make_run_dir) holding its outputs
+STAGE_DIRS = {
+    "fetch_jobs": "query_csv",
+    "fetch_serps": "scraped_jsonl",
+    "label_and_score": "scored_csv",
+    "export_jsonl": "serp_jsonl_input_dir",
+    "preclassify_pages": "page_classification_dir",
+    "classify_pages": "page_classification_dir",
+    "scrape_pages": "html_scraped_dir",
+    "score_matches": "final_scored_jsonl",
+}
+# Files a stage directory holds when the run predates manifests
+STAGE_PATTERNS = {
+    "fetch_serps": "serp_expanded_*.csv",  # or .parquet (see utils/tables.py)
+    "label_and_score": "*_results.csv",
+    "export_jsonl": "serp_class_input_*.jsonl",
+    "preclassify_pages": "*_rules_*.jsonl",
+    "classify_pages": "*_flow_pagecateg*.jsonl",
+    "scrape_pages": "*.jsonl",
+    "score_matches": "*.jsonl",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_uid TEXT PRIMARY KEY,
+    query TEXT,
+    created_at TEXT,
+    updated_at TEXT NOT NULL,
+    run_dir TEXT,
+    meta TEXT
+);
+CREATE TABLE IF NOT EXISTS steps (
+    run_uid TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    n_rows INTEGER,
+    PRIMARY KEY (run_uid, stage)
+);
+CREATE INDEX IF NOT EXISTS idx_steps_stage ON steps(stage, status);
+CREATE TABLE IF NOT EXISTS artifacts (
+    path TEXT PRIMARY KEY,
+    run_uid TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    n_rows INTEGER,
+    size_bytes INTEGER,
+    mtime REAL
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_run_stage ON artifacts(run_uid, stage, mtime);
+"""
+
+
+def run_uid_from_dir(run_dir) -> str:
+    name = Path(run_dir).name
+    return name[len("run_"):] if name.startswith("run_") else name
+
+
+def count_rows(path) -> int:
+    """Records in a JSONL file (line count) or data rows in a CSV (quoted newlines allowed)."""
+    path = Path(path)
+    if not path.is_file():
+        return None
+    if path.suffix == ".parquet":
+        from jobserp_explorer.utils.tables import table_rows
+        return table_rows(path)
+    if path.suffix != ".jsonl":  # CSV, including the suffix-less 00_query file
+        with open(path, newline="", encoding="utf-8", errors="replace") as f:
+            return max(0, sum(1 for _ in csv.reader(f)) - 1)
+    n, last = 0, b"\n"
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            n += chunk.count(b"\n")
+            last = chunk[-1:]
+    return n + (last != b"\n")  # no trailing newline
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class RunCatalog:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # === Writes ===
+    def upsert_run(self, run_uid: str, meta: dict = None, run_dir=None):
+        meta = meta or {}
+        self._execute(
+            "INSERT INTO runs(run_uid, query, created_at, updated_at, run_dir, meta) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(run_uid) DO UPDATE SET query = COALESCE(excluded.query, query), "
+            "created_at = COALESCE(excluded.created_at, created_at), updated_at = excluded.updated_at, "
+            "run_dir = COALESCE(excluded.run_dir, run_dir), meta = COALESCE(excluded.meta, meta)",
+            (run_uid, meta.get("query"), meta.get("timestamp"), _now(), str(run_dir) if run_dir else None,
+             json.dumps(meta) if meta else None),
+        )
+
+    def step_started(self, run_uid: str, stage: str):
+        self.upsert_run(run_uid)
+        self._execute(
+            "INSERT INTO steps(run_uid, stage, status, started_at) VALUES (?, ?, 'running', ?) "
+            "ON CONFLICT(run_uid, stage) DO UPDATE SET status = 'running', started_at = excluded.started_at",
+            (run_uid, stage, _now()),
+        )
+
+    def step_finished(self, run_uid: str, stage: str, status: str = "done", outputs=(), finished_at: str = None):
+        """Mark a step ``done`` / ``reused`` / ``failed`` and register its output files."""
+        artifacts = []
+        for path in outputs or []:
+            path = Path(path)
+            if path.is_file():
+                stat = path.stat()
+                artifacts.append((str(path), run_uid, stage, count_rows(path), stat.st_size, stat.st_mtime))
+        n_rows = sum(a[3] or 0 for a in artifacts) if artifacts else None
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("INSERT OR IGNORE INTO runs(run_uid, updated_at) VALUES (?, ?)",
+                                   (run_uid, _now()))
+                self._conn.execute(
+                    "INSERT INTO steps(run_uid, stage, status, finished_at, n_rows) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(run_uid, stage) DO UPDATE SET status = excluded.status, "
+                    "finished_at = excluded.finished_at, n_rows = COALESCE(excluded.n_rows, n_rows)",
+                    (run_uid, stage, status, finished_at or _now(), n_rows),
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO artifacts(path, run_uid, stage, n_rows, size_bytes, mtime) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", artifacts)
+                self._conn.execute("UPDATE runs SET updated_at = ? WHERE run_uid = ?", (_now(), run_uid))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete_run(self, run_uid: str):
+        with self._lock:
+            for table in ("artifacts", "steps", "runs"):
+                self._conn.execute(f"DELETE FROM {table} WHERE run_uid = ?", (run_uid,))
+
+    # === Reads ===
+    def list_runs(self, limit: int = None) -> list:
+        """Run UIDs, newest first (same order as sorting the ``run_*`` directories)."""
+        sql = "SELECT run_uid FROM runs ORDER BY run_uid DESC" + (" LIMIT ?" if limit else "")
+        return [row[0] for row in self._execute(sql, (limit,) if limit else ())]
+
+    def runs_with_step(self, stage: str, statuses=("done", "reused")) -> list:
+        marks = ",".join("?" * len(statuses))
+        return [row[0] for row in self._execute(
+            f"SELECT run_uid FROM steps WHERE stage = ? AND status IN ({marks}) ORDER BY run_uid DESC",
+            (stage, *statuses))]
+
+    def get_run(self, run_uid: str):
+        rows = self._execute("SELECT run_uid, query, created_at, updated_at, run_dir, meta FROM runs "
+                             "WHERE run_uid = ?", (run_uid,))
+        if not rows:
+            return None
+        run_uid, query, created_at, updated_at, run_dir, meta = rows[0]
+        return {"run_uid": run_uid, "query": query, "created_at": created_at, "updated_at": updated_at,
+                "run_dir": run_dir, "meta": json.loads(meta) if meta else {}, "steps": self.steps(run_uid)}
+
+    def steps(self, run_uid: str) -> dict:
+        return {
+            stage: {"status": status, "started_at": started, "finished_at": finished, "n_rows": n_rows}
+            for stage, status, started, finished, n_rows in self._execute(
+                "SELECT stage, status, started_at, finished_at, n_rows FROM steps WHERE run_uid = ?", (run_uid,))
+        }
+
+    def artifacts(self, run_uid: str, stage: str = None) -> list:
+        sql = "SELECT path, stage, n_rows, size_bytes, mtime FROM artifacts WHERE run_uid = ?"
+        params = [run_uid]
+        if stage:
+            sql += " AND stage = ?"
+            params.append(stage)
+        return [{"path": Path(p), "stage": s, "n_rows": n, "size_bytes": size, "mtime": mtime}
+                for p, s, n, size, mtime in self._execute(sql + " ORDER BY mtime", params)]
+
+    def latest_artifact(self, run_uid: str, stage: str):
+        rows = self._execute("SELECT path FROM artifacts WHERE run_uid = ? AND stage = ? "
+                             "ORDER BY mtime DESC LIMIT 1", (run_uid, stage))
+        return Path(rows[0][0]) if rows else None
+
+    def summary(self) -> list:
+        """One row per run: query and how many steps are done / failed / running."""
+        rows = self._execute(
+            "SELECT r.run_uid, r.query, "
+            "SUM(s.status IN ('done', 'reused')), SUM(s.status = 'failed'), SUM(s.status = 'running') "
+            "FROM runs r LEFT JOIN steps s ON s.run_uid = r.run_uid GROUP BY r.run_uid ORDER BY r.run_uid DESC")
+        return [{"run_uid": uid, "query": query, "done": done or 0, "failed": failed or 0, "running": running or 0}
+                for uid, query, done, failed, running in rows]
+
+    # === Rebuild ===
+    def rebuild(self, base_dir) -> int:
+        """Drop everything and re-register every ``run_*`` directory under ``base_dir``."""
+        with self._lock:
+            self._conn.executescript("DELETE FROM artifacts; DELETE FROM steps; DELETE FROM runs;")
+        run_dirs = sorted(p for p in Path(base_dir).glob("run_*") if p.is_dir())
+        for run_dir in run_dirs:
+            self.sync_run(run_dir)
+        return len(run_dirs)
+
+    def sync_run(self, run_dir) -> str:
+        """
+        Register one run from disk: ``meta.json``, then each stage's manifest
+        outputs plus the files matching ``STAGE_PATTERNS`` in its directory.
+        Used after stages run as standalone scripts, which do not update the
+        catalog and may not write a manifest (control tab re-runs).
+        """
+        from jobserp_explorer.run_manager import make_run_dir
+        from jobserp_explorer.utils.manifest import load_manifest
+        from jobserp_explorer.utils.tables import list_tables
+
+        run_dir = Path(run_dir)
+        run_uid = run_uid_from_dir(run_dir)
+        layout = make_run_dir(run_uid)
+        paths = {key: run_dir / path.relative_to(layout["base"]) for key, path in layout.items()}
+        meta_file = paths["metadata"] / "meta.json"
+        try:
+            meta = json.loads(meta_file.read_text(encoding="utf-8")) if meta_file.exists() else {}
+        except (OSError, json.JSONDecodeError):
+            meta = {}
+        self.upsert_run(run_uid, meta, run_dir)
+
+        for stage, key in STAGE_DIRS.items():
+            manifest = load_manifest(paths["metadata"], stage) or {}
+            found = [Path(p) for p in manifest.get("outputs", []) if p]
+            location = paths[key]
+            if location.is_file():
+                found.append(location)
+            elif location.is_dir() and STAGE_PATTERNS.get(stage, "").endswith(".csv"):
+                found += list_tables(location, STAGE_PATTERNS[stage][:-len(".csv")])
+            elif location.is_dir() and stage in STAGE_PATTERNS:
+                found += sorted(location.glob(STAGE_PATTERNS[stage]))
+            outputs = list({p.resolve(): p for p in found if p.exists()}.values())
+            if outputs or manifest:
+                mtimes = [datetime.fromtimestamp(p.stat().st_mtime).isoformat(timespec="seconds") for p in outputs]
+                self.step_finished(run_uid, stage, "done", outputs,
+                                   max(filter(None, [manifest.get("finished_at"), *mtimes]), default=None))
+        return run_uid
+
+    def is_empty(self) -> bool:
+        return not self._execute("SELECT 1 FROM runs LIMIT 1")
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def catalog_path() -> Path:
+    from jobserp_explorer.run_manager import RunManager
+    return Path(os.environ.get(PATH_ENV) or RunManager.BASE_DIR / CATALOG_FILENAME)
+
+
+def get_catalog() -> RunCatalog:
+    """Process-wide catalog for the current ``catalog_path()``; built from disk on first use."""
+    path = catalog_path()
+    with _catalogs_lock:
+        catalog = _catalogs.get(path)
+        if catalog is None:
+            fresh = not path.exists()
+            catalog = _catalogs[path] = RunCatalog(path)
+            if fresh:
+                from jobserp_explorer.run_manager import RunManager
+                catalog.rebuild(RunManager.BASE_DIR)
+    return catalog
+
+
+def record(method: str, *args, **kwargs):
+    """Call ``get_catalog().<method>(...)``, logging instead of raising on catalog errors."""
+    try:
+        return getattr(get_catalog(), method)(*args, **kwargs)
+    except (sqlite3.Error, OSError) as e:
+        logging.warning(f"[CATALOG] {method} failed: {e}")
+        return None
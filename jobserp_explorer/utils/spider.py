@@ -0,0 +1,30 @@
+# utils/spider.py
+"""
+Spider.cloud endpoint and credentials, shared by the SERP scraper (01) and the
+page scraper (05).
+
+``SPIDER_API_BASE`` points every call at a mock or replay server instead of
+the real API; ``SPIDER_API_KEY`` is read from the environment or ``.env``.
+"""
+import os
+
+from dotenv import load_dotenv
+
+SPIDER_API_BASE_ENV = "SPIDER_API_BASE"
+DEFAULT_SPIDER_API_BASE = "https://api.spider.cloud"
+
+
+def spider_url(endpoint: str) -> str:
+    """Spider endpoint URL; ``SPIDER_API_BASE`` points it at a mock or replay server."""
+    return f"{(os.getenv(SPIDER_API_BASE_ENV) or DEFAULT_SPIDER_API_BASE).rstrip('/')}/{endpoint}"
+
+
+def spider_headers() -> dict:
+    load_dotenv()
+    api_key = os.getenv("SPIDER_API_KEY")
+    if not api_key:
+        raise RuntimeError("SPIDER_API_KEY environment variable is not set.")
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
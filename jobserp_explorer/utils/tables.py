@@ -0,0 +1,181 @@
+# utils/tables.py
+"""
+Typed intermediate tables passed between stages.
+
+``serp_expanded_*`` (01 → 02), ``*_scored_full`` and ``*_results`` (02 → 03,
+04, 05) are CSV by default. With ``JOBSERP_TABLE_FORMAT=parquet`` (needs
+``pyarrow``, ``pip install -e ".[parquet]"``) they are written as Parquet
+instead, with integer ``job_index``, float ``score`` and categorical ``label``
+/ ``domain`` columns. ``*_results.csv`` is still written next to its Parquet
+file for people to open.
+
+Readers accept either format, preferring Parquet when a table exists in
+both, and CSV reads are cast to the same schema so stages see the same
+dtypes either way.
+
+    python -m jobserp_explorer.utils.tables report data/01_fetch_serps/run_<uid>
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+FORMAT_ENV = "JOBSERP_TABLE_FORMAT"
+FORMATS = ("csv", "parquet")
+PARQUET_COMPRESSION = "zstd"
+
+# Explicit dtypes per table kind; columns not listed keep pandas' defaults
+SCHEMAS = {
+    "serp_expanded": {"job_index": "int64", "domain": "category"},
+    "scored": {"job_index": "int64", "domain": "category", "label": "category", "score": "float64"},
+}
+# File stem pattern → table kind, for reading tables whose kind the caller does not pass
+KIND_PATTERNS = [("*_scored_full", "scored"), ("*_results", "scored"), ("serp_expanded_*", "serp_expanded")]
+
+_warned = False
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def table_format() -> str:
+    """``parquet`` when requested and pyarrow is installed, else ``csv``."""
+    global _warned
+    fmt = (os.environ.get(FORMAT_ENV) or "csv").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"{FORMAT_ENV} must be one of {FORMATS}, got {fmt!r}")
+    if fmt == "parquet" and not parquet_available():
+        if not _warned:
+            logging.warning(f"[TABLES] {FORMAT_ENV}=parquet but pyarrow is not installed; writing CSV")
+            _warned = True
+        return "csv"
+    return fmt
+
+
+def kind_of(path) -> str:
+    stem = Path(path).stem
+    for pattern, kind in KIND_PATTERNS:
+        if Path(stem).match(pattern):
+            return kind
+    return None
+
+
+def apply_schema(df: pd.DataFrame, kind: str) -> pd.DataFrame:
+    """Cast the columns ``SCHEMAS[kind]`` lists; columns that do not fit (e.g. NaN ids) are left as read."""
+    for column, dtype in SCHEMAS.get(kind, {}).items():
+        if column in df.columns and str(df[column].dtype) != dtype:
+            try:
+                df[column] = df[column].astype(dtype)
+            except (ValueError, TypeError):
+                logging.warning(f"[TABLES] could not cast `{column}` to {dtype}; keeping {df[column].dtype}")
+    return df
+
+
+def write_table(df: pd.DataFrame, path, kind: str, keep_csv: bool = False) -> Path:
+    """
+    Write ``df`` to ``path`` (a ``.csv`` path) in the configured format and
+    return the path written. In Parquet mode ``keep_csv`` also writes the CSV.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if table_format() == "csv":
+        df.to_csv(path, index=False, encoding="utf-8")
+        return path
+
+    out = path.with_suffix(".parquet")
+    apply_schema(df.copy(), kind).to_parquet(out, index=False, compression=PARQUET_COMPRESSION)
+    if keep_csv:
+        df.to_csv(path, index=False, encoding="utf-8")
+    return out
+
+
+def read_table(path, kind: str = None) -> pd.DataFrame:
+    """Read a CSV or Parquet table and apply its schema. Empty CSVs raise ``pd.errors.EmptyDataError``."""
+    path = Path(path)
+    kind = kind or kind_of(path)
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    return apply_schema(pd.read_csv(path, encoding="utf-8"), kind)
+
+
+def list_tables(directory, pattern: str) -> list:
+    """
+    Tables in ``directory`` whose stem matches ``pattern`` (e.g. ``"*_results"``),
+    one per stem, Parquet preferred over CSV, sorted by name.
+    """
+    by_stem = {}
+    for suffix in (".csv", ".parquet"):  # parquet last so it wins
+        for path in Path(directory).glob(pattern + suffix):
+            by_stem[path.stem] = path
+    return [by_stem[stem] for stem in sorted(by_stem)]
+
+
+def table_rows(path) -> int:
+    """Row count from the Parquet footer, without reading the data."""
+    import pyarrow.parquet as pq
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+# === Size / speed report ===
+def _timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def compare_formats(path, repeat: int = 3) -> dict:
+    """Size and best-of-``repeat`` write / read time of one table as CSV and as Parquet."""
+    kind = kind_of(path)
+    df = read_table(path, kind)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, parquet_path = Path(tmp) / "t.csv", Path(tmp) / "t.parquet"
+        typed = apply_schema(df.copy(), kind)
+        write_csv_s = _timed(lambda: df.to_csv(csv_path, index=False, encoding="utf-8"), repeat)
+        write_parquet_s = _timed(
+            lambda: typed.to_parquet(parquet_path, index=False, compression=PARQUET_COMPRESSION), repeat)
+        read_csv_s = _timed(lambda: apply_schema(pd.read_csv(csv_path, encoding="utf-8"), kind), repeat)
+        read_parquet_s = _timed(lambda: pd.read_parquet(parquet_path), repeat)
+        return {
+            "table": Path(path).name, "rows": len(df),
+            "csv_bytes": csv_path.stat().st_size, "parquet_bytes": parquet_path.stat().st_size,
+            "write_csv_s": write_csv_s, "write_parquet_s": write_parquet_s,
+            "read_csv_s": read_csv_s, "read_parquet_s": read_parquet_s,
+        }
+
+
+def report(run_dir, repeat: int = 3) -> list:
+    run_dir = Path(run_dir)
+    tables = list_tables(run_dir / "01_scraped", "serp_expanded_*") + list_tables(run_dir / "03_scored", "*")
+    rows = [compare_formats(path, repeat) for path in tables]
+
+    print(f"{'table':<48} {'rows':>8} {'size×':>6} {'write×':>7} {'read×':>6}  (CSV / Parquet)")
+    for r in rows:
+        print(f"{r['table'][:48]:<48} {r['rows']:>8} {r['csv_bytes'] / max(1, r['parquet_bytes']):>6.1f} "
+              f"{r['write_csv_s'] / r['write_parquet_s']:>7.1f} {r['read_csv_s'] / r['read_parquet_s']:>6.1f}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CSV vs Parquet size and read/write time of a run's tables.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rep = sub.add_parser("report", help="Compare both formats on every intermediate table of a run")
+    rep.add_argument("run_dir")
+    rep.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if not parquet_available():
+        print("[✗] pyarrow is not installed (pip install -e \".[parquet]\")")
+        raise SystemExit(1)
+    report(args.run_dir, args.repeat)
@@ -0,0 +1,143 @@
+# utils/tracing.py
+"""
+Low-overhead JSON-lines tracing for the LLM flow tools.
+
+Tracing is off unless ``JOBSERP_TRACE`` is truthy. When enabled, every call
+emits one compact event; full prompt/response bodies are only kept for failed
+calls and for a random sample of rows (``JOBSERP_TRACE_SAMPLE``, 0–1).
+
+Writes never happen on the calling thread: events go through a queue and a
+single listener thread appends them to ``<trace_dir>/<run>_<pid>.jsonl``, so
+concurrent promptflow workers never interleave lines in the same file.
+
+In-process stages (08) trace into their own run's file with
+``tracing_run(trace_dir, run_name)`` instead of changing the environment;
+``get_tracer`` returns that run's tracer in the context it applies to.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+
+TRACE_ENV = "JOBSERP_TRACE"
+SAMPLE_ENV = "JOBSERP_TRACE_SAMPLE"
+DIR_ENV = "JOBSERP_TRACE_DIR"
+RUN_ENV = "JOBSERP_TRACE_RUN"
+
+DEFAULT_SAMPLE_RATE = 0.05
+DEFAULT_TRACE_DIR = Path(tempfile.gettempdir()) / "jobserp_traces"
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+class _JsonLineFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.trace, ensure_ascii=False, default=str)
+
+
+class Tracer:
+    """Sampled event logger backed by a ``QueueListener``."""
+
+    def __init__(self, enabled: bool = False, sample_rate: float = DEFAULT_SAMPLE_RATE,
+                 trace_dir: Path = DEFAULT_TRACE_DIR, run_name: str = None):
+        self.enabled = enabled
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.path = None
+        self._logger = None
+        self._listener = None
+
+        if not enabled:
+            return
+
+        run_name = run_name or f"llm_{datetime.now().strftime('%Y%m%dT%H%M%S')}"
+        trace_dir = Path(trace_dir)
+        trace_dir.mkdir(parents=True, exist_ok=True)
+        self.path = trace_dir / f"{run_name}_{os.getpid()}.jsonl"
+
+        file_handler = logging.FileHandler(self.path, encoding="utf-8", delay=True)
+        file_handler.setFormatter(_JsonLineFormatter())
+
+        q = queue.SimpleQueue()
+        self._listener = QueueListener(q, file_handler)
+        self._listener.start()
+
+        self._logger = logging.getLogger(f"jobserp.trace.{run_name}.{os.getpid()}")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        self._logger.addHandler(QueueHandler(q))
+
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls, trace_dir=None, run_name: str = None) -> "Tracer":
+        """Tracer configured from the environment; ``trace_dir`` / ``run_name`` override theirs."""
+        try:
+            sample_rate = float(os.environ.get(SAMPLE_ENV, DEFAULT_SAMPLE_RATE))
+        except ValueError:
+            sample_rate = DEFAULT_SAMPLE_RATE
+        return cls(
+            enabled=_env_flag(TRACE_ENV),
+            sample_rate=sample_rate,
+            trace_dir=Path(trace_dir or os.environ.get(DIR_ENV) or DEFAULT_TRACE_DIR),
+            run_name=run_name or os.environ.get(RUN_ENV) or None,
+        )
+
+    def sample(self) -> bool:
+        """Decide once per row whether full bodies should be kept."""
+        return self.enabled and random.random() < self.sample_rate
+
+    def emit(self, event: str, **fields):
+        if not self.enabled:
+            return
+        payload = {"ts": round(time.time(), 3), "event": event, "pid": os.getpid(), **fields}
+        self._logger.info("", extra={"trace": payload})
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+_run_tracer = contextvars.ContextVar("trace_run", default=None)
+
+
+@contextmanager
+def tracing_run(trace_dir=None, run_name: str = None):
+    """
+    Trace the calls made in this context (and in contexts copied from it) to
+    ``<trace_dir>/<run_name>_<pid>.jsonl``; the file is closed on exit.
+    """
+    tracer = Tracer.from_env(trace_dir, run_name)
+    token = _run_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _run_tracer.reset(token)
+        tracer.close()
+
+
+def get_tracer() -> Tracer:
+    """The current ``tracing_run``'s tracer, else the process-wide one configured from the environment."""
+    global _tracer
+    run_tracer = _run_tracer.get()
+    if run_tracer is not None:
+        return run_tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer.from_env()
+    return _tracer
@@ -0,0 +1,432 @@
+# utils/warehouse.py
+"""
+Record-level warehouse of queries, SERP pages, scrapes and LLM results
+across runs.
+
+One SQLite database, keyed by ``run_uid`` / ``query_uid`` / ``page_uid``
+and indexed on each, so questions like "have I already scored this
+posting?" or "all Yes matches from the last month" do not load every run's
+files. Stage outputs are ingested when the stage finishes (see
+``pipeline.incremental``). Each file is recorded with its mtime and size, so
+re-ingesting a run only reads files that changed. For the LLM stages the
+newest output replaces the run's earlier rows of that stage.
+
+- ``queries`` / ``pages``: from ``*_results`` (02)
+- ``scrapes``: from the scraped-page JSONL (05)
+- ``llm_results``: page classification (04 rules, stored as stage
+  ``preclassify_pages``; 08/09) and final match scoring (09), with the
+  common summary fields as columns and the full summary as JSON.
+  ``match_score`` and ``country`` are generated from the JSON and indexed,
+  so the results tab filters, sorts and pages in SQL (``match_page``)
+
+``JOBSERP_WAREHOUSE_PATH`` overrides the location
+(default ``<RunManager.BASE_DIR>/warehouse.sqlite``).
+
+    jobserp-explorer warehouse ingest
+    jobserp-explorer warehouse matches --days 30
+    jobserp-explorer warehouse seen https://boards.greenhouse.io/acme/jobs/123
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PATH_ENV = "JOBSERP_WAREHOUSE_PATH"
+WAREHOUSE_FILENAME = "warehouse.sqlite"
+
+# Stages whose outputs are ingested, and the table they land in
+STAGE_TABLES = {
+    "label_and_score": "pages",
+    "scrape_pages": "scrapes",
+    "preclassify_pages": "llm_results",
+    "classify_pages": "llm_results",
+    "score_matches": "llm_results",
+}
+# Stages that write one file covering the whole run: a newer file replaces the rows of older ones.
+# (``*_results`` and scrape files add up; one is written per input.)
+REPLACING_STAGES = {"preclassify_pages", "classify_pages", "score_matches"}
+# Summary fields promoted to columns of llm_results
+SUMMARY_COLUMNS = ["job_title", "company_name", "potential_match", "recommend_apply", "page_type",
+                   "recommend_crawl"]
+# Virtual columns of llm_results computed from the summary JSON (added to older databases on open)
+GENERATED_COLUMNS = {
+    "match_score": "REAL GENERATED ALWAYS AS (CAST(json_extract(summary, '$.match_score') AS REAL)) VIRTUAL",
+    "country": "TEXT GENERATED ALWAYS AS (json_extract(summary, '$.country')) VIRTUAL",
+}
+_GENERATED_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_llm_run_score ON llm_results(run_uid, stage, match_score);
+CREATE INDEX IF NOT EXISTS idx_llm_run_country ON llm_results(run_uid, stage, country);
+"""
+# Columns ``match_page`` can sort on
+MATCH_SORT_COLUMNS = ["line_number", "match_score", "job_title", "company_name", "country", "potential_match",
+                      "recommend_apply"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queries (
+    run_uid TEXT NOT NULL,
+    query_uid TEXT NOT NULL,
+    job_index INTEGER NOT NULL,
+    job_title TEXT,
+    company TEXT,
+    produced_at TEXT,
+    PRIMARY KEY (run_uid, query_uid, job_index)
+);
+CREATE INDEX IF NOT EXISTS idx_queries_query ON queries(query_uid);
+CREATE TABLE IF NOT EXISTS pages (
+    run_uid TEXT NOT NULL,
+    page_uid TEXT NOT NULL,
+    job_index INTEGER NOT NULL,
+    query_uid TEXT,
+    serp_url TEXT,
+    serp_title TEXT,
+    domain TEXT,
+    label TEXT,
+    score REAL,
+    produced_at TEXT,
+    PRIMARY KEY (run_uid, page_uid, job_index)
+);
+CREATE INDEX IF NOT EXISTS idx_pages_page ON pages(page_uid);
+CREATE INDEX IF NOT EXISTS idx_pages_query ON pages(query_uid);
+CREATE TABLE IF NOT EXISTS scrapes (
+    run_uid TEXT NOT NULL,
+    page_uid TEXT NOT NULL,
+    job_index INTEGER NOT NULL,
+    query_uid TEXT,
+    serp_url TEXT,
+    n_chars INTEGER,
+    content TEXT,
+    produced_at TEXT,
+    PRIMARY KEY (run_uid, page_uid, job_index)
+);
+CREATE INDEX IF NOT EXISTS idx_scrapes_page ON scrapes(page_uid);
+CREATE TABLE IF NOT EXISTS llm_results (
+    run_uid TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    page_uid TEXT NOT NULL,
+    job_index INTEGER NOT NULL,
+    serp_url TEXT,
+    line_number INTEGER,
+    job_title TEXT,
+    company_name TEXT,
+    potential_match TEXT,
+    recommend_apply TEXT,
+    page_type TEXT,
+    recommend_crawl TEXT,
+    summary TEXT,
+    produced_at TEXT,
+    PRIMARY KEY (run_uid, stage, page_uid, job_index)
+);
+CREATE INDEX IF NOT EXISTS idx_llm_page ON llm_results(page_uid, stage);
+CREATE INDEX IF NOT EXISTS idx_llm_match ON llm_results(stage, potential_match, produced_at);
+CREATE TABLE IF NOT EXISTS ingested (
+    path TEXT PRIMARY KEY,
+    run_uid TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    n_rows INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ingested_run ON ingested(run_uid);
+"""
+
+
+def make_page_uid(serp_url: str) -> str:
+    """Same hash as ``core/03_export_results_to_jsonl.make_page_uid``."""
+    normalized = unicodedata.normalize("NFKC", str(serp_url)).strip().lower()
+    return hashlib.md5(normalized.encode()).hexdigest()[:10]
+
+
+def _int(value, default=-1) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _text(value):
+    if value is None or (isinstance(value, float) and value != value):  # NaN
+        return None
+    return str(value)
+
+
+def _jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f"[WAREHOUSE] skipping malformed line in {path}")
+
+
+class Warehouse:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_xinfo(llm_results)")}
+        for column, definition in GENERATED_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE llm_results ADD COLUMN {column} {definition}")
+        self._conn.executescript(_GENERATED_INDEXES)
+
+    def query(self, sql: str, params=()) -> list:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def select(self, sql: str, params=()) -> list:
+        """Run an ad-hoc query with writes disabled (``warehouse sql``)."""
+        with self._lock:
+            self._conn.execute("PRAGMA query_only = ON")
+            try:
+                return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+            finally:
+                self._conn.execute("PRAGMA query_only = OFF")
+
+    # === Ingest ===
+    def ingest_file(self, run_uid: str, stage: str, path, force: bool = False) -> int:
+        """
+        Load one stage output into its table; returns rows ingested (0 when
+        unchanged since last time, or when a newer output of a replacing stage
+        is already in).
+        """
+        path = Path(path)
+        if stage not in STAGE_TABLES or not path.is_file():
+            return 0
+        stat = path.stat()
+        key = str(path.resolve())
+        if not force:
+            seen = self.query("SELECT mtime, size_bytes FROM ingested WHERE path = ?", (key,))
+            if seen and seen[0]["mtime"] == stat.st_mtime and seen[0]["size_bytes"] == stat.st_size:
+                return 0
+        replaces = stage in REPLACING_STAGES
+        if replaces and self.query(
+                "SELECT 1 FROM ingested WHERE run_uid = ? AND stage = ? AND path != ? AND mtime > ? LIMIT 1",
+                (run_uid, stage, key, stat.st_mtime)):
+            return 0
+
+        produced_at = datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds")
+        statements = getattr(self, f"_rows_{STAGE_TABLES[stage]}")(run_uid, stage, path, produced_at)
+        n_rows = 0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if replaces:
+                    self._conn.execute(f"DELETE FROM {STAGE_TABLES[stage]} WHERE run_uid = ? AND stage = ?",
+                                       (run_uid, stage))
+                for sql, rows in statements:
+                    self._conn.executemany(sql, rows)
+                    n_rows = max(n_rows, len(rows))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO ingested(path, run_uid, stage, mtime, size_bytes, n_rows, ingested_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, run_uid, stage, stat.st_mtime, stat.st_size, n_rows,
+                     datetime.now().isoformat(timespec="seconds")))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return n_rows
+
+    def _rows_pages(self, run_uid, stage, path, produced_at):
+        from jobserp_explorer.utils.tables import read_table
+
+        df = read_table(path, "scored")
+        queries, pages = {}, []
+        for row in df.to_dict(orient="records"):
+            job_index = _int(row.get("job_index"))
+            query_uid = _text(row.get("query_uid"))
+            queries[(query_uid, job_index)] = (run_uid, query_uid, job_index, _text(row.get("job_title")),
+                                               _text(row.get("company")), produced_at)
+            serp_url = _text(row.get("serp_url")) or ""
+            pages.append((run_uid, _text(row.get("page_uid")) or make_page_uid(serp_url), job_index, query_uid,
+                          serp_url, _text(row.get("serp_title")), _text(row.get("domain")),
+                          _text(row.get("label")), row.get("score"), produced_at))
+        return [
+            ("INSERT OR REPLACE INTO queries VALUES (?, ?, ?, ?, ?, ?)", list(queries.values())),
+            ("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", pages),
+        ]
+
+    def _rows_scrapes(self, run_uid, stage, path, produced_at):
+        rows = []
+        for r in _jsonl(path):
+            serp_url = r.get("serp_url") or ""
+            content = r.get("scraped_data")
+            content = content if isinstance(content, str) else (json.dumps(content) if content else None)
+            rows.append((run_uid, r.get("page_uid") or make_page_uid(serp_url), _int(r.get("job_index")),
+                         r.get("query_uid"), serp_url, len(content or ""), content, produced_at))
+        return [("INSERT OR REPLACE INTO scrapes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)]
+
+    def _rows_llm_results(self, run_uid, stage, path, produced_at):
+        rows = []
+        for r in _jsonl(path):
+            summary = r.get("summary") if isinstance(r.get("summary"), dict) else {}
+            serp_url = r.get("serp_url") or ""
+            rows.append((run_uid, stage, r.get("page_uid") or make_page_uid(serp_url), _int(r.get("id")), serp_url,
+                         r.get("line_number"), *(_text(summary.get(c)) for c in SUMMARY_COLUMNS),
+                         json.dumps(summary, ensure_ascii=False), produced_at))
+        return [("INSERT OR REPLACE INTO llm_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)]
+
+    def ingest_outputs(self, run_uid: str, stage: str, outputs, force: bool = False) -> int:
+        paths = [Path(p) for p in outputs or [] if p]
+        if stage == "preclassify_pages":
+            # rule classifications only; the residual is LLM input, not results
+            paths = [p for p in paths if p.match("*_rules_*.jsonl")]
+        if stage in REPLACING_STAGES:
+            existing = [p for p in paths if p.is_file()]
+            paths = [max(existing, key=lambda p: p.stat().st_mtime)] if existing else []
+        return sum(self.ingest_file(run_uid, stage, p, force) for p in paths)
+
+    def ingest_run(self, run_uid: str, force: bool = False) -> int:
+        """Ingest the outputs the run catalog lists for ``run_uid`` (the newest one for replacing stages)."""
+        from jobserp_explorer.utils.run_catalog import get_catalog
+
+        by_stage = {}
+        for artifact in get_catalog().artifacts(run_uid):
+            by_stage.setdefault(artifact["stage"], []).append(artifact["path"])
+        return sum(self.ingest_outputs(run_uid, stage, paths, force) for stage, paths in by_stage.items())
+
+    def forget_run(self, run_uid: str):
+        with self._lock:
+            for table in ("queries", "pages", "scrapes", "llm_results", "ingested"):
+                self._conn.execute(f"DELETE FROM {table} WHERE run_uid = ?", (run_uid,))
+
+    # === Queries ===
+    def has_run(self, run_uid: str, stage: str = "score_matches") -> bool:
+        return bool(self.query("SELECT 1 FROM ingested WHERE run_uid = ? AND stage = ? LIMIT 1", (run_uid, stage)))
+
+    def match_records(self, run_uid: str) -> list:
+        """Final-scored records of a run in the shape of the 07_final_scored JSONL lines."""
+        rows = self.query(
+            "SELECT job_index, serp_url, page_uid, line_number, summary FROM llm_results "
+            "WHERE run_uid = ? AND stage = 'score_matches' ORDER BY line_number, job_index", (run_uid,))
+        return [{"id": str(r["job_index"]), "serp_url": r["serp_url"], "page_uid": r["page_uid"],
+                 "line_number": r["line_number"], "summary": json.loads(r["summary"] or "{}")} for r in rows]
+
+    @staticmethod
+    def _match_filters(run_uid: str, recommend_apply=None, potential_match=None, score_range=None,
+                       countries=None, company: str = None) -> tuple:
+        """WHERE clause and parameters for one run's final-scored postings (list filters match any value)."""
+        sql, params = ["run_uid = ?", "stage = 'score_matches'"], [run_uid]
+        for column, values in (("recommend_apply", recommend_apply), ("potential_match", potential_match),
+                               ("country", countries)):
+            if values:
+                values = [values] if isinstance(values, str) else list(values)
+                sql.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if score_range:
+            sql.append("match_score BETWEEN ? AND ?")
+            params.extend(score_range)
+        if company:
+            escaped = company.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            sql.append("company_name LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        return " AND ".join(sql), params
+
+    def match_page(self, run_uid: str, page: int = 0, size: int = 50, sort_by: str = "line_number",
+                   descending: bool = False, **filters) -> tuple:
+        """
+        One page of a run's final-scored records (``match_records`` shape) after
+        filtering and sorting in SQL, and the number of records matching the
+        filters: ``(records, total)``. ``filters`` are those of ``_match_filters``.
+        """
+        if sort_by not in MATCH_SORT_COLUMNS:
+            raise ValueError(f"Cannot sort matches by {sort_by!r}; use one of {MATCH_SORT_COLUMNS}")
+        where, params = self._match_filters(run_uid, **filters)
+        total = self.query(f"SELECT COUNT(*) AS n FROM llm_results WHERE {where}", params)[0]["n"]
+        direction = "DESC" if descending else "ASC"
+        rows = self.query(
+            f"SELECT job_index, serp_url, page_uid, line_number, summary FROM llm_results WHERE {where} "
+            f"ORDER BY {sort_by} IS NULL, {sort_by} {direction}, line_number, job_index LIMIT ? OFFSET ?",
+            (*params, size, page * size))
+        return [{"id": str(r["job_index"]), "serp_url": r["serp_url"], "page_uid": r["page_uid"],
+                 "line_number": r["line_number"], "summary": json.loads(r["summary"] or "{}")} for r in rows], total
+
+    def match_facets(self, run_uid: str) -> dict:
+        """Values the results-tab filters offer for a run: labels and countries with counts, score range."""
+        where = "run_uid = ? AND stage = 'score_matches'"
+        facets = {column: {r["value"]: r["n"] for r in self.query(
+            f"SELECT {column} AS value, COUNT(*) AS n FROM llm_results WHERE {where} AND {column} IS NOT NULL "
+            f"GROUP BY {column} ORDER BY n DESC", (run_uid,))}
+            for column in ("recommend_apply", "potential_match", "country")}
+        bounds = self.query(f"SELECT MIN(match_score) AS lo, MAX(match_score) AS hi FROM llm_results WHERE {where}",
+                            (run_uid,))[0]
+        facets["match_score"] = (bounds["lo"], bounds["hi"])
+        return facets
+
+    def matches(self, days: int = None, potential_match: str = "Yes", recommend_apply: str = None,
+                limit: int = 500) -> list:
+        """Final-scored postings across runs, newest first, joined with their SERP page."""
+        sql = ("SELECT l.run_uid, l.produced_at, l.job_title, l.company_name, l.potential_match, l.recommend_apply, "
+               "l.serp_url, p.domain, p.label, l.page_uid FROM llm_results l "
+               "LEFT JOIN pages p ON p.run_uid = l.run_uid AND p.page_uid = l.page_uid AND p.job_index = l.job_index "
+               "WHERE l.stage = 'score_matches'")
+        params = []
+        if potential_match:
+            sql += " AND l.potential_match = ?"
+            params.append(potential_match)
+        if recommend_apply:
+            sql += " AND l.recommend_apply = ?"
+            params.append(recommend_apply)
+        if days:
+            sql += " AND l.produced_at >= ?"
+            params.append((datetime.now() - timedelta(days=days)).isoformat(timespec="seconds"))
+        sql += " ORDER BY l.produced_at DESC LIMIT ?"
+        return self.query(sql, (*params, limit))
+
+    def seen(self, url_or_page_uid: str) -> dict:
+        """Every run that found, scraped or scored a page (by URL or page_uid)."""
+        key = url_or_page_uid if "/" not in url_or_page_uid else make_page_uid(url_or_page_uid)
+        return {
+            "page_uid": key,
+            "pages": self.query("SELECT run_uid, job_index, query_uid, label, score FROM pages "
+                                "WHERE page_uid = ? ORDER BY run_uid", (key,)),
+            "scrapes": self.query("SELECT run_uid, job_index, n_chars FROM scrapes WHERE page_uid = ? "
+                                  "ORDER BY run_uid", (key,)),
+            "llm_results": self.query("SELECT run_uid, stage, job_index, potential_match, recommend_apply, "
+                                      "page_type, produced_at FROM llm_results WHERE page_uid = ? "
+                                      "ORDER BY produced_at", (key,)),
+        }
+
+    def counts(self) -> dict:
+        return {table: self.query(f"SELECT COUNT(*) AS n FROM {table}")[0]["n"]
+                for table in ("queries", "pages", "scrapes", "llm_results", "ingested")}
+
+
+_warehouses = {}
+_warehouses_lock = threading.Lock()
+
+
+def warehouse_path() -> Path:
+    from jobserp_explorer.run_manager import RunManager
+    return Path(os.environ.get(PATH_ENV) or RunManager.BASE_DIR / WAREHOUSE_FILENAME)
+
+
+def get_warehouse() -> Warehouse:
+    path = warehouse_path()
+    with _warehouses_lock:
+        if path not in _warehouses:
+            _warehouses[path] = Warehouse(path)
+        return _warehouses[path]
+
+
+def record(method: str, *args, **kwargs):
+    """Call ``get_warehouse().<method>(...)``, logging instead of raising (ingest never fails a stage)."""
+    try:
+        return getattr(get_warehouse(), method)(*args, **kwargs)
+    except (sqlite3.Error, OSError, ValueError, KeyError) as e:
+        logging.warning(f"[WAREHOUSE] {method} failed: {e}")
+        return None
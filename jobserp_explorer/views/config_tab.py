@@ -2,6 +2,7 @@
 # app/views/config_tab.py
 import streamlit as st
 from pathlib import Path
+import copy
 import json
 
 # import sys
@@ -11,10 +12,18 @@ from jobserp_explorer.config.schema import AppConfig
 
 CONFIG_PATH = Path("app_config.json")
 
+
+def app_config() -> AppConfig:
+    """``app_config.json``, read once per browser session; saving it here refreshes the session copy."""
+    if "app_config" not in st.session_state:
+        st.session_state["app_config"] = AppConfig.from_json(CONFIG_PATH)
+    return st.session_state["app_config"]
+
+
 def render():
     st.title("⚙️ Configuration Settings")
 
-    config = AppConfig.from_json(CONFIG_PATH)
+    config = copy.deepcopy(app_config())  # widgets edit a copy until it is saved
 
     st.header("🔐 API Keys")
 
@@ -59,4 +68,5 @@ def render():
     # 💾 Save
     if st.button("💾 Save Configuration"):
         CONFIG_PATH.write_text(json.dumps(config.to_dict(), indent=2))
+        st.session_state["app_config"] = config
         st.success("✅ Configuration saved to `app_config.json`.")
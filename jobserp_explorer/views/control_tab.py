@@ -11,6 +11,8 @@ import os
 
 
 from jobserp_explorer.config.schema import AppConfig
+from jobserp_explorer.utils import run_catalog, warehouse
+from jobserp_explorer.utils.manifest import latest_output
 
 cfg = AppConfig.from_json(Path("app_config.json"))
 
@@ -97,6 +99,18 @@ def run_step(script_path, args=None, desc=None):
             st.code(traceback_text, language="python")
 
 
+# control-tab step (run directory key) → pipeline stage in the run catalog
+STEP_STAGES = {
+    "scraped_jsonl": "fetch_serps",
+    "scored_csv": "label_and_score",
+    "serp_jsonl_input_dir": "export_jsonl",
+    "page_classification_dir": "classify_pages",
+    "html_scraped_dir": "scrape_pages",
+    "final_scored_jsonl": "score_matches",
+}
+STATUS_ICONS = {"done": "✅", "reused": "♻️", "running": "🔄", "failed": "❌"}
+
+
 def render():
     st.title("🔧 Pipeline Execution & Observability")
 
@@ -114,9 +128,9 @@ def render():
         ("scraped_jsonl", "01_serp_scraper.py", "Fetch SERP Results"),
         ("scored_csv", "02_label_and_score.py", "Label & Score Results"),
         ("serp_jsonl_input_dir", "03_export_results_to_jsonl.py", "Prepare PromptFlow Input"),
-        ("page_classification_dir", "09_run_promptflow.py", "Classify Page Category", ["--flow_dir", "jobserp_explorer/flow_pagecateg"]),
+        ("page_classification_dir", "09_run_promptflow.py", "Classify Page Category", ["--flow_dir", "jobserp_explorer/flow_pagecateg", "--run_uid", run_uid]),
         ("html_scraped_dir", "05_export_jsonl_with_scraping.py", "Scrape Selected Pages"),
-        ("final_scored_jsonl", "09_run_promptflow.py", "Final Match Scoring", ["--flow_dir", "jobserp_explorer/flow_jobposting"]),
+        ("final_scored_jsonl", "09_run_promptflow.py", "Final Match Scoring", ["--flow_dir", "jobserp_explorer/flow_jobposting", "--run_uid", run_uid]),
     ]
 
 
@@ -154,13 +168,15 @@ def render():
                     "--meta_dir", str(run.paths["metadata"])
                 ]
             elif key == "page_classification_dir":
-                input_jsonls = sorted(run.paths["serp_jsonl_input_dir"].glob("*.jsonl"), key=os.path.getmtime)
-                if not input_jsonls:
+                export_jsonl = latest_output(run.paths["metadata"], "export_jsonl", run.paths["serp_jsonl_input_dir"])
+                if export_jsonl is None:
                     st.error("No input JSONL found.")
                     continue
                 args = [
-                    "--input", str(input_jsonls[-1]),
+                    "--input", str(export_jsonl),
                     "--output_dir", str(run.paths["page_classification_dir"]),
+                    "--log_dir", str(run.paths["logs"]),
+                    "--meta_dir", str(run.paths["metadata"]),
                 ] + opt_args[0]
             elif key == "html_scraped_dir":
                 args = [
@@ -168,33 +184,40 @@ def render():
                     "--output_dir", str(run.paths["html_scraped_dir"])
                 ]
             elif key == "final_scored_jsonl":
-                input_jsonls = sorted(run.paths["serp_jsonl_input_dir"].glob("*.jsonl"), key=os.path.getmtime)
-                if not input_jsonls:
+                export_jsonl = latest_output(run.paths["metadata"], "export_jsonl", run.paths["serp_jsonl_input_dir"])
+                if export_jsonl is None:
                     st.error("No JSONL file for final scoring.")
                     continue
                 args = [
-                    "--input", str(input_jsonls[-1]),
+                    "--input", str(export_jsonl),
                     "--output_dir", str(run.paths["final_scored_jsonl"]),
+                    "--log_dir", str(run.paths["logs"]),
+                    "--meta_dir", str(run.paths["metadata"]),
                 ] + opt_args[0]
 
             run_step(Path("jobserp_explorer/core") / script, args=args, desc=label)
+        run_catalog.record("sync_run", run.run_dir)  # standalone scripts do not update the catalog
+        warehouse.record("ingest_run", run_uid)
 
 
 
 
+    # Step status comes from the run catalog instead of scanning each output directory
+    steps = run.steps()
     for key, script, label, *opt_args in pipeline_steps:
         with st.expander(f"🔹 {label}"):
 
             output_path = run.paths.get(key)
+            step = steps.get(STEP_STAGES[key])
 
-            # Proper existence check: if key is a directory, check for files inside
-            if key in ["serp_jsonl_input_dir", "page_classification_dir", "html_scraped_dir"]:
-                exists = output_path.exists() and any(output_path.glob("*"))
+            if step is None:
+                exists = False
+                st.write("**Status**: ⏳ Not yet run")
             else:
-                exists = output_path.exists()
-
-
-            st.write(f"**Status**: {'✅ Exists' if run.exists(key) else '⏳ Not yet run'}")
+                exists = step["status"] in ("done", "reused")
+                rows = f" · {step['n_rows']} rows" if step["n_rows"] is not None else ""
+                when = f" · {step['finished_at']}" if step["finished_at"] else ""
+                st.write(f"**Status**: {STATUS_ICONS.get(step['status'], '')} {step['status']}{rows}{when}")
 
             # If there's an actual file or folder, show download link or list
             if exists:
@@ -209,6 +232,17 @@ def render():
                             link = file_download_link(f)
                             if link:
                                 st.markdown(f"- {link}", unsafe_allow_html=True)
+                # Expanders cannot nest; the preview reads one page through the artifact's line index,
+                # and the artifact is only resolved and counted once the box is ticked
+                if st.checkbox("👁 Preview output", key=f"preview_{key}"):
+                    artifact = run.artifact(STEP_STAGES[key])
+                    if artifact is None:
+                        st.caption("No output file to preview.")
+                    else:
+                        st.caption(f"{artifact.path.name} · {artifact.count()} rows")
+                        page = st.number_input("Page", min_value=1, max_value=max(1, artifact.n_pages()), value=1,
+                                               key=f"page_{key}")
+                        st.dataframe(artifact.page(int(page) - 1))
 
 
 
@@ -245,14 +279,15 @@ def render():
                     ]
 
                 elif key == "page_classification_dir":
-                    input_jsonls = sorted(run.paths["serp_jsonl_input_dir"].glob("*.jsonl"), key=os.path.getmtime)
-                    if not input_jsonls:
+                    export_jsonl = latest_output(run.paths["metadata"], "export_jsonl", run.paths["serp_jsonl_input_dir"])
+                    if export_jsonl is None:
                         st.error("No input JSONL found.")
                         continue
-                    input_jsonl = input_jsonls[-1]
                     args = [
-                        "--input", str(input_jsonl),
+                        "--input", str(export_jsonl),
                         "--output_dir", str(output_path),
+                        "--log_dir", str(run.paths["logs"]),
+                        "--meta_dir", str(run.paths["metadata"]),
                     ] + opt_args[0]
 
                 elif key == "html_scraped_dir":
@@ -262,17 +297,20 @@ def render():
                     ]
 
                 elif key == "final_scored_jsonl":
-                    jsonl_files = sorted(run.paths["serp_jsonl_input_dir"].glob("*.jsonl"), key=os.path.getmtime)
-                    if not jsonl_files:
+                    export_jsonl = latest_output(run.paths["metadata"], "export_jsonl", run.paths["serp_jsonl_input_dir"])
+                    if export_jsonl is None:
                         st.error("No JSONL file for final scoring.")
                         continue
-                    jsonl_input = jsonl_files[-1]
                     args = [
-                        "--input", str(jsonl_input),
+                        "--input", str(export_jsonl),
                         "--output_dir", str(output_path),
+                        "--log_dir", str(run.paths["logs"]),
+                        "--meta_dir", str(run.paths["metadata"]),
                     ] + opt_args[0]
 
                 run_step(Path("jobserp_explorer/core") / script, args=args, desc=label)
+                run_catalog.record("sync_run", run.run_dir)
+                warehouse.record("ingest_run", run_uid)
 
 
 if __name__ == "__main__":
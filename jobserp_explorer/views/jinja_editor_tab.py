@@ -7,6 +7,8 @@ from jobserp_explorer.config.paths import JINJA_FILE_PATH
 def render():
     st.header("📝 Jinja2 Prompt Editor")
     st.caption("Edit the template used for tailoring to the candidate. Changes are saved to the local file system.")
+    st.caption("Keep static text (profile, instructions) under `system:` and per-job fields under `user:` — "
+               "the `system:` part is sent as a stable, provider-cacheable prefix.")
 
     # Load file contents
     if JINJA_FILE_PATH.exists():
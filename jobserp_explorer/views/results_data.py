@@ -0,0 +1,74 @@
+# jobserp_explorer/views/results_data.py
+"""
+Data side of the results tab: building the tables and detail cards it shows
+from final-scored records. Kept free of Streamlit so it can be reused and
+benchmarked.
+"""
+import pandas as pd
+
+
+def build_match_table(match_data) -> pd.DataFrame:
+    """Line, SERP URL and one column per summary field (sorted), in one pass over the records."""
+    summaries = pd.DataFrame([entry.get("summary") or {} for entry in match_data])
+    table = summaries.reindex(columns=sorted(summaries.columns))
+    table.insert(0, "SERP URL", [entry.get("serp_url") for entry in match_data])
+    table.insert(0, "Line", [entry.get("line_number") for entry in match_data])
+    return table
+
+
+def url_table(match_table: pd.DataFrame) -> pd.DataFrame:
+    """URL preview columns of a ``build_match_table`` frame (no second pass over the records)."""
+    columns = {"Line": "Line", "job_title": "Job Title", "company_name": "Company", "SERP URL": "SERP URL"}
+    return match_table.reindex(columns=list(columns)).rename(columns=columns)
+
+
+def _value(row: dict, field: str, default="Unknown"):
+    value = row.get(field)
+    return default if value is None or (isinstance(value, float) and value != value) else value
+
+
+def _yes(value) -> str:
+    return "✅ Yes" if value == "Yes" else "❌ No"
+
+
+def _bullets(items) -> str:
+    return "\n".join(f"- {item}" for item in items) if isinstance(items, list) else ""
+
+
+def match_card(row: dict) -> tuple:
+    """``(title, markdown)`` of one ``build_match_table`` row for its detail card."""
+    title = (f"{row.get('job_title')} at {row.get('company_name')} — "
+             f"Apply: {_yes(row.get('recommend_apply'))} | Match: {_yes(row.get('potential_match'))}")
+    body = "\n\n".join([
+        f"**Country:** {_value(row, 'country')}",
+        f"**Visa Sponsorship Required:** {_value(row, 'visa_sponsorship_required')}",
+        f"**Company Culture:** {_value(row, 'company_culture')}",
+        f"**SERP URL:** [Link]({row.get('SERP URL')})",
+        "**Significant Experience Gaps:**\n" + _bullets(row.get("significant_experience_gaps")),
+        "**Recommendation Reasons:**\n" + _bullets(row.get("recommendation_reasons")),
+    ])
+    return title, body
+
+
+def filter_match_table(match_table: pd.DataFrame, sort_by: str = "line_number", descending: bool = False,
+                       recommend_apply=None, potential_match=None, score_range=None, countries=None,
+                       company: str = None) -> pd.DataFrame:
+    """
+    In-memory version of ``Warehouse.match_page``'s filters and sort, for
+    when the warehouse is unavailable. Filters are the same keyword arguments.
+    """
+    table = match_table
+    mask = pd.Series(True, index=table.index)
+    for column, values in (("recommend_apply", recommend_apply), ("potential_match", potential_match),
+                           ("country", countries)):
+        if values and column in table:
+            mask &= table[column].isin([values] if isinstance(values, str) else list(values))
+    if score_range and "match_score" in table:
+        mask &= pd.to_numeric(table["match_score"], errors="coerce").between(*score_range)
+    if company and "company_name" in table:
+        mask &= table["company_name"].astype(str).str.contains(company, case=False, regex=False)
+    table = table[mask]
+    column = "Line" if sort_by == "line_number" else sort_by
+    if column in table:
+        table = table.sort_values(column, ascending=not descending, na_position="last", kind="stable")
+    return table
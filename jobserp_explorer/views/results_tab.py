@@ -1,109 +1,145 @@
-
 from pathlib import Path
 import streamlit as st
-import json
 import pandas as pd
 
 
-from jobserp_explorer.config.schema import AppConfig
-
-cfg = AppConfig.from_json(Path("app_config.json"))
-
-# Use config:
-output_path = Path(cfg.base_data_dir) / cfg.run_format.format(run_uid="20250710T2000")
-
-
 from jobserp_explorer.config.paths import DATA_DIR
+from jobserp_explorer.run_manager import RunManager
+from jobserp_explorer.utils import run_catalog, warehouse
+from jobserp_explorer.utils.artifacts import Artifact
+from jobserp_explorer.views.config_tab import app_config
+from jobserp_explorer.utils.warehouse import MATCH_SORT_COLUMNS
+from jobserp_explorer.views.results_data import build_match_table, filter_match_table, match_card, url_table
 BASE_DIR = DATA_DIR
 
 
-def load_jsonl(path):
-    with open(path, "r") as f:
-        return [json.loads(line.strip()) for line in f.readlines()]
-
-def render():
-    st.header("📊 Job Match Results")
-
-    # === Step 1: List runs ===
-    run_dirs = sorted([p for p in BASE_DIR.glob("run_*") if p.is_dir()], reverse=True)
-    if not run_dirs:
-        st.error("No run directories found.")
-        return
-
-    selected_run = st.selectbox("Select a run:", run_dirs, format_func=lambda p: p.name)
-
-    match_dir = selected_run / "07_final_scored"
-    serp_dir = selected_run / "04_serp_jsonl_input"
+# === Cached loading (keyed by file path + mtime + size: a rewritten file is a new entry) ===
+@st.cache_data(show_spinner="Indexing matches…", max_entries=16)
+def ingest_matches(run_uid: str, path: str, mtime_ns: int, size: int) -> bool:
+    """Ingest the file into the warehouse (only when it changed); False when the warehouse is unavailable."""
+    warehouse.record("ingest_outputs", run_uid, "score_matches", [Path(path)])
+    return bool(warehouse.record("has_run", run_uid))
 
-    # match_files = sorted(match_dir.glob("*.jsonl"))
-    # serp_files = sorted(serp_dir.glob("*.jsonl"))
 
-    # if not match_files or not serp_files:
-    #     st.warning("This run has no valid match/SERP files.")
-    #     return
+@st.cache_data(show_spinner="Loading matches…", max_entries=4)
+def load_match_table(run_uid: str, path: str, mtime_ns: int, size: int) -> pd.DataFrame:
+    """Whole match table, read from the file; only used when the warehouse is unavailable."""
+    return build_match_table(list(Artifact(path).records()))
 
-    try:
-        selected_match_file = sorted(match_dir.glob("*.jsonl"))[-1]
-        selected_serp_file = sorted(serp_dir.glob("*.jsonl"))[-1]
-    except IndexError:
-        st.warning("Run directory is missing final match or serp file.")
-        return
 
-    # === Step 2: Load and display ===
-    match_data = load_jsonl(selected_match_file)
-    # serp_data = load_jsonl(selected_serp_file)
+@st.cache_data(max_entries=16)
+def load_facets(run_uid: str, path: str, mtime_ns: int, size: int, in_warehouse: bool) -> dict:
+    facets = warehouse.record("match_facets", run_uid) if in_warehouse else None
+    if facets is not None:
+        return facets
+    table = load_match_table(run_uid, path, mtime_ns, size)
+    facets = {c: table[c].value_counts().to_dict() if c in table else {}
+              for c in ("recommend_apply", "potential_match", "country")}
+    scores = pd.to_numeric(table["match_score"], errors="coerce") if "match_score" in table else pd.Series(dtype=float)
+    facets["match_score"] = (scores.min(), scores.max()) if scores.notna().any() else (None, None)
+    return facets
 
-    # === Compact Summary Table ===
-    # st.subheader("📋 Compact Match Table")
 
+@st.cache_data(max_entries=64)
+def load_match_page(run_uid: str, path: str, mtime_ns: int, size: int, in_warehouse: bool,
+                    page: int, page_size: int, sort_by: str, descending: bool, **filters) -> tuple:
+    """``(page table, total)``: filtered, sorted and paged in SQL, or in pandas as a fallback."""
+    if in_warehouse:
+        result = warehouse.record("match_page", run_uid, page=page, size=page_size, sort_by=sort_by,
+                                  descending=descending, **filters)
+        if result is not None:
+            records, total = result
+            return build_match_table(records), total
+    table = filter_match_table(load_match_table(run_uid, path, mtime_ns, size), sort_by, descending, **filters)
+    return table.iloc[page * page_size:(page + 1) * page_size].reset_index(drop=True), len(table)
 
-    # Dynamically collect all fields in summary
-    all_fields = sorted({k for entry in match_data for k in entry.get("summary", {}).keys()})
-
-    # Table with dynamic fields
-    st.subheader("📋 Dynamic Match Table")
-    table_data = []
-    for entry in match_data:
-        row = {"Line": entry.get("line_number"), "SERP URL": entry.get("serp_url")}
-        for field in all_fields:
-            row[field] = entry.get("summary", {}).get(field)
-        table_data.append(row)
 
-    st.dataframe(pd.DataFrame(table_data), use_container_width=True)
+@st.cache_data(ttl=60)
+def load_recent_matches(days, apply_only: bool) -> pd.DataFrame:
+    rows = warehouse.record("matches", days=days, recommend_apply="Yes" if apply_only else None) or []
+    return pd.DataFrame(rows)
 
 
-    # === Original Expander Cards (optional, can be removed) ===
-    with st.expander("🔍 View Detailed Match Cards", expanded=False):
-        for entry in match_data:
-            s = entry["summary"]
-            match_flag = "✅ Yes" if s["potential_match"] == "Yes" else "❌ No"
-            apply_flag = "✅ Yes" if s["recommend_apply"] == "Yes" else "❌ No"
-
-            with st.expander(f"{s['job_title']} at {s['company_name']} — Apply: {apply_flag} | Match: {match_flag}"):
-                st.markdown(f"**Country:** {s.get('country', 'Unknown')}")
-                st.markdown(f"**Visa Sponsorship Required:** {s.get('visa_sponsorship_required', 'Unknown')}")
-                st.markdown(f"**Company Culture:** {s.get('company_culture', 'Unknown')}")
-                st.markdown(f"**SERP URL:** [Link]({entry['serp_url']})")
+def render():
+    st.header("📊 Job Match Results")
 
-                st.markdown("**Significant Experience Gaps:**")
-                for gap in s.get("significant_experience_gaps", []):
-                    st.markdown(f"- {gap}")
+    # === Step 1: List runs (from the run catalog; no directory scan) ===
+    run_ids = run_catalog.record("runs_with_step", "score_matches") or RunManager.list_runs()
+    if not run_ids:
+        st.error("No run directories found.")
+        return
 
-                st.markdown("**Recommendation Reasons:**")
-                for reason in s.get("recommendation_reasons", []):
-                    st.markdown(f"- {reason}")
+    selected_uid = st.selectbox("Select a run:", run_ids, format_func=lambda uid: f"run_{uid}")
+    run = RunManager(selected_uid)
 
+    match_artifact = run.artifact("score_matches")
+    serp_artifact = run.artifact("export_jsonl")
+    if match_artifact is None or serp_artifact is None:
+        st.warning("Run directory is missing final match or serp file.")
+        return
+    stat = match_artifact.path.stat()
+    key = (selected_uid, str(match_artifact.path), stat.st_mtime_ns, stat.st_size)
+
+    # === Step 2: Filter, sort and page (in the warehouse; only the visible page reaches the browser) ===
+    in_warehouse = ingest_matches(*key)
+    facets = load_facets(*key, in_warehouse)
+
+    col1, col2, col3 = st.columns(3)
+    filters = {
+        "recommend_apply": col1.multiselect("Recommend apply", list(facets["recommend_apply"])),
+        "potential_match": col2.multiselect("Potential match", list(facets["potential_match"])),
+        "countries": col3.multiselect("Country", list(facets["country"])),
+    }
+    col4, col5 = st.columns(2)
+    filters["company"] = col4.text_input("Company contains").strip() or None
+    lo, hi = facets["match_score"]
+    filters["score_range"] = None
+    if lo is not None and hi is not None and lo < hi:
+        chosen = col5.slider("Match score", float(lo), float(hi), (float(lo), float(hi)))
+        if chosen != (float(lo), float(hi)):  # an untouched slider keeps postings without a score
+            filters["score_range"] = chosen
+
+    col6, col7, col8, col9 = st.columns(4)
+    sort_by = col6.selectbox("Sort by", MATCH_SORT_COLUMNS)
+    descending = col7.checkbox("Descending", value=sort_by == "match_score")
+    page_size = col8.selectbox("Rows per page", [25, 50, 100, 200], index=1)
+    page = col9.number_input("Page", min_value=1, value=1, step=1)
+
+    page_table, total = load_match_page(*key, in_warehouse, int(page) - 1, page_size, sort_by, descending, **filters)
+    n_pages = max(1, -(-total // page_size))
+    if page > n_pages:
+        page = n_pages
+        page_table, total = load_match_page(*key, in_warehouse, n_pages - 1, page_size, sort_by, descending,
+                                            **filters)
+    caption = f"{total} postings · page {int(page)} of {n_pages}"
+    if app_config().debug:
+        caption += f" · `{match_artifact.path.name}` ({'warehouse' if in_warehouse else 'in-memory'})"
+    st.caption(caption)
+
+    # Table with dynamic fields (every key found in the summaries of this page)
+    st.subheader("📋 Dynamic Match Table")
+    st.dataframe(page_table, use_container_width=True)
+
+    # === Detail card of one posting on this page, rendered on demand ===
+    with st.expander("🔍 View Detailed Match Card", expanded=False):
+        rows = page_table.to_dict(orient="records")
+        if rows:
+            choice = st.selectbox("Posting", range(len(rows)),
+                                  format_func=lambda i: f"{rows[i].get('Line')}: {match_card(rows[i])[0]}")
+            title, body = match_card(rows[choice])
+            st.markdown(f"#### {title}")
+            st.markdown(body)
+        else:
+            st.info("No postings match the filters.")
 
     st.subheader("🌐 URL Preview Table")
-
-    url_table = [
-        {
-            "Line": e["line_number"],
-            "Job Title": e["summary"]["job_title"],
-            "Company": e["summary"]["company_name"],
-            "SERP URL": e["serp_url"]
-        }
-        for e in match_data
-    ]
-
-    st.dataframe(pd.DataFrame(url_table), use_container_width=True)
+    st.dataframe(url_table(page_table), use_container_width=True)
+
+    # === Across runs (warehouse query, no files read) ===
+    with st.expander("🗂 Matches across all runs", expanded=False):
+        col1, col2 = st.columns(2)
+        days = col1.number_input("Last N days (0 = all)", min_value=0, value=30, step=1)
+        apply_only = col2.checkbox("Only recommended to apply", value=False)
+        recent = load_recent_matches(days or None, apply_only)
+        st.caption(f"{len(recent)} potential matches")
+        st.dataframe(recent, use_container_width=True)
@@ -3,9 +3,12 @@ from setuptools import setup, find_packages
 setup(
     name="jobserp-explorer",
     version="0.1.0",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     include_package_data=True,
     install_requires=open("requirements.txt").read().splitlines(),
+    extras_require={
+        "parquet": ["pyarrow>=14"],
+    },
     entry_points={
         "console_scripts": [
         "jobserp-explorer=jobserp_explorer.cli:main",        ],